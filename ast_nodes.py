@@ -0,0 +1,181 @@
+from type_system import Type
+
+
+class Node:
+    """Nodo base del AST: solo guarda la posición (inicio de la regla de origen)"""
+    __slots__ = ('line', 'column')
+
+    def __init__(self, line, column):
+        self.line = line
+        self.column = column
+
+
+class Program(Node):
+    __slots__ = ('body',)
+
+    def __init__(self, body, line=1, column=0):
+        super().__init__(line, column)
+        self.body = body  # Tupla de sentencias
+
+
+# Sentencias
+
+class Declaration(Node):
+    __slots__ = ('type', 'name', 'is_constant', 'init', 'reads_input')
+
+    def __init__(self, type, name, is_constant, init, reads_input, line, column):
+        super().__init__(line, column)
+        self.type = type                # type_system.Type
+        self.name = name
+        self.is_constant = is_constant
+        self.init = init                # Expresión de inicialización o None
+        self.reads_input = reads_input  # True si se inicializa con scn()
+
+
+class Assignment(Node):
+    __slots__ = ('name', 'value')
+
+    def __init__(self, name, value, line, column):
+        super().__init__(line, column)
+        self.name = name
+        self.value = value
+
+
+class ForStep(Node):
+    """Asignación del paso de un for (sin ';', no se verifica como asignación)"""
+    __slots__ = ('name', 'value')
+
+    def __init__(self, name, value, line, column):
+        super().__init__(line, column)
+        self.name = name
+        self.value = value
+
+
+class Function(Node):
+    __slots__ = ('name', 'return_type', 'params', 'params_line', 'params_column', 'body', 'is_pure',
+                 'has_tail_call')
+
+    def __init__(self, name, return_type, params, params_line, params_column, body, line, column):
+        super().__init__(line, column)
+        self.name = name
+        self.return_type = return_type  # None para funciones sin retorno
+        self.params = params            # Tupla de (nombre, tipo)
+        self.params_line = params_line
+        self.params_column = params_column
+        self.body = body
+        self.is_pure = False  # Lo decide el análisis semántico (ver SemanticAnalyzer.resolve_purity)
+        self.has_tail_call = False  # Algún rtn del cuerpo es una llamada de cola a sí misma
+
+
+class If(Node):
+    __slots__ = ('condition', 'then_body', 'else_body')
+
+    def __init__(self, condition, then_body, else_body, line, column):
+        super().__init__(line, column)
+        self.condition = condition
+        self.then_body = then_body
+        self.else_body = else_body  # Tupla vacía si no hay else
+
+
+class For(Node):
+    __slots__ = ('init', 'condition', 'step', 'body')
+
+    def __init__(self, init, condition, step, body, line, column):
+        super().__init__(line, column)
+        self.init = init  # Declaration, Assignment o None
+        self.condition = condition
+        self.step = step
+        self.body = body
+
+
+class While(Node):
+    __slots__ = ('condition', 'body')
+
+    def __init__(self, condition, body, line, column):
+        super().__init__(line, column)
+        self.condition = condition
+        self.body = body
+
+
+class Print(Node):
+    """clg(expresion) o clg("texto" $ id $ id)"""
+    __slots__ = ('value', 'template', 'names')
+
+    def __init__(self, value, template, names, line, column):
+        super().__init__(line, column)
+        self.value = value        # Expresión a imprimir o None
+        self.template = template  # Texto sin comillas de la forma interpolada o None
+        self.names = names        # Identificadores interpolados
+
+
+class Return(Node):
+    __slots__ = ('value', 'tail_call')
+
+    def __init__(self, value, line, column):
+        super().__init__(line, column)
+        self.value = value
+        self.tail_call = False  # rtn f(...) dentro de la propia f: se ejecuta como un salto
+
+
+# Expresiones
+
+class ExprNode(Node):
+    """Base de las expresiones: el análisis semántico guarda aquí su tipo y valor constante"""
+    __slots__ = ('type', 'value')
+
+    def __init__(self, line, column, type=None, value=None):
+        super().__init__(line, column)
+        self.type = type    # Tipo calculado (None si la expresión tiene errores)
+        self.value = value  # Valor constante plegado o None si no se conoce
+
+
+class Expression(ExprNode):
+    """Cadena de términos y operadores aritméticos, evaluada de izquierda a derecha"""
+    __slots__ = ('operands', 'operators')
+
+    def __init__(self, operands, operators, line, column):
+        super().__init__(line, column)
+        self.operands = operands
+        self.operators = operators
+
+
+class Comparison(Node):
+    __slots__ = ('left', 'operator', 'right')
+
+    def __init__(self, left, operator, right, line, column):
+        super().__init__(line, column)
+        self.left = left
+        self.operator = operator
+        self.right = right
+
+
+class Call(ExprNode):
+    __slots__ = ('name', 'args')
+
+    def __init__(self, name, args, line, column):
+        super().__init__(line, column)
+        self.name = name
+        self.args = args
+
+
+class Name(ExprNode):
+    __slots__ = ('name',)
+
+    def __init__(self, name, line, column):
+        super().__init__(line, column)
+        self.name = name
+
+
+class Number(ExprNode):
+    __slots__ = ('text',)
+
+    def __init__(self, text, value, type, line, column):
+        super().__init__(line, column, type, value)
+        self.text = text
+
+
+class String(ExprNode):
+    __slots__ = ()
+
+    def __init__(self, value, line, column):
+        super().__init__(line, column, Type.STR, value)  # value: texto sin comillas
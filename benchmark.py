@@ -0,0 +1,347 @@
+import gc
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+from contextlib import redirect_stdout
+from antlr4 import CommonTokenStream
+from char_streams import CompactFileStream
+from MiLenguajeParser import MiLenguajeParser
+from semantic_analyzer import SemanticAnalyzer
+from lowering import lower_program
+from program_generator import ProgramGenerator, parse_size
+from error_listener import MiErrorListener
+from main import (LEXERS, CompilationResult, parse_program, collect_symbol_rows, report_result,
+                  load_analyzed_program)
+from runtime import ProgramIO
+import bytecode
+import transpiler
+import c_backend
+import interpreter
+import vectorizer
+
+DEFAULT_SIZES = ["1KB", "10KB", "100KB", "1MB"]
+
+PHASES = ('lexico', 'sintactico', 'ast', 'semantico', 'reporte')
+
+# Programas para medir la ejecución: ciclos con aritmética, llamadas (recursivas y simples),
+# recursión de cola y cálculos con constantes (lo que pliega --optimize)
+EXECUTION_PROGRAMS = {
+    'ciclos': """
+ent total = 0;
+ent i = 0;
+while (i < 300000) {
+    total = i % 7 + total;
+    i = i + 1;
+}
+for (ent j = 0; j < 300000; j = j + 1) {
+    total = j % 3 + total;
+}
+clg(total);
+""",
+    'llamadas': """
+fct fib(ent n) : ent {
+    if (n < 2) {
+        rtn n;
+    }
+    rtn fib(n - 1) + fib(n - 2);
+}
+fct suma(lg a, ent b) : lg {
+    rtn a + b;
+}
+lg acc = 0;
+for (ent k = 0; k < 100000; k = k + 1) {
+    acc = suma(acc, k);
+}
+clg(fib(20));
+clg(acc);
+""",
+    # Recursión de cola más profunda que el límite de recursión: se ejecuta como ciclo
+    'cola': """
+fct cuenta(lg n, lg acc) : lg {
+    if (n == 0) {
+        rtn acc;
+    }
+    rtn cuenta(n - 1, acc + n);
+}
+clg(cuenta(300000, 0));
+""",
+    'constantes': """
+const ent base = 12;
+ent escala = base * 4 + 2;
+flt factor = escala / 8;
+flt total = 0.0;
+for (ent i = 0; i < 200000; i = i + 1) {
+    total = escala * 3 - base % 5 + i % 7 * factor + total;
+}
+clg(total);
+""",
+}
+
+
+def build_c(program):
+    directory = tempfile.mkdtemp(prefix="milenguaje-bench-")
+    return c_backend.build_executable(program, os.path.join(directory, "programa"))
+
+
+def run_c(executable, io):
+    c_backend.run_executable(executable, io)
+    shutil.rmtree(os.path.dirname(executable), ignore_errors=True)
+
+
+# Backends de ejecución comparados por --execution: (preparar(programa analizado) -> artefacto,
+# ejecutar(artefacto, io)). La preparación (compilar a bytecode, a Python o con cc) se mide aparte
+EXECUTION_BACKENDS = {
+    'vm': (bytecode.compile_program, bytecode.run_module),
+    'python': (transpiler.compile_python, transpiler.run_python),
+    'c': (build_c, run_c),
+    'closure': (interpreter.compile_program, interpreter.ClosureProgram.run),
+}
+if vectorizer.available():
+    EXECUTION_BACKENDS['closure-numpy'] = (lambda program: interpreter.compile_program(program, vectorize=True),
+                                           interpreter.ClosureProgram.run)
+
+# Script corto para medir la latencia de arranque: la compilación domina sobre la ejecución
+LATENCY_PROGRAM = """
+fct cuadrado(ent n) : ent {
+    rtn n * n;
+}
+ent total = 0;
+for (ent i = 0; i < 10; i = i + 1) {
+    total = total + cuadrado(i);
+}
+clg("total: " $ total);
+"""
+
+
+def time_phases(path, lexer_class):
+    """Compila un archivo midiendo por separado cada fase; retorna tiempos y conteos"""
+    timings = {}
+    clock = time.perf_counter
+
+    start = clock()
+    lexer = lexer_class(CompactFileStream(path))
+    lexer.removeErrorListeners()
+    token_stream = CommonTokenStream(lexer)
+    token_stream.fill()
+    timings['lexico'] = clock() - start
+    tokens = len(token_stream.tokens)
+
+    start = clock()
+    parser = MiLenguajeParser(token_stream)
+    listener = MiErrorListener()
+    tree = parse_program(parser, listener)
+    timings['sintactico'] = clock() - start
+    if listener.get_errors():
+        raise ValueError(f"{path}: errores sintácticos en el programa generado")
+
+    start = clock()
+    program = lower_program(tree)
+    tree = parser = token_stream = None
+    timings['ast'] = clock() - start
+
+    start = clock()
+    analyzer = SemanticAnalyzer()
+    analyzer.analyze(program)
+    timings['semantico'] = clock() - start
+    if analyzer.get_errors():
+        raise ValueError(f"{path}: {analyzer.get_errors()[0]}")
+
+    start = clock()
+    result = CompilationResult('semantico', symbols=collect_symbol_rows(analyzer.symbol_table))
+    with redirect_stdout(io.StringIO()):
+        report_result(result)
+    timings['reporte'] = clock() - start
+
+    return timings, tokens
+
+
+def count_lines(path):
+    with open(path, 'rb') as f:
+        return sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b''))
+
+
+def run_benchmark(sizes, lexer_class, repeat=1, generator_options=None):
+    """Genera un programa por tamaño y mide cada fase; retorna una fila por tamaño"""
+    rows = []
+    for size in sizes:
+        target = parse_size(size)
+        fd, path = tempfile.mkstemp(suffix='.txt', prefix='milenguaje_bench_')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as out:
+                ProgramGenerator(**(generator_options or {})).write(out, target)
+            lines = count_lines(path)
+            size_bytes = os.path.getsize(path)
+
+            best = None
+            for _ in range(repeat):
+                gc.collect()
+                timings, tokens = time_phases(path, lexer_class)
+                if best is None or sum(timings.values()) < sum(best.values()):
+                    best = timings
+        finally:
+            os.remove(path)
+
+        total = sum(best.values())
+        rows.append({
+            'size': size,
+            'bytes': size_bytes,
+            'lines': lines,
+            'tokens': tokens,
+            'seconds': best,
+            'total': total,
+            'tokens_per_second': tokens / total if total else 0.0,
+            'lines_per_second': lines / total if total else 0.0,
+        })
+    return rows
+
+
+def run_execution_benchmark(backends, repeat=1, optimize=False):
+    """Ejecuta cada programa de EXECUTION_PROGRAMS con cada backend; retorna filas con tiempos.
+    Con optimize los programas se ejecutan optimizados (ver main.optimize_program)"""
+    rows = []
+    for name, source in EXECUTION_PROGRAMS.items():
+        program = load_analyzed_program(f"<{name}>", source, optimize=optimize)
+        for backend in backends:
+            prepare, run = EXECUTION_BACKENDS[backend]
+            best_prepare = best = None
+            output = None
+            for _ in range(repeat):
+                out = io.StringIO()
+                start = time.perf_counter()
+                artifact = prepare(program)
+                prepared = time.perf_counter()
+                run(artifact, ProgramIO(io.StringIO(), out))
+                elapsed = time.perf_counter() - prepared
+                best_prepare = prepared - start if best_prepare is None else min(best_prepare, prepared - start)
+                best = elapsed if best is None else min(best, elapsed)
+                output = out.getvalue()
+            rows.append({'program': name, 'backend': backend, 'prepare_seconds': best_prepare,
+                         'seconds': best, 'output': output})
+    return rows
+
+
+def measure_latency(backends, repeat=1):
+    """Tiempo desde que se lanza `python main.py programa --run=backend` hasta el primer byte
+    de salida de clg (incluye arranque del intérprete, importaciones, compilación y ejecución)"""
+    main_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="milenguaje-bench-") as directory:
+        path = os.path.join(directory, "latencia.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(LATENCY_PROGRAM)
+        for backend in backends:
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                process = subprocess.Popen([sys.executable, main_path, path, f"--run={backend}"],
+                                           stdout=subprocess.PIPE, stdin=subprocess.DEVNULL)
+                first = process.stdout.read(1)
+                elapsed = time.perf_counter() - start
+                output = (first + process.stdout.read()).decode('utf-8')
+                process.wait()
+                best = elapsed if best is None else min(best, elapsed)
+            rows.append({'backend': backend, 'first_output_seconds': best, 'output': output})
+    return rows
+
+
+def print_latency_table(rows):
+    print("BACKEND".ljust(15) + "PRIMER CLG".rjust(12) + "  SALIDA")
+    print("-" * 45)
+    for row in rows:
+        output = row['output'].strip().replace("\n", " ")
+        print(row['backend'].ljust(15) + f"{row['first_output_seconds']:.3f}s".rjust(12) + f"  {output}")
+
+
+def print_execution_table(rows):
+    print("PROGRAMA".ljust(12) + "BACKEND".ljust(15) + "PREPARAR".rjust(10) + "EJECUTAR".rjust(10) + "  SALIDA")
+    print("-" * 65)
+    for row in rows:
+        output = row['output'].strip().replace("\n", " ")
+        print(row['program'].ljust(12) + row['backend'].ljust(15) + f"{row['prepare_seconds']:.3f}s".rjust(10)
+              + f"{row['seconds']:.3f}s".rjust(10) + f"  {output}")
+
+
+def print_table(rows):
+    header = "TAMAÑO".ljust(8) + "TOKENS".rjust(10) + "".join(p.upper().rjust(12) for p in PHASES)
+    header += "TOTAL".rjust(10) + "TOKENS/S".rjust(12) + "LÍNEAS/S".rjust(12)
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        line = row['size'].ljust(8) + str(row['tokens']).rjust(10)
+        line += "".join(f"{row['seconds'][phase]:.3f}s".rjust(12) for phase in PHASES)
+        line += f"{row['total']:.3f}s".rjust(10)
+        line += f"{row['tokens_per_second']:,.0f}".rjust(12) + f"{row['lines_per_second']:,.0f}".rjust(12)
+        print(line)
+
+
+def main():
+    """Uso: python benchmark.py [--sizes=1KB,10KB,...,100MB] [--lexer=antlr|fast] [--repeat=N]
+    [--json=ARCHIVO] [--functions=N] [--nesting=N] [--expression-length=N] [--string-density=F]
+       python benchmark.py --execution[=vm,python,c,closure] [--optimize] [--repeat=N] [--json=ARCHIVO]
+       python benchmark.py --latency[=vm,...] [--repeat=N] [--json=ARCHIVO]"""
+    sizes = DEFAULT_SIZES
+    execution = None
+    latency = None
+    optimize = False
+    lexer_class = LEXERS['antlr']
+    repeat = 1
+    json_path = None
+    generator_options = {}
+
+    for arg in sys.argv[1:]:
+        if arg.startswith('--sizes='):
+            sizes = [s for s in arg.split('=', 1)[1].split(',') if s]
+        elif arg.startswith('--lexer='):
+            name = arg.split('=', 1)[1]
+            if name not in LEXERS:
+                print(f"Error: lexer desconocido '{name}' (opciones: {', '.join(LEXERS)})")
+                sys.exit(1)
+            lexer_class = LEXERS[name]
+        elif arg == '--execution':
+            execution = list(EXECUTION_BACKENDS)
+        elif arg == '--optimize':
+            optimize = True
+        elif arg == '--latency':
+            latency = list(EXECUTION_BACKENDS)
+        elif arg.startswith('--execution=') or arg.startswith('--latency='):
+            selected = [b for b in arg.split('=', 1)[1].split(',') if b]
+            if arg.startswith('--execution='):
+                execution = selected
+            else:
+                latency = selected
+            unknown = [b for b in selected if b not in EXECUTION_BACKENDS]
+            if unknown:
+                print(f"Error: backend desconocido '{unknown[0]}' (opciones: {', '.join(EXECUTION_BACKENDS)})")
+                sys.exit(1)
+        elif arg.startswith('--repeat='):
+            repeat = max(1, int(arg.split('=', 1)[1]))
+        elif arg.startswith('--json='):
+            json_path = arg.split('=', 1)[1]
+        elif arg.startswith('--') and '=' in arg:
+            key, value = arg[2:].split('=', 1)
+            generator_options[key.replace('-', '_')] = float(value) if key == 'string-density' else int(value)
+        else:
+            print(main.__doc__)
+            sys.exit(1)
+
+    if latency is not None:
+        rows = measure_latency(latency, repeat)
+        print_latency_table(rows)
+    elif execution is not None:
+        rows = run_execution_benchmark(execution, repeat, optimize)
+        print_execution_table(rows)
+    else:
+        rows = run_benchmark(sizes, lexer_class, repeat, generator_options)
+        print_table(rows)
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
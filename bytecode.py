@@ -0,0 +1,512 @@
+import os
+import sys
+import marshal
+import hashlib
+from ast_nodes import (Declaration, Assignment, ForStep, Function, If, For, While, Print, Return,
+                       Expression, Comparison, Call, Name, Number, String)
+from codegen import SlotResolver, BackendError, value_type, needs_conversion
+from runtime import (MiRuntimeError, ProgramIO, DEFAULT_VALUES, CONVERTERS, INVALID_OPERATION, MISSING,
+                     format_value)
+from type_system import Type
+
+# Códigos de operación. Cada instrucción ocupa dos enteros: (código, argumento)
+(LOAD_LOCAL, LOAD_GLOBAL, LOAD_CONST, STORE_LOCAL, STORE_GLOBAL,
+ ADD, SUB, MUL, DIV, MOD,
+ JUMP, JUMP_IF_NOT_LT, JUMP_IF_NOT_GT, JUMP_IF_NOT_LE, JUMP_IF_NOT_GE, JUMP_IF_NOT_EQ, JUMP_IF_NOT_NE,
+ CALL, RETURN, POP, CONVERT, PRINT, PRINT_TEMPLATE, READ) = range(24)
+
+OPCODE_NAMES = ("LOAD_LOCAL", "LOAD_GLOBAL", "LOAD_CONST", "STORE_LOCAL", "STORE_GLOBAL",
+                "ADD", "SUB", "MUL", "DIV", "MOD",
+                "JUMP", "JUMP_IF_NOT_LT", "JUMP_IF_NOT_GT", "JUMP_IF_NOT_LE", "JUMP_IF_NOT_GE",
+                "JUMP_IF_NOT_EQ", "JUMP_IF_NOT_NE",
+                "CALL", "RETURN", "POP", "CONVERT", "PRINT", "PRINT_TEMPLATE", "READ")
+
+ARITHMETIC_OPCODES = {'+': ADD, '-': SUB, '*': MUL, '/': DIV, '%': MOD}
+
+# Salto que se toma cuando la comparación es falsa
+COMPARISON_JUMPS = {'<': JUMP_IF_NOT_LT, '>': JUMP_IF_NOT_GT, '<=': JUMP_IF_NOT_LE,
+                    '>=': JUMP_IF_NOT_GE, '==': JUMP_IF_NOT_EQ, '!=': JUMP_IF_NOT_NE}
+
+MLC_MAGIC = b"MLC\x01"
+
+# Módulos que determinan el formato del bytecode: un .mlc de otra versión se descarta
+MLC_MODULES = ["ast_nodes.py", "codegen.py", "bytecode.py", "runtime.py", "type_system.py"]
+
+
+class CodeObject:
+    """Código de una función (o del programa principal) ya resuelto a slots"""
+    __slots__ = ('name', 'param_count', 'local_count', 'code', 'lines', 'is_pure')
+
+    def __init__(self, name, param_count=0, local_count=0, code=None, lines=None, is_pure=False):
+        self.name = name
+        self.param_count = param_count
+        self.local_count = local_count
+        self.code = code if code is not None else []    # Enteros (código, argumento, ...)
+        self.lines = lines if lines is not None else []  # Línea de origen de cada instrucción
+        self.is_pure = is_pure  # Función pura según el analizador: se puede memorizar
+
+    def to_tuple(self):
+        return (self.name, self.param_count, self.local_count, self.code, self.lines, self.is_pure)
+
+
+class Module:
+    """Programa compilado: pool de constantes, tabla de funciones y código principal"""
+    __slots__ = ('constants', 'functions', 'main', 'global_count')
+
+    def __init__(self, constants, functions, main, global_count):
+        self.constants = constants
+        self.functions = functions
+        self.main = main
+        self.global_count = global_count
+
+    def to_tuple(self):
+        return (self.constants, tuple(f.to_tuple() for f in self.functions), self.main.to_tuple(),
+                self.global_count)
+
+    @classmethod
+    def from_tuple(cls, data):
+        constants, functions, main, global_count = data
+        return cls(constants, [CodeObject(*f) for f in functions], CodeObject(*main), global_count)
+
+    def instruction_count(self):
+        """Instrucciones del programa principal y de todas las funciones"""
+        return len(self.main.lines) + sum(len(code.lines) for code in self.functions)
+
+
+class BytecodeCompiler:
+    """Traduce el AST analizado (sin errores) a bytecode para la VM"""
+
+    def __init__(self):
+        self.resolver = SlotResolver()
+        self.constants = []
+        self.constant_index = {}
+        self.codes = []      # CodeObject por función, en el orden de la tabla
+        self.current = None  # CodeObject en construcción
+        self.line = 0
+
+    def compile(self, program):
+        self.current = CodeObject("<principal>")
+        self.compile_body(program.body)
+        self.emit(LOAD_CONST, self.constant(None))
+        self.emit(RETURN)
+        main = self.current
+        main.local_count = self.resolver.global_count
+        return Module(tuple(self.constants), self.codes, main, self.resolver.global_count)
+
+    # Emisión
+    def emit(self, op, arg=0):
+        self.current.code += (op, arg)
+        self.current.lines.append(self.line)
+        return len(self.current.code) - 2
+
+    def patch(self, position, target):
+        self.current.code[position + 1] = target
+
+    def here(self):
+        return len(self.current.code)
+
+    def constant(self, value):
+        # El tipo forma parte de la clave: 1, 1.0 y True son iguales como claves de dict
+        key = (type(value), value)
+        index = self.constant_index.get(key)
+        if index is None:
+            index = self.constant_index[key] = len(self.constants)
+            self.constants.append(value)
+        return index
+
+    def load(self, variable):
+        if variable.is_global and self.resolver.current_function is not None:
+            self.emit(LOAD_GLOBAL, variable.index)
+        else:
+            self.emit(LOAD_LOCAL, variable.index)
+
+    def store(self, variable):
+        if variable.is_global and self.resolver.current_function is not None:
+            self.emit(STORE_GLOBAL, variable.index)
+        else:
+            self.emit(STORE_LOCAL, variable.index)
+
+    def convert(self, source_type, target_type):
+        if needs_conversion(source_type, target_type):
+            self.emit(CONVERT, int(target_type))
+
+    # Sentencias
+    def compile_body(self, statements):
+        for statement in statements:
+            self.line = statement.line
+            self.STATEMENT_COMPILERS[type(statement)](self, statement)
+
+    def declaration(self, node):
+        if node.reads_input:
+            self.emit(READ, int(node.type))
+        elif node.init is not None:
+            self.expression(node.init)
+            self.convert(value_type(node.init), node.type)
+        else:
+            self.emit(LOAD_CONST, self.constant(DEFAULT_VALUES[node.type]))
+        # Se declara después de compilar el inicializador, como en el analizador
+        self.store(self.resolver.declare_variable(node.name, node.type))
+
+    def assignment(self, node):
+        variable = self.resolver.variable(node.name, node)
+        self.expression(node.value)
+        self.convert(value_type(node.value), variable.type)
+        self.store(variable)
+
+    def function(self, node):
+        function = self.resolver.declare_function(node)
+        outer, outer_line = self.current, self.line
+        self.current = CodeObject(node.name, len(node.params), is_pure=node.is_pure)
+        self.codes.append(self.current)
+
+        self.resolver.enter_function(function)
+        self.compile_body(node.body)
+        # Al llegar al final sin rtn se retorna el valor por defecto del tipo (None si es void)
+        self.emit(LOAD_CONST, self.constant(DEFAULT_VALUES.get(function.return_type)))
+        self.emit(RETURN)
+        self.resolver.exit_function()
+
+        self.current.local_count = function.local_count
+        self.current, self.line = outer, outer_line
+
+    def condition_jump(self, node):
+        """Evalúa una comparación y salta si es falsa; retorna la posición a parchear"""
+        self.expression(node.left)
+        self.expression(node.right)
+        return self.emit(COMPARISON_JUMPS[node.operator])
+
+    def if_statement(self, node):
+        self.resolver.enter_block()
+        skip_then = self.condition_jump(node.condition)
+        self.compile_body(node.then_body)
+        if node.else_body:
+            skip_else = self.emit(JUMP)
+            self.patch(skip_then, self.here())
+            self.compile_body(node.else_body)
+            self.patch(skip_else, self.here())
+        else:
+            self.patch(skip_then, self.here())
+        self.resolver.exit_block()
+
+    def while_loop(self, node):
+        self.resolver.enter_block()
+        start = self.here()
+        exit_jump = self.condition_jump(node.condition)
+        self.compile_body(node.body)
+        self.line = node.line
+        self.emit(JUMP, start)
+        self.patch(exit_jump, self.here())
+        self.resolver.exit_block()
+
+    def for_loop(self, node):
+        self.resolver.enter_block()
+        if node.init is not None:
+            self.STATEMENT_COMPILERS[type(node.init)](self, node.init)
+        start = self.here()
+        exit_jump = self.condition_jump(node.condition)
+        self.compile_body(node.body)
+        self.line = node.line
+        self.assignment(node.step)
+        self.emit(JUMP, start)
+        self.patch(exit_jump, self.here())
+        self.resolver.exit_block()
+
+    def print_statement(self, node):
+        if node.value is not None:
+            self.expression(node.value)
+            self.emit(PRINT)
+            return
+        for name in node.names:
+            self.load(self.resolver.variable(name, node))
+        # El argumento indexa una constante (texto, cantidad de valores interpolados)
+        self.emit(PRINT_TEMPLATE, self.constant((node.template, len(node.names))))
+
+    def return_statement(self, node):
+        if node.tail_call:
+            # Llamada de cola a la propia función: nuevos argumentos en los parámetros y salto
+            # al inicio, sin CALL ni marco nuevo
+            function = self.resolver.current_function
+            self.call_arguments(node.value, function)
+            for param in reversed(function.params):
+                self.emit(STORE_LOCAL, param.index)
+            self.emit(JUMP, 0)
+            return
+        self.expression(node.value)
+        self.convert(value_type(node.value), self.resolver.current_function.return_type)
+        self.emit(RETURN)
+
+    def call_statement(self, node):
+        self.call(node)
+        self.emit(POP)
+
+    # Expresiones
+    def expression(self, node):
+        kind = type(node)
+        if kind is Name:
+            self.load(self.resolver.variable(node.name, node))
+        elif kind is Number or kind is String:
+            self.emit(LOAD_CONST, self.constant(node.value))
+        elif kind is Call:
+            self.call(node)
+        else:
+            self.expression(node.operands[0])
+            for operator, operand in zip(node.operators, node.operands[1:]):
+                self.expression(operand)
+                self.emit(ARITHMETIC_OPCODES[operator])
+
+    def call(self, node):
+        function = self.resolver.function(node.name, node)
+        self.call_arguments(node, function)
+        self.emit(CALL, function.index)
+
+    def call_arguments(self, node, function):
+        for arg, param in zip(node.args, function.params):
+            self.expression(arg)
+            self.convert(value_type(arg), param.type)
+
+    STATEMENT_COMPILERS = {
+        Declaration: declaration,
+        Assignment: assignment,
+        ForStep: assignment,
+        Function: function,
+        If: if_statement,
+        For: for_loop,
+        While: while_loop,
+        Print: print_statement,
+        Return: return_statement,
+        Call: call_statement,
+    }
+
+
+def compile_program(program):
+    """Compila un Program analizado a un Module"""
+    return BytecodeCompiler().compile(program)
+
+
+class VirtualMachine:
+    """Ejecuta un Module con una pila de valores y una pila de marcos propia: las llamadas
+    de MiLenguaje no consumen marcos de Python, así que la recursión profunda no desborda.
+
+    Con memo (un MemoTable), CALL a una función pura busca primero el resultado en su
+    caché; si no está, el marco guarda la clave y RETURN guarda el resultado."""
+
+    def __init__(self, module, io=None, memo=None):
+        self.module = module
+        self.io = io or ProgramIO()
+        self.memo = memo
+
+    def run(self):
+        module = self.module
+        io = self.io
+        constants = module.constants
+        memo = self.memo
+        functions = [(f.code, f.param_count, [None] * (f.local_count - f.param_count),
+                      memo.cache(f.name) if memo is not None and f.is_pure else None)
+                     for f in module.functions]
+        converters = [CONVERTERS.get(type_code) for type_code in Type]
+        write_line = io.write_line
+
+        code = module.main.code
+        globals_ = [None] * module.global_count
+        locals_ = globals_
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        frames = []
+        pc = 0
+        try:
+            while True:
+                op = code[pc]
+                arg = code[pc + 1]
+                pc += 2
+                if op == LOAD_LOCAL:
+                    push(locals_[arg])
+                elif op == LOAD_CONST:
+                    push(constants[arg])
+                elif op == STORE_LOCAL:
+                    locals_[arg] = pop()
+                elif op == ADD:
+                    right = pop()
+                    stack[-1] += right
+                elif op == SUB:
+                    right = pop()
+                    stack[-1] -= right
+                elif op == MUL:
+                    right = pop()
+                    stack[-1] *= right
+                elif op <= JUMP_IF_NOT_NE and op >= JUMP:
+                    if op == JUMP:
+                        pc = arg
+                        continue
+                    right = pop()
+                    left = pop()
+                    if op == JUMP_IF_NOT_LT:
+                        taken = not left < right
+                    elif op == JUMP_IF_NOT_GT:
+                        taken = not left > right
+                    elif op == JUMP_IF_NOT_LE:
+                        taken = not left <= right
+                    elif op == JUMP_IF_NOT_GE:
+                        taken = not left >= right
+                    elif op == JUMP_IF_NOT_EQ:
+                        taken = left != right
+                    else:
+                        taken = left == right
+                    if taken:
+                        pc = arg
+                elif op == LOAD_GLOBAL:
+                    push(globals_[arg])
+                elif op == STORE_GLOBAL:
+                    globals_[arg] = pop()
+                elif op == CALL:
+                    function_code, param_count, padding, cache = functions[arg]
+                    if param_count:
+                        args = stack[-param_count:]
+                        del stack[-param_count:]
+                    else:
+                        args = []
+                    pending = None
+                    if cache is not None:
+                        key = tuple(args)
+                        result = cache.lookup(key)
+                        if result is not MISSING:
+                            push(result)
+                            continue
+                        pending = (cache, key)
+                    args += padding
+                    frames.append((code, pc, locals_, pending))
+                    code = function_code
+                    locals_ = args
+                    pc = 0
+                elif op == RETURN:
+                    if not frames:
+                        break
+                    code, pc, locals_, pending = frames.pop()
+                    if pending is not None:
+                        pending[0].store(pending[1], stack[-1])
+                elif op == DIV:
+                    right = pop()
+                    stack[-1] /= right
+                elif op == MOD:
+                    right = pop()
+                    stack[-1] %= right
+                elif op == CONVERT:
+                    stack[-1] = converters[arg](stack[-1])
+                elif op == POP:
+                    pop()
+                elif op == PRINT:
+                    write_line(format_value(pop()))
+                elif op == PRINT_TEMPLATE:
+                    text, count = constants[arg]
+                    if count:
+                        values = stack[-count:]
+                        del stack[-count:]
+                        text += "".join(map(format_value, values))
+                    write_line(text)
+                elif op == READ:
+                    push(io.read_value(Type(arg)))
+                else:
+                    raise MiRuntimeError(f"Instrucción desconocida {op}")
+        except MiRuntimeError as e:
+            if e.line is None:
+                e.line = self.line_at(code, pc)
+            raise
+        except ZeroDivisionError:
+            message = "Módulo por cero" if code[pc - 2] == MOD else "División por cero"
+            raise MiRuntimeError(message, self.line_at(code, pc))
+        except (TypeError, ValueError, OverflowError):
+            raise MiRuntimeError(INVALID_OPERATION, self.line_at(code, pc))
+        except RecursionError:
+            raise MiRuntimeError("Recursión demasiado profunda", self.line_at(code, pc))
+        finally:
+            io.flush()
+
+    def line_at(self, code, pc):
+        """Línea de origen de la instrucción que termina en `pc`"""
+        module = self.module
+        for code_object in [module.main, *module.functions]:
+            if code_object.code is code:
+                index = max(0, pc // 2 - 1)
+                return code_object.lines[index] if index < len(code_object.lines) else None
+        return None
+
+
+def run_module(module, io=None, memo=None):
+    VirtualMachine(module, io, memo).run()
+
+
+# Serialización a .mlc
+_bytecode_version = None
+
+def bytecode_version():
+    """Huella del front-end y del formato de bytecode (se calcula una vez por proceso)"""
+    global _bytecode_version
+    if _bytecode_version is None:
+        from compile_cache import compiler_version, module_fingerprint
+        _bytecode_version = hashlib.sha256((compiler_version() + module_fingerprint(MLC_MODULES)).encode()).hexdigest()
+    return _bytecode_version
+
+
+def source_digest(source_bytes):
+    return hashlib.sha256(source_bytes).hexdigest()
+
+
+def save_module(module, path, source_hash=""):
+    """Escribe el módulo como .mlc: cabecera, versión, huella del fuente y datos con marshal"""
+    header = (bytecode_version(), source_hash, sys.version_info[:2])
+    data = marshal.dumps((header, module.to_tuple()))
+    temp_path = f"{path}.tmp{os.getpid()}"
+    with open(temp_path, 'wb') as f:
+        f.write(MLC_MAGIC)
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def load_module(path, source_hash=None):
+    """Lee un .mlc; retorna None si no es válido, es de otra versión o de otro fuente"""
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(MLC_MAGIC)) != MLC_MAGIC:
+                return None
+            header, data = marshal.loads(f.read())
+    except (OSError, ValueError, EOFError, TypeError):
+        return None
+    version, stored_hash, python_version = header
+    if version != bytecode_version() or tuple(python_version) != sys.version_info[:2]:
+        return None
+    if source_hash is not None and stored_hash != source_hash:
+        return None
+    return Module.from_tuple(data)
+
+
+def disassemble(module, out=None):
+    """Listado legible del bytecode de un módulo"""
+    out = out or sys.stdout
+    for code_object in [module.main, *module.functions]:
+        out.write(f"== {code_object.name} (parámetros={code_object.param_count}, "
+                  f"locales={code_object.local_count})\n")
+        code = code_object.code
+        for i in range(0, len(code), 2):
+            op, arg = code[i], code[i + 1]
+            detail = ""
+            if op == LOAD_CONST or op == PRINT_TEMPLATE:
+                detail = f"  ({module.constants[arg]!r})"
+            elif op == CALL:
+                detail = f"  ({module.functions[arg].name})"
+            out.write(f"{code_object.lines[i // 2]:>6} {i:>6} {OPCODE_NAMES[op]:<16}{arg}{detail}\n")
+
+
+def main():
+    """Uso: python bytecode.py programa.mlc — muestra el bytecode de un módulo compilado"""
+    if len(sys.argv) != 2:
+        print(main.__doc__)
+        return
+    module = load_module(sys.argv[1])
+    if module is None:
+        print(f"{sys.argv[1]}: no es un .mlc válido para esta versión del compilador")
+        sys.exit(1)
+    disassemble(module)
+
+
+if __name__ == "__main__":
+    main()
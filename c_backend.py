@@ -0,0 +1,409 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from ast_nodes import (Declaration, Assignment, ForStep, Function, If, For, While, Print, Return,
+                       Expression, Comparison, Call, Name, Number, String)
+from codegen import SlotResolver, BackendError, value_type
+from runtime import INVALID_OPERATION
+from type_system import Type
+
+RUNTIME_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "c_runtime.h")
+
+# Representación en C de cada tipo: ent y lg con el ancho del lenguaje (el desbordamiento
+# da la vuelta en complemento a dos, a diferencia de los enteros de Python de los otros backends)
+C_TYPES = {Type.ENT: 'int32_t', Type.LG: 'int64_t', Type.FLT: 'double', Type.STR: 'ml_str', Type.VOID: 'void'}
+
+UNSIGNED_TYPES = {Type.ENT: 'uint32_t', Type.LG: 'uint64_t'}
+
+C_DEFAULTS = {Type.ENT: '0', Type.LG: '0', Type.FLT: '0.0', Type.STR: 'ML_LITERAL("", 0)'}
+
+PRINTERS = {Type.ENT: 'ml_print_i64', Type.LG: 'ml_print_i64', Type.FLT: 'ml_print_f64', Type.STR: 'ml_print_str'}
+
+MODULO_FUNCTIONS = {Type.ENT: 'ml_mod_i32', Type.LG: 'ml_mod_i64', Type.FLT: 'ml_mod_f64'}
+
+# Opciones del compilador de C; el ejecutable solo necesita libm
+CFLAGS = ['-O2', '-std=c99']
+LDFLAGS = ['-lm']
+
+# Etiqueta al inicio de las funciones con llamadas de cola (rtn f(...) salta aquí)
+TAIL_LABEL = 'ml_cola'
+
+
+def c_string(text):
+    """Literal de C y longitud en bytes de un texto (UTF-8, con escapes octales)"""
+    data = text.encode('utf-8')
+    parts = []
+    for byte in data:
+        char = chr(byte)
+        if char in '"\\?' or not 32 <= byte < 127:
+            parts.append(f"\\{byte:03o}")
+        else:
+            parts.append(char)
+    return '"' + ''.join(parts) + '"', len(data)
+
+
+class CGenerator:
+    """Traduce el AST analizado a un programa C autocontenido.
+
+    Las variables del programa principal son estáticas globales y cada `fct` (incluidas las
+    anidadas) es una función de C de nivel superior; las locales se declaran en el bloque de
+    C que corresponde al bloque de MiLenguaje, así que el sombreado se conserva. Cada nombre
+    lleva prefijo g/l/f con su slot, igual que en el backend de Python."""
+
+    def __init__(self):
+        self.resolver = SlotResolver()
+        self.globals = []    # Variables del marco global, en orden de slot
+        self.functions = []  # Definiciones de funciones ya generadas (listas de líneas)
+        self.lines = None    # Líneas del cuerpo en construcción
+        self.depth = 0
+        self.temporaries = []  # Declaraciones de temporales de la función en construcción
+
+    def generate(self, program):
+        self.lines = main_lines = []
+        self.depth = 1
+        self.body(program.body)
+        with open(RUNTIME_PATH, encoding='utf-8') as f:
+            output = [f"#define ML_INVALID_OPERATION {c_string(INVALID_OPERATION)[0]}", f.read(), "/* Programa */"]
+        output.extend(f"static {C_TYPES[v.type]} {self.variable_name(v)} = {C_DEFAULTS[v.type]};"
+                      for v in self.globals)
+        output.extend(self.signature(function) + ";" for function in self.resolver.functions)
+        for lines in self.functions:
+            output.append("")
+            output.extend(lines)
+        output.append("")
+        output.append("int main(void) {")
+        output.extend(self.temporaries)
+        output.extend(main_lines)
+        output.append("    ml_flush();")
+        output.append("    return 0;")
+        output.append("}")
+        return "\n".join(output) + "\n"
+
+    # Nombres
+    @staticmethod
+    def variable_name(variable):
+        prefix = 'g' if variable.is_global else 'l'
+        return f"{prefix}{variable.index}_{variable.name}"
+
+    @staticmethod
+    def function_name(function):
+        return f"f{function.index}_{function.name}"
+
+    def signature(self, function):
+        params = ", ".join(f"{C_TYPES[p.type]} {self.variable_name(p)}" for p in function.params)
+        return f"static {C_TYPES[function.return_type]} {self.function_name(function)}({params or 'void'})"
+
+    def temporary(self, type_code):
+        name = f"t{len(self.temporaries)}"
+        self.temporaries.append(f"    {C_TYPES[type_code]} {name};")
+        return name
+
+    def sequenced(self, code, type_code, following):
+        """C no fija el orden de evaluación de los operandos: si una expresión posterior
+        contiene una llamada (que puede escribir globales o imprimir), el valor anterior se
+        guarda antes en un temporal con el operador coma. Retorna (prefijo, código)."""
+        if not contains_call(following) or code.lstrip('-').replace('.', '', 1).isdigit():
+            return "", code
+        name = self.temporary(type_code)
+        return f"{name} = {code}, ", name
+
+    def emit(self, text):
+        self.lines.append("    " * self.depth + text)
+
+    @staticmethod
+    def convert(code, source_type, target_type, line):
+        """Expresión de C que convierte un valor al tipo destino (variables, parámetros y retornos)"""
+        if source_type == target_type:
+            return code
+        if source_type == Type.VOID:
+            raise BackendError("Una función sin retorno no produce un valor", line)
+        if target_type == Type.STR or source_type == Type.STR:
+            return code  # El analizador no permite mezclar str con números
+        if target_type == Type.FLT:
+            return f"(double)({code})"
+        if source_type == Type.FLT:
+            # Truncar hacia cero como int(); fuera de rango el resultado no está definido en C
+            return f"({C_TYPES[target_type]})(int64_t)({code})"
+        return f"({C_TYPES[target_type]})({code})"
+
+    # Sentencias
+    def body(self, statements):
+        for statement in statements:
+            self.STATEMENT_TRANSLATORS[type(statement)](self, statement)
+
+    def block(self, header, statements, emit_body=None):
+        self.emit(f"{header} {{" if header else "{")
+        self.depth += 1
+        if emit_body is not None:
+            emit_body()
+        else:
+            self.body(statements)
+        self.depth -= 1
+        self.emit("}")
+
+    def declaration(self, node):
+        if node.reads_input:
+            value = self.read_value(node.type, node.line)
+        elif node.init is not None:
+            value = self.convert(self.expression(node.init), value_type(node.init), node.type, node.line)
+        else:
+            value = C_DEFAULTS[node.type]
+        variable = self.resolver.declare_variable(node.name, node.type)
+        if variable.is_global:
+            self.globals.append(variable)
+            self.emit(f"{self.variable_name(variable)} = {value};")
+        else:
+            self.emit(f"{C_TYPES[variable.type]} {self.variable_name(variable)} = {value};")
+
+    @staticmethod
+    def read_value(type_code, line):
+        if type_code == Type.STR:
+            return "ml_read_line()"
+        if type_code == Type.FLT:
+            return f"ml_read_f64({line})"
+        return f"({C_TYPES[type_code]})ml_read_int({line}, \"{type_code}\")"
+
+    def assignment(self, node):
+        variable = self.resolver.variable(node.name, node)
+        value = self.convert(self.expression(node.value), value_type(node.value), variable.type, node.line)
+        self.emit(f"{self.variable_name(variable)} = {value};")
+
+    def function(self, node):
+        function = self.resolver.declare_function(node)
+        self.resolver.enter_function(function)
+        outer = self.lines, self.depth, self.temporaries
+        self.lines, self.depth, self.temporaries = [], 1, []
+        self.body(node.body)
+        if function.return_type != Type.VOID:
+            # Al llegar al final sin rtn se retorna el valor por defecto del tipo
+            self.emit(f"return {C_DEFAULTS[function.return_type]};")
+        if node.has_tail_call:
+            self.lines.insert(0, f"{TAIL_LABEL}:;")
+        self.functions.append([self.signature(function) + " {", *self.temporaries, *self.lines, "}"])
+        self.lines, self.depth, self.temporaries = outer
+        self.resolver.exit_function()
+
+    def if_statement(self, node):
+        self.resolver.enter_block()
+        self.block(f"if {self.comparison(node.condition)}", node.then_body)
+        if node.else_body:
+            self.block("else", node.else_body)
+        self.resolver.exit_block()
+
+    def while_loop(self, node):
+        self.resolver.enter_block()
+        self.block(f"while {self.comparison(node.condition)}", node.body)
+        self.resolver.exit_block()
+
+    def for_loop(self, node):
+        # for (init; condición; paso) { cuerpo } -> { init; while (condición) { cuerpo; paso } }
+        self.resolver.enter_block()
+
+        def loop():
+            if node.init is not None:
+                self.STATEMENT_TRANSLATORS[type(node.init)](self, node.init)
+
+            def body():
+                self.body(node.body)
+                self.assignment(node.step)
+            self.block(f"while {self.comparison(node.condition)}", None, body)
+        self.block("", None, loop)
+        self.resolver.exit_block()
+
+    def print_statement(self, node):
+        if node.value is not None:
+            source_type = value_type(node.value)
+            if source_type == Type.VOID:
+                raise BackendError("Una función sin retorno no produce un valor", node.line, node.column)
+            self.emit(f"{PRINTERS[source_type]}({self.expression(node.value)});")
+        else:
+            if node.template:
+                literal, size = c_string(node.template)
+                self.emit(f"ml_write({literal}, {size});")
+            for name in node.names:
+                variable = self.resolver.variable(name, node)
+                self.emit(f"{PRINTERS[variable.type]}({self.variable_name(variable)});")
+        self.emit("ml_end_line();")
+
+    def return_statement(self, node):
+        if node.tail_call:
+            self.tail_call(node.value)
+            return
+        return_type = self.resolver.current_function.return_type
+        value = self.expression(node.value)
+        if return_type == Type.VOID:
+            self.emit(f"(void)({value});")
+            self.emit("return;")
+        else:
+            self.emit(f"return {self.convert(value, value_type(node.value), return_type, node.line)};")
+
+    def tail_call(self, node):
+        """rtn f(...) en la propia f: los argumentos se evalúan en orden a temporales, se
+        copian a los parámetros y se salta al inicio (sin depender de que cc lo optimice)"""
+        function = self.resolver.current_function
+        values = []
+        for arg, param in zip(node.args, function.params):
+            name = self.temporary(param.type)
+            self.emit(f"{name} = {self.convert(self.expression(arg), value_type(arg), param.type, node.line)};")
+            values.append(name)
+        for param, name in zip(function.params, values):
+            self.emit(f"{self.variable_name(param)} = {name};")
+        self.emit(f"goto {TAIL_LABEL};")
+
+    def call_statement(self, node):
+        self.emit(f"{self.call(node)};")
+
+    # Expresiones
+    def expression(self, node):
+        kind = type(node)
+        if kind is Name:
+            return self.variable_name(self.resolver.variable(node.name, node))
+        if kind is Number:
+            return self.number(node)
+        if kind is String:
+            literal, size = c_string(node.value)
+            return f"ML_LITERAL({literal}, {size})"
+        if kind is Call:
+            return self.call(node)
+        # Evaluación de izquierda a derecha, sin precedencia
+        result = self.expression(node.operands[0])
+        result_type = value_type(node.operands[0])
+        for operator, operand in zip(node.operators, node.operands[1:]):
+            prefix, result = self.sequenced(result, result_type, operand)
+            result, result_type = self.binary(operator, result, result_type, self.expression(operand),
+                                              value_type(operand), node.line)
+            if prefix:
+                result = f"({prefix}{result})"
+        return result
+
+    @staticmethod
+    def number(node):
+        if node.value is None:
+            raise BackendError(f"Literal sin valor numérico: {node.text}", node.line, node.column)
+        if node.type == Type.FLT:
+            return repr(float(node.value))
+        if node.type == Type.LG or not -2**31 <= node.value < 2**31:
+            return f"INT64_C({node.value})"
+        return str(node.value)
+
+    @staticmethod
+    def binary(operator, left, left_type, right, right_type, line):
+        """Código y tipo de `left operator right`, con el mismo tipo de resultado que value_type"""
+        if left_type == Type.VOID or right_type == Type.VOID:
+            raise BackendError("Una función sin retorno no produce un valor", line)
+        if Type.STR in (left_type, right_type):
+            if operator == '+' and left_type == right_type:
+                return f"ml_concat({left}, {right})", Type.STR
+            return f"ml_invalid_str({line})", Type.STR
+        if operator == '/':
+            return f"ml_div((double)({left}), (double)({right}), {line})", Type.FLT
+        if Type.FLT in (left_type, right_type):
+            if operator == '%':
+                return f"ml_mod_f64({left}, {right}, {line})", Type.FLT
+            return f"({left} {operator} {right})", Type.FLT
+        result_type = Type.LG if Type.LG in (left_type, right_type) else Type.ENT
+        c_type = C_TYPES[result_type]
+        if operator == '%':
+            return f"{MODULO_FUNCTIONS[result_type]}({left}, {right}, {line})", result_type
+        # Aritmética sin signo para que el desbordamiento dé la vuelta sin comportamiento indefinido
+        unsigned = UNSIGNED_TYPES[result_type]
+        return f"({c_type})(({unsigned})({left}) {operator} ({unsigned})({right}))", result_type
+
+    def comparison(self, node):
+        prefix, left = self.sequenced(self.expression(node.left), value_type(node.left), node.right)
+        right = self.expression(node.right)
+        if value_type(node.left) == Type.STR:
+            return f"({prefix}ml_compare_str({left}, {right}) {node.operator} 0)"
+        return f"({prefix}{left} {node.operator} {right})"
+
+    def call(self, node):
+        function = self.resolver.function(node.name, node)
+        prefixes = []
+        args = []
+        for position, (arg, param) in enumerate(zip(node.args, function.params)):
+            code = self.convert(self.expression(arg), value_type(arg), param.type, node.line)
+            prefix, code = self.sequenced(code, param.type, node.args[position + 1:])
+            prefixes.append(prefix)
+            args.append(code)
+        return f"({''.join(prefixes)}{self.function_name(function)}({', '.join(args)}))"
+
+    STATEMENT_TRANSLATORS = {
+        Declaration: declaration,
+        Assignment: assignment,
+        ForStep: assignment,
+        Function: function,
+        If: if_statement,
+        For: for_loop,
+        While: while_loop,
+        Print: print_statement,
+        Return: return_statement,
+        Call: call_statement,
+    }
+
+
+def contains_call(nodes):
+    """Si alguna de las expresiones (un nodo o una secuencia) contiene una llamada"""
+    pending = list(nodes) if isinstance(nodes, (list, tuple)) else [nodes]
+    while pending:
+        node = pending.pop()
+        kind = type(node)
+        if kind is Call:
+            return True
+        if kind is Expression:
+            pending.extend(node.operands)
+    return False
+
+
+def c_source(program):
+    """Código fuente C autocontenido para un Program analizado"""
+    return CGenerator().generate(program)
+
+
+def find_compiler(cc=None):
+    """Ruta del compilador de C: el indicado, $CC o `cc` del sistema"""
+    name = cc or os.environ.get('CC') or 'cc'
+    path = shutil.which(name)
+    if path is None:
+        raise BackendError(f"No se encontró el compilador de C '{name}'")
+    return path
+
+
+def build_executable(program, output_path, cc=None, flush_lines=False):
+    """Genera el código C de un programa y lo compila a un ejecutable con el compilador del
+    sistema. Con flush_lines el ejecutable escribe cada línea de clg al producirla"""
+    compiler = find_compiler(cc)
+    source = c_source(program)
+    with tempfile.TemporaryDirectory(prefix="milenguaje-") as directory:
+        path = os.path.join(directory, "programa.c")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(source)
+        defines = ['-DML_FLUSH_LINES=1'] if flush_lines else []
+        process = subprocess.run([compiler, *CFLAGS, *defines, '-o', output_path, path, *LDFLAGS],
+                                 capture_output=True, text=True)
+    if process.returncode != 0:
+        raise BackendError(f"El compilador de C falló:\n{process.stderr.strip()}")
+    return output_path
+
+
+def run_executable(path, io=None):
+    """Ejecuta un programa compilado; retorna True si terminó sin error de ejecución.
+
+    Sin io hereda la entrada y la salida del proceso; con un ProgramIO le pasa el resto de
+    su entrada y copia la salida del programa."""
+    if io is None:
+        sys.stdout.flush()
+        return subprocess.run([path]).returncode == 0
+    process = subprocess.run([path], input=io.read_rest(), capture_output=True, text=True)
+    io.flush()
+    io.stdout.write(process.stdout)
+    return process.returncode == 0
+
+
+def run_program(program, io=None, cc=None, flush_lines=False):
+    """Compila un Program analizado a un ejecutable temporal y lo ejecuta"""
+    with tempfile.TemporaryDirectory(prefix="milenguaje-") as directory:
+        executable = build_executable(program, os.path.join(directory, "programa"), cc, flush_lines)
+        return run_executable(executable, io or None)
+
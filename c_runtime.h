@@ -0,0 +1,295 @@
+/* Runtime mínimo para los programas MiLenguaje traducidos a C por c_backend.py.
+ * El generador copia este archivo al inicio de cada programa, así que el .c emitido
+ * no depende de nada más que de la biblioteca estándar (y libm). */
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <math.h>
+
+/* Cadenas inmutables: los literales apuntan a datos estáticos y las concatenaciones y
+ * lecturas se reservan en el heap y no se liberan (los programas son de corta vida) */
+typedef struct {
+    const char *data;
+    int64_t len;
+} ml_str;
+
+#define ML_LITERAL(text, size) ((ml_str){(text), (size)})
+
+/* Salida con buffer: se vacía al llenarse, al salir y, compilando con -DML_FLUSH_LINES=1,
+ * en cada línea */
+#ifndef ML_FLUSH_LINES
+#define ML_FLUSH_LINES 0
+#endif
+#define ML_OUT_SIZE (1 << 16)
+static char ml_out[ML_OUT_SIZE];
+static size_t ml_out_len = 0;
+
+static void ml_flush(void) {
+    if (ml_out_len) {
+        fwrite(ml_out, 1, ml_out_len, stdout);
+        ml_out_len = 0;
+    }
+    fflush(stdout);
+}
+
+static void ml_write(const char *data, size_t len) {
+    if (ml_out_len + len > ML_OUT_SIZE) {
+        ml_flush();
+        if (len > ML_OUT_SIZE) {
+            fwrite(data, 1, len, stdout);
+            return;
+        }
+    }
+    memcpy(ml_out + ml_out_len, data, len);
+    ml_out_len += len;
+}
+
+static void ml_end_line(void) {
+    ml_write("\n", 1);
+    if (ML_FLUSH_LINES) {
+        ml_flush();
+    }
+}
+
+static void ml_error(int line, const char *message) {
+    ml_flush();
+    if (line) {
+        printf("Error de ejecución en línea %d: %s\n", line, message);
+    } else {
+        printf("Error de ejecución: %s\n", message);
+    }
+    fflush(stdout);
+    exit(1);
+}
+
+static void ml_print_i64(int64_t value) {
+    char buffer[32];
+    int len = snprintf(buffer, sizeof buffer, "%lld", (long long)value);
+    ml_write(buffer, (size_t)len);
+}
+
+/* Mismo texto que repr() de Python: dígitos mínimos que reproducen el valor, notación
+ * fija si el exponente está en [-4, 16) y ".0" en los valores enteros */
+static int ml_format_f64(double value, char *out) {
+    if (isnan(value)) {
+        return sprintf(out, "nan");
+    }
+    if (isinf(value)) {
+        return sprintf(out, value < 0 ? "-inf" : "inf");
+    }
+    char sci[40];
+    for (int precision = 1; precision <= 17; precision++) {
+        snprintf(sci, sizeof sci, "%.*e", precision - 1, value);
+        if (strtod(sci, NULL) == value) {
+            break;
+        }
+    }
+    /* sci = [-]d[.ddd]e[+-]XX */
+    char digits[24];
+    int count = 0;
+    const char *p = sci;
+    int negative = 0;
+    if (*p == '-') {
+        negative = 1;
+        p++;
+    }
+    while (*p && *p != 'e') {
+        if (*p != '.') {
+            digits[count++] = *p;
+        }
+        p++;
+    }
+    int exponent = atoi(p + 1);
+    while (count > 1 && digits[count - 1] == '0') {
+        count--;
+    }
+    digits[count] = '\0';
+
+    char *q = out;
+    if (negative) {
+        *q++ = '-';
+    }
+    if (exponent >= -4 && exponent < 16) {
+        if (exponent < 0) {
+            *q++ = '0';
+            *q++ = '.';
+            for (int i = 0; i < -exponent - 1; i++) {
+                *q++ = '0';
+            }
+            memcpy(q, digits, count);
+            q += count;
+        } else {
+            for (int i = 0; i <= exponent; i++) {
+                *q++ = i < count ? digits[i] : '0';
+            }
+            *q++ = '.';
+            if (count > exponent + 1) {
+                memcpy(q, digits + exponent + 1, count - exponent - 1);
+                q += count - exponent - 1;
+            } else {
+                *q++ = '0';
+            }
+        }
+    } else {
+        *q++ = digits[0];
+        if (count > 1) {
+            *q++ = '.';
+            memcpy(q, digits + 1, count - 1);
+            q += count - 1;
+        }
+        q += sprintf(q, "e%c%02d", exponent < 0 ? '-' : '+', exponent < 0 ? -exponent : exponent);
+    }
+    *q = '\0';
+    return (int)(q - out);
+}
+
+static void ml_print_f64(double value) {
+    char buffer[64];
+    int len = ml_format_f64(value, buffer);
+    ml_write(buffer, (size_t)len);
+}
+
+static void ml_print_str(ml_str value) {
+    ml_write(value.data, (size_t)value.len);
+}
+
+static ml_str ml_concat(ml_str left, ml_str right) {
+    char *data = malloc((size_t)(left.len + right.len) + 1);
+    if (!data) {
+        ml_error(0, "Memoria insuficiente");
+    }
+    memcpy(data, left.data, (size_t)left.len);
+    memcpy(data + left.len, right.data, (size_t)right.len);
+    data[left.len + right.len] = '\0';
+    return (ml_str){data, left.len + right.len};
+}
+
+/* Operación que el analizador acepta pero las cadenas no soportan (p. ej. str - str) */
+static ml_str ml_invalid_str(int line) {
+    ml_error(line, ML_INVALID_OPERATION);
+    return ML_LITERAL("", 0);
+}
+
+static int ml_compare_str(ml_str left, ml_str right) {
+    int64_t len = left.len < right.len ? left.len : right.len;
+    int result = memcmp(left.data, right.data, (size_t)len);
+    if (result) {
+        return result;
+    }
+    return (left.len > right.len) - (left.len < right.len);
+}
+
+/* Aritmética con la semántica de Python: '/' es división real y '%' toma el signo del divisor */
+static double ml_div(double left, double right, int line) {
+    if (right == 0) {
+        ml_error(line, "División por cero");
+    }
+    return left / right;
+}
+
+static int64_t ml_mod_i64(int64_t left, int64_t right, int line) {
+    if (right == 0) {
+        ml_error(line, "Módulo por cero");
+    }
+    if (right == -1) {
+        return 0;
+    }
+    int64_t result = left % right;
+    if (result != 0 && ((result < 0) != (right < 0))) {
+        result += right;
+    }
+    return result;
+}
+
+static int32_t ml_mod_i32(int32_t left, int32_t right, int line) {
+    return (int32_t)ml_mod_i64(left, right, line);
+}
+
+static double ml_mod_f64(double left, double right, int line) {
+    if (right == 0) {
+        ml_error(line, "Módulo por cero");
+    }
+    double result = fmod(left, right);
+    if (result != 0 && ((result < 0) != (right < 0))) {
+        result += right;
+    }
+    return result;
+}
+
+/* Entrada con buffer: stdin se lee por bloques y scn() toma una línea a la vez */
+#define ML_IN_SIZE (1 << 16)
+static char ml_in[ML_IN_SIZE];
+static size_t ml_in_pos = 0;
+static size_t ml_in_len = 0;
+
+static ml_str ml_read_line(void) {
+    char *line = NULL;
+    size_t len = 0;
+    for (;;) {
+        if (ml_in_pos == ml_in_len) {
+            ml_in_len = fread(ml_in, 1, ML_IN_SIZE, stdin);
+            ml_in_pos = 0;
+            if (ml_in_len == 0) {
+                break;
+            }
+        }
+        char *start = ml_in + ml_in_pos;
+        char *newline = memchr(start, '\n', ml_in_len - ml_in_pos);
+        size_t chunk = newline ? (size_t)(newline - start) : ml_in_len - ml_in_pos;
+        line = realloc(line, len + chunk + 1);
+        memcpy(line + len, start, chunk);
+        len += chunk;
+        ml_in_pos += chunk;
+        if (newline) {
+            ml_in_pos++;
+            break;
+        }
+    }
+    if (!line) {
+        line = malloc(1);
+    }
+    line[len] = '\0';
+    return (ml_str){line, (int64_t)len};
+}
+
+static const char *ml_strip(ml_str text, char **end) {
+    const char *start = text.data;
+    const char *stop = text.data + text.len;
+    while (start < stop && (*start == ' ' || *start == '\t' || *start == '\r')) {
+        start++;
+    }
+    while (stop > start && (stop[-1] == ' ' || stop[-1] == '\t' || stop[-1] == '\r')) {
+        stop--;
+    }
+    *end = (char *)stop;
+    return start;
+}
+
+static int64_t ml_read_int(int line, const char *type_name) {
+    ml_str text = ml_read_line();
+    char *stop;
+    const char *start = ml_strip(text, &stop);
+    char *parsed;
+    long long value = strtoll(start, &parsed, 10);
+    if (start == stop || parsed != stop) {
+        char message[160];
+        snprintf(message, sizeof message, "Entrada inválida para '%s': '%.100s'", type_name, text.data);
+        ml_error(line, message);
+    }
+    return value;
+}
+
+static double ml_read_f64(int line) {
+    ml_str text = ml_read_line();
+    char *stop;
+    const char *start = ml_strip(text, &stop);
+    char *parsed;
+    double value = strtod(start, &parsed);
+    if (start == stop || parsed != stop) {
+        char message[160];
+        snprintf(message, sizeof message, "Entrada inválida para 'flt': '%.100s'", text.data);
+        ml_error(line, message);
+    }
+    return value;
+}
@@ -0,0 +1,84 @@
+import mmap
+import sys
+import codecs
+from array import array
+from antlr4 import InputStream
+
+# Codificaciones donde un archivo ASCII puede leerse byte a byte sin decodificar
+ASCII_COMPATIBLE = {'utf-8', 'ascii'}
+
+ASCII_CHECK_CHUNK = 1 << 20
+
+
+def is_ascii(buffer):
+    """Verifica por bloques que un buffer (bytes o mmap) sea ASCII sin copiarlo entero"""
+    for i in range(0, len(buffer), ASCII_CHECK_CHUNK):
+        if not buffer[i:i + ASCII_CHECK_CHUNK].isascii():
+            return False
+    return True
+
+
+def code_points(text):
+    """Arreglo compacto de puntos de código: 2 bytes por carácter si todo está en el BMP, 4 si no"""
+    if not text or max(text) < '\U00010000':
+        codes = array('H')
+        codes.frombytes(text.encode('utf-16-le' if sys.byteorder == 'little' else 'utf-16-be'))
+    else:
+        codes = array('I')
+        codes.frombytes(text.encode('utf-32-le' if sys.byteorder == 'little' else 'utf-32-be'))
+    return codes
+
+
+class CompactInputStream(InputStream):
+    """CharStream para MiLenguajeLexer respaldado por un buffer compacto.
+
+    El InputStream de ANTLR guarda una lista de enteros (un objeto por carácter). Aquí
+    `data` es el texto ASCII como bytes (1 byte por carácter) o un array de puntos de
+    código; LA() sigue retornando enteros, así que el LexerATNSimulator no cambia."""
+
+    def __init__(self, data, name="<empty>"):
+        # No se llama a InputStream.__init__: construiría la lista de enteros
+        self.name = name
+        self._index = 0
+        if isinstance(data, str):
+            self.strdata = data
+            self.data = data.encode('ascii') if data.isascii() else code_points(data)
+        else:
+            # Buffer ASCII (bytes o mmap): el texto se decodifica solo por fragmentos
+            self.strdata = None
+            self.data = data
+        self._size = len(self.data)
+
+    def getText(self, start, stop):
+        if stop >= self._size:
+            stop = self._size - 1
+        if start >= self._size:
+            return ""
+        if self.strdata is not None:
+            return self.strdata[start:stop + 1]
+        return self.data[start:stop + 1].decode('ascii')
+
+    def __str__(self):
+        if self.strdata is None:
+            return self.data[:].decode('ascii')
+        return self.strdata
+
+
+class CompactFileStream(CompactInputStream):
+    """Equivalente de FileStream que mapea el archivo en memoria si es ASCII"""
+
+    def __init__(self, fileName, encoding='utf-8', errors='strict'):
+        self.fileName = fileName
+        with open(fileName, 'rb') as f:
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                buffer = b""  # Archivo vacío: no se puede mapear
+
+        if codecs.lookup(encoding).name in ASCII_COMPATIBLE and is_ascii(buffer):
+            super().__init__(buffer, fileName)
+        else:
+            text = buffer[:].decode(encoding, errors)
+            if isinstance(buffer, mmap.mmap):
+                buffer.close()
+            super().__init__(text, fileName)
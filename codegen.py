@@ -0,0 +1,147 @@
+from ast_nodes import Expression, Call, Name, Number, String
+from type_system import Type
+
+
+class BackendError(Exception):
+    """Construcción válida para el analizador que un backend de ejecución no soporta"""
+    def __init__(self, message, line=None, column=None):
+        self.message = message
+        self.line = line
+        self.column = column
+        super().__init__(message)
+
+    def __str__(self):
+        if self.line:
+            return f"Error de generación en línea {self.line}, columna {self.column}: {self.message}"
+        return f"Error de generación: {self.message}"
+
+
+class Variable:
+    __slots__ = ('name', 'type', 'owner', 'index')
+
+    def __init__(self, name, type, owner, index):
+        self.name = name
+        self.type = type
+        self.owner = owner  # FunctionInfo dueña del slot, o None si es del marco global
+        self.index = index
+
+    @property
+    def is_global(self):
+        return self.owner is None
+
+
+class FunctionInfo:
+    __slots__ = ('name', 'index', 'node', 'params', 'return_type', 'local_count')
+
+    def __init__(self, name, index, node):
+        self.name = name
+        self.index = index  # Posición en la tabla de funciones del programa
+        self.node = node
+        self.params = []    # Variables de los parámetros, en orden
+        self.return_type = node.return_type if node.return_type is not None else Type.VOID
+        self.local_count = 0
+
+
+class SlotResolver:
+    """Resuelve cada nombre a un slot fijo siguiendo las mismas reglas de ámbito que el
+    analizador: las variables del programa principal (incluidas las de sus bloques) van
+    al marco global y las de cada función a su propio marco.
+
+    Una función anidada no puede usar variables locales de la función que la contiene:
+    cada marco solo ve sus slots y los globales."""
+
+    def __init__(self):
+        self.scopes = [{}]
+        self.frames = []       # FunctionInfo de las funciones en compilación
+        self.functions = []    # Todas las funciones, en orden de declaración
+        self.global_count = 0
+
+    @property
+    def current_function(self):
+        return self.frames[-1] if self.frames else None
+
+    def enter_block(self):
+        self.scopes.append({})
+
+    def exit_block(self):
+        self.scopes.pop()
+
+    def declare_variable(self, name, type_code):
+        function = self.current_function
+        if function is None:
+            variable = Variable(name, type_code, None, self.global_count)
+            self.global_count += 1
+        else:
+            variable = Variable(name, type_code, function, function.local_count)
+            function.local_count += 1
+        self.scopes[-1][name] = variable
+        return variable
+
+    def declare_function(self, node):
+        function = FunctionInfo(node.name, len(self.functions), node)
+        self.functions.append(function)
+        self.scopes[-1][node.name] = function
+        return function
+
+    def enter_function(self, function):
+        self.frames.append(function)
+        self.scopes.append({})
+        for name, type_code in function.node.params:
+            function.params.append(self.declare_variable(name, type_code))
+
+    def exit_function(self):
+        self.scopes.pop()
+        self.frames.pop()
+
+    def lookup(self, name, node):
+        for scope in reversed(self.scopes):
+            entry = scope.get(name)
+            if entry is not None:
+                break
+        else:
+            raise BackendError(f"'{name}' no declarado", node.line, node.column)
+        return entry
+
+    def variable(self, name, node):
+        entry = self.lookup(name, node)
+        if not isinstance(entry, Variable):
+            raise BackendError(f"'{name}' es una función, no una variable", node.line, node.column)
+        if entry.owner is not None and entry.owner is not self.current_function:
+            raise BackendError(f"La variable '{name}' pertenece a otra función y no es accesible en ejecución",
+                               node.line, node.column)
+        return entry
+
+    def function(self, name, node):
+        entry = self.lookup(name, node)
+        if not isinstance(entry, FunctionInfo):
+            raise BackendError(f"'{name}' no es una función", node.line, node.column)
+        return entry
+
+
+def value_type(node):
+    """Tipo del valor que produce una expresión en ejecución (ENT/LG enteros, FLT o STR).
+
+    Difiere del tipo del analizador en que '/' siempre produce un flt (división real,
+    igual que el plegado de constantes), y un flt combinado con un entero da flt."""
+    if isinstance(node, Expression):
+        result = value_type(node.operands[0])
+        for operator, operand in zip(node.operators, node.operands[1:]):
+            operand_type = value_type(operand)
+            if result == Type.STR or operand_type == Type.STR:
+                result = Type.STR
+            elif operator == '/' or result == Type.FLT or operand_type == Type.FLT:
+                result = Type.FLT
+            elif result == Type.LG or operand_type == Type.LG:
+                result = Type.LG
+            else:
+                result = Type.ENT
+        return result
+    return node.type
+
+
+def needs_conversion(source_type, target_type):
+    """Si guardar un valor de source_type en una variable target_type requiere convertirlo"""
+    if source_type == target_type or target_type == Type.STR:
+        return False
+    # ent y lg son enteros de Python: solo flt <-> entero requiere conversión
+    return source_type == Type.FLT or target_type == Type.FLT
@@ -0,0 +1,135 @@
+import os
+import json
+import hashlib
+import tempfile
+
+DEFAULT_CACHE_DIR = ".milenguaje_cache"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Módulos cuyo contenido define la versión del compilador: si cambia la gramática
+# generada, los lexers y streams que producen los tokens, el analizador o lo que arma los
+# mensajes guardados (error_listener.py, main.py), las entradas anteriores de la caché
+# dejan de coincidir
+VERSIONED_MODULES = ["MiLenguajeLexer.py", "MiLenguajeParser.py", "fast_lexer.py", "char_streams.py",
+                     "error_listener.py", "ast_nodes.py", "lowering.py", "semantic_analyzer.py",
+                     "symbol_table.py", "type_system.py", "main.py"]
+
+_compiler_version = None
+
+
+def module_fingerprint(modules):
+    """sha256 del nombre y contenido de los módulos indicados"""
+    digest = hashlib.sha256()
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    for module in modules:
+        digest.update(module.encode('utf-8'))
+        with open(os.path.join(base_dir, module), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def compiler_version():
+    """Huella de la gramática y el analizador (se calcula una vez por proceso)"""
+    global _compiler_version
+    if _compiler_version is None:
+        _compiler_version = module_fingerprint(VERSIONED_MODULES)
+    return _compiler_version
+
+
+class CompileCache:
+    """Caché en disco de resultados de compilación, direccionada por contenido"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, source, lexer_name):
+        """Clave de la entrada: hash del código fuente junto con la versión del compilador y
+        el nombre del lexer usado (los errores léxicos de cada uno pueden diferir)"""
+        digest = hashlib.sha256(compiler_version().encode('ascii'))
+        digest.update(lexer_name.encode('utf-8') + b'\0')
+        digest.update(source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key):
+        """Retorna el diccionario guardado para la clave o None si no existe"""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        # Marcar la entrada como usada recientemente para el desalojo LRU
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """Guarda una entrada de forma atómica y aplica el límite de tamaño"""
+        path = self._entry_path(key)
+        entry_dir = os.path.dirname(path)
+        os.makedirs(entry_dir, exist_ok=True)
+
+        # Escribir en un archivo temporal del mismo directorio y renombrarlo: otros procesos
+        # ven la entrada completa o no la ven, nunca un archivo a medio escribir
+        fd, tmp_path = tempfile.mkstemp(dir=entry_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue  # Eliminada por otro proceso
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """Elimina las entradas usadas hace más tiempo hasta quedar bajo el límite"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                self.evictions += 1
+            except OSError:
+                pass  # Otro proceso ya la desalojó
+            total -= size
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
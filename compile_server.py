@@ -0,0 +1,139 @@
+import os
+import json
+import socket
+import socketserver
+import time
+from char_streams import CompactInputStream, CompactFileStream
+from main import LEXERS, CompilationResult, compile_stream, report_progress, report_result, silent
+
+# Programa de calentamiento: recorre las reglas principales de la gramática para que
+# los DFA compartidos del lexer y del parser queden construidos antes de la primera petición
+WARMUP_PROGRAM = """
+const ent a = 1 + 2 * (3 - 1) % 2;
+flt b = 2.5 / 1.5;
+lg c = 10l;
+str d = "texto";
+fct f(ent x, flt y) : ent { ent z = x + 1; if (z > 2) { rtn z; } else { rtn x; } }
+fct g() { clg("valor" $ d); clg(a); }
+ent e = f(a, b);
+str s = scn();
+for (ent i = 0; i < 10; i = i + 1) { e = e - 1; }
+while (e != 0) { g(); e = e - 1; }
+"""
+
+
+class CompileRequestHandler(socketserver.StreamRequestHandler):
+    """Atiende una petición JSON por línea: {"path": ...} o {"source": ...}, con las opciones
+    opcionales "lexer" (nombre en LEXERS) y "symbols" (false equivale a --no-symbols)"""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            request = {}
+            try:
+                request = json.loads(line)
+                response = self.server.compile_request(request)
+            except Exception as e:
+                response = {'error': f"Petición inválida: {e}"}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b"\n")
+            self.wfile.flush()
+            if request.get('command') == 'shutdown':
+                self.server.shutdown_requested = True
+                return
+
+
+class CompileServer(socketserver.UnixStreamServer):
+    """Servidor de compilación persistente sobre un socket Unix local"""
+
+    def __init__(self, socket_path):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, CompileRequestHandler)
+        self.socket_path = socket_path
+        self.shutdown_requested = False
+        self.warm_up()
+
+    def warm_up(self):
+        """Compila el programa de calentamiento con cada lexer para construir los DFA de predicción"""
+        for lexer_class in LEXERS.values():
+            compile_stream(CompactInputStream(WARMUP_PROGRAM), log=silent, lexer_class=lexer_class)
+
+    def compile_request(self, request):
+        if request.get('command') == 'shutdown':
+            return {'stopped': True}
+
+        lexer_name = request.get('lexer', 'antlr')
+        if lexer_name not in LEXERS:
+            raise ValueError(f"lexer desconocido: {lexer_name}")
+        options = {'log': silent, 'lexer_class': LEXERS[lexer_name],
+                   'report_symbols': request.get('symbols', True)}
+
+        start = time.perf_counter()
+        if 'source' in request:
+            result = compile_stream(CompactInputStream(request['source']), **options)
+        else:
+            try:
+                input_stream = CompactFileStream(request['path'], encoding='utf-8')
+            except Exception as e:
+                result = CompilationResult('lectura', failure=f"Error al leer el archivo: {e}")
+            else:
+                result = compile_stream(input_stream, **options)
+
+        response = result.to_dict()
+        response['elapsed_ms'] = (time.perf_counter() - start) * 1000
+        return response
+
+    def serve(self):
+        """Atiende peticiones hasta recibir el comando de apagado"""
+        print(f"Servidor de compilación escuchando en {self.socket_path}")
+        try:
+            while not self.shutdown_requested:
+                self.handle_request()
+        finally:
+            self.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+class CompileClient:
+    """Cliente ligero que envía archivos o código fuente al servidor de compilación"""
+
+    def __init__(self, socket_path, lexer_name='antlr', report_symbols=True):
+        self.options = {'lexer': lexer_name, 'symbols': report_symbols}
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.reader = self.sock.makefile('rb')
+
+    def request(self, payload):
+        self.sock.sendall(json.dumps(payload, ensure_ascii=False).encode('utf-8') + b"\n")
+        response = json.loads(self.reader.readline())
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response
+
+    def compile_path(self, path):
+        return CompilationResult.from_dict(self.request({'path': os.path.abspath(path), **self.options}))
+
+    def compile_source(self, source):
+        return CompilationResult.from_dict(self.request({'source': source, **self.options}))
+
+    def shutdown(self):
+        return self.request({'command': 'shutdown'})
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+def compile_remote(socket_path, input_file, lexer_name='antlr', report_symbols=True):
+    """Compila un archivo a través del servidor e imprime el resultado como main.py"""
+    print(f"Leyendo archivo: {input_file}")
+    client = CompileClient(socket_path, lexer_name, report_symbols)
+    try:
+        result = client.compile_path(input_file)
+    finally:
+        client.close()
+
+    report_progress(result)
+    return report_result(result, report_symbols)
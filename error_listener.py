@@ -0,0 +1,17 @@
+from antlr4.error.ErrorListener import ErrorListener
+
+
+class MiErrorListener(ErrorListener):
+    """Acumula los errores léxicos y sintácticos de ANTLR (o de FastLexer) con su contexto"""
+    def __init__(self):
+        super(MiErrorListener, self).__init__()
+        self.errors = []
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        error_message = f"Error sintáctico en línea {line}, columna {column}: {msg}"
+        error_context = f"Contexto: '{offendingSymbol.text if offendingSymbol else 'EOF'}'"
+        self.errors.append(error_message)
+        self.errors.append(error_context)
+
+    def get_errors(self):
+        return self.errors
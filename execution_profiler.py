@@ -0,0 +1,157 @@
+import sys
+import threading
+
+MODES = ('sample', 'exact')
+
+# Intervalo de muestreo por defecto (segundos)
+DEFAULT_INTERVAL = 0.001
+
+# Nombre del marco del programa principal en las pilas
+MAIN_FRAME = 'principal'
+
+
+class ProfileState:
+    """Línea de MiLenguaje en ejecución y pila de llamadas actual (índice en frames)"""
+    __slots__ = ('line', 'stack')
+
+    def __init__(self):
+        self.line = 0
+        self.stack = 0
+
+
+class ExecutionProfiler:
+    """Perfil de un programa ejecutado con el backend de clausuras.
+
+    El compilador envuelve cada sentencia y cada llamada (solo si se perfila, así que sin
+    perfil no hay ningún costo) para mantener la línea actual y la pila de llamadas.
+    'exact' cuenta cada ejecución de una sentencia por (pila, línea); 'sample' deja que un
+    hilo lea la línea y la pila cada `interval` segundos.
+
+    Las pilas se guardan como índices en frames: (pila padre, función, línea de la llamada
+    en el padre). Así entrar a una función cuesta una búsqueda en un diccionario y no
+    copiar la pila, aun con recursión profunda."""
+
+    def __init__(self, mode='sample', interval=DEFAULT_INTERVAL):
+        if mode not in MODES:
+            raise ValueError(f"Modo de perfil desconocido: {mode}")
+        self.mode = mode
+        self.interval = interval
+        self.state = ProfileState()
+        self.frames = [(None, MAIN_FRAME, None)]
+        self.frame_ids = {}
+        self.counts = {}  # (pila, línea) -> ejecuciones o muestras
+        self.sampler = None
+        self.stopped = None
+        self.switch_interval = None
+
+    # Envoltorios que usa el compilador de clausuras
+    def statement(self, run, line):
+        state = self.state
+        if self.mode == 'sample':
+            def profiled(frame):
+                state.line = line
+                return run(frame)
+            return profiled
+        counts = self.counts
+
+        def counted(frame):
+            state.line = line
+            key = (state.stack, line)
+            counts[key] = counts.get(key, 0) + 1
+            return run(frame)
+        return counted
+
+    def condition(self, test, line):
+        """Condición de un ciclo: el tiempo de evaluarla se atribuye a la línea del ciclo"""
+        state = self.state
+
+        def located(frame):
+            state.line = line
+            return test(frame)
+        return located
+
+    def call(self, call, name):
+        state = self.state
+        frame_ids, frames = self.frame_ids, self.frames
+
+        def profiled(frame):
+            parent, line = state.stack, state.line
+            key = (parent, name, line)
+            stack = frame_ids.get(key)
+            if stack is None:
+                stack = frame_ids[key] = len(frames)
+                frames.append(key)
+            state.stack = stack
+            try:
+                return call(frame)
+            finally:
+                state.stack, state.line = parent, line
+        return profiled
+
+    # Ejecución
+    def start(self):
+        if self.mode != 'sample':
+            return
+        # El hilo solo corre cuando el principal suelta el GIL: se acorta el intervalo de cambio
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.switch_interval, self.interval))
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self.sample_loop, daemon=True)
+        self.sampler.start()
+
+    def stop(self):
+        if self.sampler is None:
+            return
+        self.stopped.set()
+        self.sampler.join()
+        self.sampler = None
+        sys.setswitchinterval(self.switch_interval)
+
+    def sample_loop(self):
+        state, counts = self.state, self.counts
+        while not self.stopped.wait(self.interval):
+            key = (state.stack, state.line)
+            counts[key] = counts.get(key, 0) + 1
+
+    # Informes
+    def stack_text(self, stack, line):
+        """Pila como `principal:12;fib:5;fib:4` (función:línea, de la raíz a la hoja)"""
+        labels = []
+        while stack is not None:
+            parent, name, call_line = self.frames[stack]
+            labels.append(f"{name}:{line}")
+            stack, line = parent, call_line
+        return ";".join(reversed(labels))
+
+    def folded(self):
+        """Pilas plegadas (una por línea, `pila conteo`), el formato de flamegraph.pl"""
+        totals = {}
+        for (stack, line), count in self.counts.items():
+            text = self.stack_text(stack, line)
+            totals[text] = totals.get(text, 0) + count
+        return "".join(f"{text} {count}\n" for text, count in sorted(totals.items()))
+
+    def line_totals(self):
+        totals = {}
+        for (stack, line), count in self.counts.items():
+            totals[line] = totals.get(line, 0) + count
+        return totals
+
+    def hot_table(self, source=None, limit=20):
+        """Líneas con más ejecuciones (o muestras), con su código fuente si se indica"""
+        totals = self.line_totals()
+        total = sum(totals.values())
+        source_lines = source.splitlines() if source else []
+        unit = "MUESTRAS" if self.mode == 'sample' else "EJECUCIONES"
+        lines = [f"\n=== PERFIL DE EJECUCIÓN ({self.mode}) ===",
+                 "LÍNEA".rjust(6) + unit.rjust(13) + "%".rjust(8) + "  CÓDIGO",
+                 "-" * 75]
+        ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        for line, count in ranked:
+            code = source_lines[line - 1].strip() if 0 < line <= len(source_lines) else ""
+            lines.append(str(line).rjust(6) + str(count).rjust(13) + f"{count / total:.1%}".rjust(8)
+                         + f"  {code}")
+        if not ranked:
+            lines.append("(sin muestras: el programa terminó antes del primer intervalo)"
+                         if self.mode == 'sample' else "(no se ejecutó ninguna sentencia)")
+        return "\n".join(lines)
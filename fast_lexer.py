@@ -0,0 +1,149 @@
+import re
+from antlr4 import *
+from antlr4.CommonTokenFactory import CommonTokenFactory
+from antlr4.Lexer import TokenSource
+from antlr4.Token import CommonToken
+from MiLenguajeLexer import MiLenguajeLexer
+
+# Literales de la gramática ('fct', '==', ';', ...) -> tipo de token
+LITERAL_TYPES = {name[1:-1]: i for i, name in enumerate(MiLenguajeLexer.literalNames) if name.startswith("'")}
+
+# Expresión maestra con una alternativa por regla léxica. El orden reproduce las
+# prioridades de ANTLR: COMMENT antes que '/', operadores de dos caracteres antes que
+# los de uno, y NUMERO_VALORES retrocede a la parte entera si no hay dígitos tras el '.'
+MASTER_PATTERN = re.compile(r"""
+    (?P<WS>[ \t\r\n]+)
+  | (?P<COMMENT>//[^\n]*\n)
+  | (?P<ID>[a-zA-Z][a-zA-Z0-9_]*)
+  | (?P<NUMERO_VALORES>[0-9]+(?:\.[0-9]+)?l?)
+  | (?P<STRING>"[^"]*")
+  | (?P<OP>==|!=|<=|>=|[;=(){},:$+\-*/%<>])
+""", re.VERBOSE)
+
+SKIPPED = {'WS', 'COMMENT'}
+
+
+class FastLexer(TokenSource):
+    """Lexer de MiLenguaje basado en una expresión regular maestra.
+
+    Produce los mismos CommonToken que MiLenguajeLexer (tipos, texto, posiciones y
+    errores de reconocimiento), así que puede alimentar CommonTokenStream y
+    MiLenguajeParser sin cambios."""
+
+    ruleNames = MiLenguajeLexer.ruleNames
+    literalNames = MiLenguajeLexer.literalNames
+    symbolicNames = MiLenguajeLexer.symbolicNames
+    grammarFileName = MiLenguajeLexer.grammarFileName
+
+    def __init__(self, input=None):
+        self._factory = CommonTokenFactory.DEFAULT
+        self._listeners = []
+        self.inputStream = input
+        self.reset()
+
+    def reset(self):
+        self.text_data = str(self.inputStream) if self.inputStream is not None else ""
+        self._source = (self, self.inputStream)
+        self.pos = 0
+        self.line = 1
+        self.column = 0
+
+    # Compatibilidad con la interfaz de los lexers de ANTLR
+    def getSourceName(self):
+        return self.inputStream.getSourceName() if self.inputStream is not None else "<unknown>"
+
+    @property
+    def sourceName(self):
+        return self.getSourceName()
+
+    def getCharIndex(self):
+        return self.pos
+
+    def addErrorListener(self, listener):
+        self._listeners.append(listener)
+
+    def removeErrorListeners(self):
+        self._listeners = []
+
+    def getErrorListenerDispatch(self):
+        return self
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        for listener in self._listeners:
+            listener.syntaxError(recognizer, offendingSymbol, line, column, msg, e)
+
+    def make_token(self, token_type, text, start, stop, line, column):
+        token = CommonToken.__new__(CommonToken)
+        token.source = self._source
+        token.type = token_type
+        token.channel = Token.DEFAULT_CHANNEL
+        token.start = start
+        token.stop = stop
+        token.tokenIndex = -1
+        token.line = line
+        token.column = column
+        token._text = text
+        return token
+
+    def advance(self, start, end):
+        """Actualiza línea y columna tras consumir text_data[start:end]"""
+        newlines = self.text_data.count('\n', start, end)
+        if newlines:
+            self.line += newlines
+            self.column = end - self.text_data.rindex('\n', start, end) - 1
+        else:
+            self.column += end - start
+        self.pos = end
+
+    def recognition_error(self, start):
+        """Reproduce el error de ANTLR cuando ninguna regla acepta un prefijo en `start`"""
+        data = self.text_data
+        size = len(data)
+        char = data[start]
+        # Índice del carácter donde falla la simulación: '!' solo es prefijo de '!=',
+        # y una comilla sin cerrar se lee hasta el final del archivo
+        if char == '!':
+            fail = start + 1
+        elif char == '"':
+            fail = size
+        else:
+            fail = start
+        text = data[start:fail + 1]
+        text = text.replace('\n', '\\n').replace('\r', '\\r').replace('\t', '\\t')
+        self.syntaxError(self, None, self.line, self.column, f"token recognition error at: '{text}'", None)
+        # ANTLR consume además el carácter en el que falló, salvo en EOF
+        self.advance(start, min(fail + 1, size))
+
+    def nextToken(self):
+        data = self.text_data
+        size = len(data)
+        match = MASTER_PATTERN.match
+        while self.pos < size:
+            start = self.pos
+            m = match(data, start)
+            if m is None:
+                self.recognition_error(start)
+                continue
+
+            kind = m.lastgroup
+            end = m.end()
+            if kind in SKIPPED:
+                self.advance(start, end)
+                continue
+
+            text = m.group()
+            if kind == 'ID':
+                token_type = LITERAL_TYPES.get(text, MiLenguajeLexer.ID)
+            elif kind == 'OP':
+                token_type = LITERAL_TYPES[text]
+            elif kind == 'NUMERO_VALORES':
+                token_type = MiLenguajeLexer.NUMERO_VALORES
+            else:
+                token_type = MiLenguajeLexer.STRING
+
+            token = self.make_token(token_type, text, start, end - 1, self.line, self.column)
+            self.advance(start, end)
+            return token
+
+        return self.make_token(Token.EOF, "<EOF>", size, size - 1, self.line, self.column)
+
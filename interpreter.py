@@ -0,0 +1,594 @@
+import sys
+from ast_nodes import (Declaration, Assignment, ForStep, Function, If, For, While, Print, Return,
+                       Expression, Comparison, Call, Name, Number, String)
+from codegen import SlotResolver, value_type, needs_conversion
+from runtime import (MiRuntimeError, ProgramIO, DEFAULT_VALUES, CONVERTERS, INVALID_OPERATION, MISSING,
+                     divide, modulo)
+from type_system import Type
+import vectorizer
+
+# Cada llamada de MiLenguaje ocupa unos pocos marcos de Python (llamada, bloque, sentencia)
+RECURSION_LIMIT = 100000
+PROFILED_RECURSION_LIMIT = 150000
+
+# Resultado de un rtn que es llamada de cola: el marco ya tiene los nuevos argumentos y el
+# cuerpo de la función se vuelve a ejecutar sin una llamada de Python nueva
+TAIL_CALL = object()
+
+# Fábricas de clausuras por operador. Variantes: dos subexpresiones, constante a la derecha
+# y slot del marco actual a la izquierda con constante a la derecha (i < 100, i + 1)
+ARITHMETIC = {
+    '+': lambda left, right: lambda frame: left(frame) + right(frame),
+    '-': lambda left, right: lambda frame: left(frame) - right(frame),
+    '*': lambda left, right: lambda frame: left(frame) * right(frame),
+}
+ARITHMETIC_CONSTANT = {
+    '+': lambda left, k: lambda frame: left(frame) + k,
+    '-': lambda left, k: lambda frame: left(frame) - k,
+    '*': lambda left, k: lambda frame: left(frame) * k,
+    '/': lambda left, k: lambda frame: left(frame) / k,
+    '%': lambda left, k: lambda frame: left(frame) % k,
+}
+ARITHMETIC_SLOT_CONSTANT = {
+    '+': lambda i, k: lambda frame: frame[i] + k,
+    '-': lambda i, k: lambda frame: frame[i] - k,
+    '*': lambda i, k: lambda frame: frame[i] * k,
+    '/': lambda i, k: lambda frame: frame[i] / k,
+    '%': lambda i, k: lambda frame: frame[i] % k,
+}
+
+COMPARISONS = {
+    '<': lambda left, right: lambda frame: left(frame) < right(frame),
+    '>': lambda left, right: lambda frame: left(frame) > right(frame),
+    '<=': lambda left, right: lambda frame: left(frame) <= right(frame),
+    '>=': lambda left, right: lambda frame: left(frame) >= right(frame),
+    '==': lambda left, right: lambda frame: left(frame) == right(frame),
+    '!=': lambda left, right: lambda frame: left(frame) != right(frame),
+}
+COMPARISONS_CONSTANT = {
+    '<': lambda left, k: lambda frame: left(frame) < k,
+    '>': lambda left, k: lambda frame: left(frame) > k,
+    '<=': lambda left, k: lambda frame: left(frame) <= k,
+    '>=': lambda left, k: lambda frame: left(frame) >= k,
+    '==': lambda left, k: lambda frame: left(frame) == k,
+    '!=': lambda left, k: lambda frame: left(frame) != k,
+}
+COMPARISONS_SLOT_CONSTANT = {
+    '<': lambda i, k: lambda frame: frame[i] < k,
+    '>': lambda i, k: lambda frame: frame[i] > k,
+    '<=': lambda i, k: lambda frame: frame[i] <= k,
+    '>=': lambda i, k: lambda frame: frame[i] >= k,
+    '==': lambda i, k: lambda frame: frame[i] == k,
+    '!=': lambda i, k: lambda frame: frame[i] != k,
+}
+
+
+def guarded(run, line):
+    """Clausura que reporta con su línea los errores de Python de `run`: la usan las
+    operaciones que fallan solo con algunos valores (un entero demasiado grande para
+    convertirlo a flt o para escribirlo)"""
+    def checked(frame):
+        try:
+            return run(frame)
+        except (TypeError, ValueError, OverflowError):
+            raise MiRuntimeError(INVALID_OPERATION, line) from None
+    return checked
+
+
+def can_return(statements):
+    """Si un bloque contiene un rtn (sin contar las funciones anidadas)"""
+    for statement in statements:
+        kind = type(statement)
+        if kind is Return:
+            return True
+        if kind is If and (can_return(statement.then_body) or can_return(statement.else_body)):
+            return True
+        if (kind is While or kind is For) and can_return(statement.body):
+            return True
+    return False
+
+
+class BoundIO:
+    """Funciones de E/S de la ejecución en curso; las clausuras de clg y scn las leen de aquí
+    para que el programa compilado se pueda ejecutar con distintos ProgramIO"""
+    __slots__ = ('write_line', 'read_value')
+
+
+class ClosureProgram:
+    """Programa ya convertido a clausuras, listo para ejecutarse una o más veces"""
+
+    def __init__(self, body, globals_, io, memo=None, profiler=None):
+        self.body = body
+        self.globals = globals_  # Marco global compartido por las clausuras
+        self.io = io
+        self.memo = memo  # MemoTable de las funciones puras, o None sin memorización
+        self.profiler = profiler  # ExecutionProfiler con el que se compiló, o None
+
+    def run(self, io=None):
+        io = io or ProgramIO()
+        self.io.write_line = io.write_line
+        self.io.read_value = io.read_value
+        self.globals[:] = [None] * len(self.globals)
+        if self.memo is not None:
+            self.memo.clear()
+        limit = sys.getrecursionlimit()
+        if self.profiler is None:
+            sys.setrecursionlimit(max(limit, RECURSION_LIMIT))
+        else:
+            # Los envoltorios del perfil agregan marcos: la profundidad permitida no cambia
+            sys.setrecursionlimit(max(limit, PROFILED_RECURSION_LIMIT))
+            self.profiler.start()
+        try:
+            self.body(self.globals)
+        except (TypeError, ValueError, OverflowError):
+            raise MiRuntimeError(INVALID_OPERATION)
+        except RecursionError:
+            raise MiRuntimeError("Recursión demasiado profunda")
+        finally:
+            if self.profiler is not None:
+                self.profiler.stop()
+            sys.setrecursionlimit(limit)
+            io.flush()
+
+
+class ClosureCompiler:
+    """Convierte el AST analizado en clausuras de Python anidadas, una por nodo.
+
+    Cada clausura recibe el marco actual (lista de slots): el del programa principal es
+    la lista de globales y cada llamada crea el suyo con los parámetros al inicio. Los
+    nombres se resuelven a slots y los operadores se eligen una sola vez según los tipos
+    del analizador, así que ejecutar es solo llamar clausuras, sin despachar por tipo de
+    nodo. Una sentencia retorna None para continuar o el valor de un rtn.
+
+    Con memo (un MemoTable), las funciones que el analizador marcó como puras guardan sus
+    resultados por argumentos y no vuelven a ejecutar el cuerpo con los mismos valores.
+    Con profiler (un ExecutionProfiler), cada sentencia y llamada se envuelve para medirla."""
+
+    def __init__(self, vectorize=False, memo=None, profiler=None):
+        self.vectorize = vectorize and vectorizer.available()
+        self.memo = memo
+        self.profiler = profiler
+        self.io = BoundIO()
+        self.resolver = SlotResolver()
+        self.globals = None
+        self.bodies = []  # Cuerpo compilado de cada función (se llena al compilarla)
+        self.caches = {}  # Índice de función pura -> MemoCache (solo con memo)
+
+    def compile(self, program):
+        body = self.block(program.body)
+        globals_ = self.global_frame()
+        globals_.extend([None] * (self.resolver.global_count - len(globals_)))
+        return ClosureProgram(body, globals_, self.io, self.memo, self.profiler)
+
+    # Acceso a variables
+    def in_current_frame(self, variable):
+        # El marco del programa principal es la lista de globales
+        return variable.owner is self.resolver.current_function
+
+    def load(self, variable):
+        index = variable.index
+        if self.in_current_frame(variable):
+            return lambda frame: frame[index]
+        globals_ = self.global_frame()
+        return lambda frame: globals_[index]
+
+    def global_frame(self):
+        # Las funciones se compilan antes de conocer el tamaño del marco global; la lista
+        # se crea aquí y compile() la extiende al tamaño final
+        if self.globals is None:
+            self.globals = []
+        return self.globals
+
+    def store(self, variable, value):
+        index = variable.index
+        if self.in_current_frame(variable):
+            def store(frame):
+                frame[index] = value(frame)
+        else:
+            globals_ = self.global_frame()
+
+            def store(frame):
+                globals_[index] = value(frame)
+        return store
+
+    def setter(self, variable):
+        """Función (marco, valor) que guarda directamente en el slot de una variable"""
+        index = variable.index
+        frame_slots = None if self.in_current_frame(variable) else self.global_frame()
+
+        def set_value(frame, value):
+            (frame if frame_slots is None else frame_slots)[index] = value
+        return set_value
+
+    @staticmethod
+    def convert(value, source_type, target_type, line):
+        if needs_conversion(source_type, target_type):
+            converter = CONVERTERS[target_type]
+            run = lambda frame: converter(value(frame))
+            # De ent/lg a flt falla si el entero no cabe en un flt
+            return guarded(run, line) if target_type == Type.FLT else run
+        return value
+
+    # Sentencias
+    def block(self, statements):
+        compiled = []
+        for statement in statements:
+            run = self.STATEMENT_COMPILERS[type(statement)](self, statement)
+            if run is not None:
+                if self.profiler is not None:
+                    run = self.profiler.statement(run, statement.line)
+                compiled.append(run)
+        if not can_return(statements):
+            if len(compiled) == 1:
+                return compiled[0]
+
+            def run(frame):
+                for statement in compiled:
+                    statement(frame)
+            return run
+
+        def run_returning(frame):
+            for statement in compiled:
+                result = statement(frame)
+                if result is not None:
+                    return result
+        return run_returning
+
+    def declaration(self, node):
+        if node.reads_input:
+            io = self.io
+            type_code, line = node.type, node.line
+            value = lambda frame: io.read_value(type_code, line)
+        elif node.init is not None:
+            value = self.convert(self.expression(node.init), value_type(node.init), node.type, node.line)
+        else:
+            default = DEFAULT_VALUES[node.type]
+            value = lambda frame: default
+        return self.store(self.resolver.declare_variable(node.name, node.type), value)
+
+    def assignment(self, node):
+        variable = self.resolver.variable(node.name, node)
+        source_type = value_type(node.value)
+        increment = self.increment(variable, node.value, source_type)
+        if increment is not None:
+            return increment
+        return self.store(variable, self.convert(self.expression(node.value), source_type, variable.type,
+                                                 node.line))
+
+    def increment(self, variable, value, source_type):
+        """`x = x + k` o `x = x - k` sobre el marco actual, en una sola clausura"""
+        if (type(value) is not Expression or len(value.operators) != 1 or value.operators[0] not in '+-'
+                or not self.in_current_frame(variable) or needs_conversion(source_type, variable.type)):
+            return None
+        left, right = value.operands
+        if type(left) is not Name or left.name != variable.name or type(right) is not Number:
+            return None
+        if self.resolver.variable(left.name, left) is not variable or right.value is None:
+            return None
+        index = variable.index
+        step = right.value if value.operators[0] == '+' else -right.value
+
+        def increment(frame):
+            frame[index] += step
+        return increment
+
+    def function(self, node):
+        function = self.resolver.declare_function(node)
+        self.bodies.append(None)
+        if self.memo is not None and node.is_pure:
+            self.caches[function.index] = self.memo.cache(node.name)
+        self.resolver.enter_function(function)
+        body = self.block(node.body)
+        self.resolver.exit_function()
+        padding = [None] * (function.local_count - len(function.params))
+        if function.return_type == Type.VOID:
+            def run(frame):
+                body(frame)
+        else:
+            # Al llegar al final sin rtn se retorna el valor por defecto del tipo
+            default = DEFAULT_VALUES[function.return_type]
+            if node.has_tail_call:
+                def run(frame):
+                    result = body(frame)
+                    while result is TAIL_CALL:
+                        result = body(frame)
+                    return default if result is None else result
+            else:
+                def run(frame):
+                    result = body(frame)
+                    return default if result is None else result
+        self.bodies[function.index] = (run, padding)
+        return None
+
+    def if_statement(self, node):
+        self.resolver.enter_block()
+        test = self.comparison(node.condition)
+        then_body = self.block(node.then_body)
+        else_body = self.block(node.else_body) if node.else_body else None
+        self.resolver.exit_block()
+        if else_body is None:
+            def run(frame):
+                if test(frame):
+                    return then_body(frame)
+        else:
+            def run(frame):
+                if test(frame):
+                    return then_body(frame)
+                return else_body(frame)
+        return run
+
+    def loop(self, test, body, step, returns):
+        if returns:
+            def run(frame):
+                while test(frame):
+                    result = body(frame)
+                    if result is not None:
+                        return result
+                    if step is not None:
+                        step(frame)
+        elif step is None:
+            def run(frame):
+                while test(frame):
+                    body(frame)
+        else:
+            def run(frame):
+                while test(frame):
+                    body(frame)
+                    step(frame)
+        return run
+
+    def while_loop(self, node):
+        self.resolver.enter_block()
+        test = self.loop_condition(node)
+        body = self.block(node.body)
+        self.resolver.exit_block()
+        return self.loop(test, body, None, can_return(node.body))
+
+    def loop_condition(self, node):
+        test = self.comparison(node.condition)
+        if self.profiler is not None:
+            test = self.profiler.condition(test, node.line)
+        return test
+
+    def for_loop(self, node):
+        self.resolver.enter_block()
+        init = self.STATEMENT_COMPILERS[type(node.init)](self, node.init) if node.init is not None else None
+        test = self.loop_condition(node)
+        body = self.block(node.body)
+        step = self.assignment(node.step)
+        loop = self.loop(test, body, step, can_return(node.body))
+        if self.vectorize:
+            plan = vectorizer.analyze_loop(node, lambda name: self.resolver.variable(name, node).type)
+            if plan is not None:
+                loop = self.vectorized_loop(plan, loop, node)
+        self.resolver.exit_block()
+        if init is None:
+            return loop
+
+        def run(frame):
+            init(frame)
+            return loop(frame)
+        return run
+
+    def vectorized_loop(self, plan, loop, node):
+        """Ciclo que se ejecuta con NumPy y, si run_plan no puede, iterando con `loop`"""
+        variables = [self.resolver.variable(name, node) for name in plan.names]
+        loads = [(variable.name, self.load(variable)) for variable in variables]
+        setters = {variable.name: self.setter(variable) for variable in variables}
+        run_plan, Fallback = vectorizer.run_plan, vectorizer.Fallback
+
+        def run(frame):
+            scalars = {name: load(frame) for name, load in loads}
+            try:
+                results = run_plan(plan, scalars)
+            except Fallback:
+                return loop(frame)
+            for name, value in results.items():
+                setters[name](frame, value)
+        return run
+
+    def print_statement(self, node):
+        io = self.io
+        if node.value is not None:
+            value = self.expression(node.value)
+            if value_type(node.value) == Type.STR:
+                return lambda frame: io.write_line(value(frame))
+            run = lambda frame: io.write_line(str(value(frame)))
+            types = [value_type(node.value)]
+        else:
+            text = node.template or ""
+            variables = [self.resolver.variable(name, node) for name in node.names]
+            getters = [self.load(variable) for variable in variables]
+            if not getters:
+                return lambda frame: io.write_line(text)
+            if len(getters) == 1:
+                getter = getters[0]
+                run = lambda frame: io.write_line(text + str(getter(frame)))
+            else:
+                run = lambda frame: io.write_line(text + "".join([str(getter(frame)) for getter in getters]))
+            types = [variable.type for variable in variables]
+        # str() de un entero de más de 4300 dígitos falla
+        if Type.ENT in types or Type.LG in types:
+            return guarded(run, node.line)
+        return run
+
+    def return_statement(self, node):
+        function = self.resolver.current_function
+        if node.tail_call:
+            return self.tail_call(node.value, function)
+        value = self.expression(node.value)
+        if function.return_type == Type.VOID:
+            # rtn dentro de un procedimiento: se evalúa y se termina sin valor
+            def run(frame):
+                value(frame)
+                return False
+            return run
+        return self.convert(value, value_type(node.value), function.return_type, node.line)
+
+    def tail_call(self, node, function):
+        """rtn f(...) en la propia f: se evalúan todos los argumentos, se guardan en los
+        slots de los parámetros y el cuerpo se repite (ver function)"""
+        args = [self.convert(self.expression(arg), value_type(arg), param.type, node.line)
+                for arg, param in zip(node.args, function.params)]
+        count = len(args)
+        if count == 1:
+            arg = args[0]
+
+            def run(frame):
+                frame[0] = arg(frame)
+                return TAIL_CALL
+        else:
+            def run(frame):
+                frame[:count] = [arg(frame) for arg in args]
+                return TAIL_CALL
+        return run
+
+    def call_statement(self, node):
+        call = self.call(node)
+
+        def run(frame):
+            call(frame)
+        return run
+
+    # Expresiones
+    def expression(self, node):
+        kind = type(node)
+        if kind is Name:
+            return self.load(self.resolver.variable(node.name, node))
+        if kind is Number or kind is String:
+            constant = node.value
+            return lambda frame: constant
+        if kind is Call:
+            return self.call(node)
+        # Evaluación de izquierda a derecha, sin precedencia
+        first = node.operands[0]
+        result = self.expression(first)
+        result_type = value_type(first)
+        for position, (operator, operand) in enumerate(zip(node.operators, node.operands[1:])):
+            left_node = first if position == 0 else None
+            result, result_type = self.binary(operator, result, result_type, left_node, operand, node.line)
+        return result
+
+    def slot_of(self, node):
+        """Slot en el marco actual de una variable usada como operando, o None"""
+        if type(node) is Name:
+            variable = self.resolver.variable(node.name, node)
+            if self.in_current_frame(variable):
+                return variable.index
+        return None
+
+    def binary(self, operator, left, left_type, left_node, right_node, line):
+        right_type = value_type(right_node)
+        if left_type == Type.STR or right_type == Type.STR:
+            if operator == '+' and left_type == right_type:
+                return ARITHMETIC['+'](left, self.expression(right_node)), Type.STR
+
+            def invalid(frame):
+                raise MiRuntimeError(INVALID_OPERATION, line)
+            return invalid, Type.STR
+
+        if operator == '/' or left_type == Type.FLT or right_type == Type.FLT:
+            result_type = Type.FLT
+        elif left_type == Type.LG or right_type == Type.LG:
+            result_type = Type.LG
+        else:
+            result_type = Type.ENT
+
+        # Constante a la derecha: sin llamada extra y, si no es cero, sin verificar el divisor
+        if type(right_node) is Number and right_node.value is not None and (
+                right_node.value != 0 or operator not in '/%'):
+            k = right_node.value
+            if operator == '/':
+                k = float(k)  # '/' siempre es división real
+            slot = self.slot_of(left_node) if left_node is not None else None
+            if slot is not None:
+                run = ARITHMETIC_SLOT_CONSTANT[operator](slot, k)
+            else:
+                run = ARITHMETIC_CONSTANT[operator](left, k)
+        else:
+            right = self.expression(right_node)
+            if operator == '/':
+                run = lambda frame: divide(left(frame), right(frame), line)
+            elif operator == '%':
+                run = lambda frame: modulo(left(frame), right(frame), line)
+            else:
+                run = ARITHMETIC[operator](left, right)
+        # Con un ent/lg que pasa a flt ('/' siempre) falla si el entero no cabe en un flt
+        if result_type == Type.FLT and (left_type != Type.FLT or right_type != Type.FLT):
+            run = guarded(run, line)
+        return run, result_type
+
+    def comparison(self, node):
+        operator = node.operator
+        if type(node.right) is Number and node.right.value is not None:
+            k = node.right.value
+            slot = self.slot_of(node.left)
+            if slot is not None:
+                return COMPARISONS_SLOT_CONSTANT[operator](slot, k)
+            return COMPARISONS_CONSTANT[operator](self.expression(node.left), k)
+        return COMPARISONS[operator](self.expression(node.left), self.expression(node.right))
+
+    def call(self, node):
+        function = self.resolver.function(node.name, node)
+        args = [self.convert(self.expression(arg), value_type(arg), param.type, node.line)
+                for arg, param in zip(node.args, function.params)]
+        bodies = self.bodies
+        index, line = function.index, node.line
+        if index in self.caches:
+            call = self.memoized_call(self.caches[index], args, index, line)
+        else:
+            # La función puede no estar compilada aún (recursión): el cuerpo se busca al llamar
+            def call(frame):
+                run, padding = bodies[index]
+                try:
+                    return run([arg(frame) for arg in args] + padding)
+                except RecursionError:
+                    raise MiRuntimeError("Recursión demasiado profunda", line) from None
+        if self.profiler is not None:
+            call = self.profiler.call(call, function.name)
+        return call
+
+    def memoized_call(self, cache, args, index, line):
+        """Llamada a una función pura: el caché se consulta aquí y no en el cuerpo para no
+        sumar un marco de Python por nivel de recursión"""
+        bodies = self.bodies
+        lookup, store = cache.lookup, cache.store
+
+        def call(frame):
+            key = tuple([arg(frame) for arg in args])
+            result = lookup(key)
+            if result is MISSING:
+                run, padding = bodies[index]
+                try:
+                    result = run(list(key) + padding)
+                except RecursionError:
+                    raise MiRuntimeError("Recursión demasiado profunda", line) from None
+                store(key, result)
+            return result
+        return call
+
+    STATEMENT_COMPILERS = {
+        Declaration: declaration,
+        Assignment: assignment,
+        ForStep: assignment,
+        Function: function,
+        If: if_statement,
+        For: for_loop,
+        While: while_loop,
+        Print: print_statement,
+        Return: return_statement,
+        Call: call_statement,
+    }
+
+
+def compile_program(program, vectorize=False, memo=None, profiler=None):
+    """ClosureProgram equivalente a un Program analizado. Con vectorize, los for contados
+    sin efectos se ejecutan con NumPy cuando está instalado (ver vectorizer.py); con memo
+    (un MemoTable), las llamadas a funciones puras pasan por su caché; con profiler (un
+    ExecutionProfiler), la ejecución se perfila por línea"""
+    return ClosureCompiler(vectorize, memo, profiler).compile(program)
+
+
+def run_program(program, io=None, vectorize=False, memo=None, profiler=None):
+    """Compila un Program analizado a clausuras y lo ejecuta"""
+    compile_program(program, vectorize, memo, profiler).run(io)
@@ -0,0 +1,189 @@
+import gc
+import sys
+from antlr4.tree.Tree import TerminalNode
+from MiLenguajeParser import MiLenguajeParser
+from ast_nodes import (Program, Declaration, Assignment, ForStep, Function, If, For, While,
+                       Print, Return, Expression, Comparison, Call, Name, Number, String)
+from type_system import Type, type_of
+
+P = MiLenguajeParser
+
+
+def parse_number(text):
+    """Convierte el texto de un NUMERO_VALORES en (valor, tipo)"""
+    if 'l' in text:
+        try:
+            return int(text.replace('l', '')), Type.LG
+        except ValueError:
+            return None, Type.LG  # Literal como 1.5l: el analizador lo reporta (visit_literal)
+    elif '.' in text:
+        return float(text), Type.FLT
+    return int(text), Type.ENT
+
+
+class AstBuilder:
+    """Convierte el árbol de `parser.programa()` en el AST compacto de ast_nodes"""
+
+    def build(self, tree):
+        return Program(tuple(self.statement(child) for child in tree.children
+                             if isinstance(child, P.SentenciaContext)))
+
+    def statements(self, children):
+        return tuple(self.statement(child) for child in children if isinstance(child, P.SentenciaContext))
+
+    def statement(self, ctx):
+        node = ctx.children[0]
+        if isinstance(node, P.EstructuraDeControlContext):
+            node = node.children[0]
+        return self.STATEMENT_BUILDERS[type(node)](self, node)
+
+    def declaration(self, ctx):
+        is_constant = False
+        type_name = name = init = None
+        reads_input = False
+        for child in ctx.children:
+            if isinstance(child, P.KwUnmutableContext):
+                is_constant = True
+            elif isinstance(child, P.TipoContext):
+                type_name = type_of(child)
+            elif isinstance(child, P.ExpresionContext):
+                init = self.expression(child)
+            elif isinstance(child, P.KwScnContext):
+                reads_input = True
+            elif child.symbol.type == P.ID:
+                name = sys.intern(child.symbol.text)
+        return Declaration(type_name, name, is_constant, init, reads_input, ctx.start.line, ctx.start.column)
+
+    def assignment(self, ctx):
+        return Assignment(sys.intern(ctx.children[0].symbol.text), self.expression(ctx.children[2]),
+                          ctx.start.line, ctx.start.column)
+
+    def for_step(self, ctx):
+        return ForStep(sys.intern(ctx.children[0].symbol.text), self.expression(ctx.children[2]),
+                       ctx.start.line, ctx.start.column)
+
+    def function(self, ctx):
+        name = sys.intern(ctx.children[1].symbol.text)
+        return_type = None
+        params = ()
+        params_line = params_column = None
+        for child in ctx.children:
+            if isinstance(child, P.ParametrosContext):
+                params = self.parameters(child)
+                params_line, params_column = child.start.line, child.start.column
+            elif isinstance(child, P.TipoContext):
+                return_type = type_of(child)
+        return Function(name, return_type, params, params_line, params_column,
+                        self.statements(ctx.children), ctx.start.line, ctx.start.column)
+
+    def parameters(self, ctx):
+        params = []
+        param_type = None
+        for child in ctx.children:
+            if isinstance(child, P.TipoContext):
+                param_type = type_of(child)
+            elif child.symbol.type == P.ID:
+                params.append((sys.intern(child.symbol.text), param_type))
+        return tuple(params)
+
+    def if_statement(self, ctx):
+        then_body = []
+        else_body = []
+        body = then_body
+        for child in ctx.children:
+            if isinstance(child, P.SentenciaContext):
+                body.append(self.statement(child))
+            elif isinstance(child, TerminalNode) and child.symbol.type == P.T__10:  # 'else'
+                body = else_body
+        return If(self.comparison(ctx.children[2]), tuple(then_body), tuple(else_body),
+                  ctx.start.line, ctx.start.column)
+
+    def for_loop(self, ctx):
+        init = condition = step = None
+        for child in ctx.children:
+            if isinstance(child, P.DeclaracionContext):
+                init = self.declaration(child)
+            elif isinstance(child, P.AsignacionContext):
+                init = self.assignment(child)
+            elif isinstance(child, P.ExpresionLogicaContext):
+                condition = self.comparison(child)
+            elif isinstance(child, P.AsignacionForContext):
+                step = self.for_step(child)
+        return For(init, condition, step, self.statements(ctx.children), ctx.start.line, ctx.start.column)
+
+    def while_loop(self, ctx):
+        return While(self.comparison(ctx.children[2]), self.statements(ctx.children),
+                     ctx.start.line, ctx.start.column)
+
+    def print_statement(self, ctx):
+        node = ctx.children[2]
+        if isinstance(node, P.ExpresionContext):
+            return Print(self.expression(node), None, (), ctx.start.line, ctx.start.column)
+        if node.symbol.type == P.ID:
+            return Print(Name(sys.intern(node.symbol.text), node.symbol.line, node.symbol.column),
+                         None, (), ctx.start.line, ctx.start.column)
+        names = tuple(sys.intern(child.symbol.text) for child in ctx.children[3:]
+                      if isinstance(child, TerminalNode) and child.symbol.type == P.ID)
+        return Print(None, node.symbol.text[1:-1], names, ctx.start.line, ctx.start.column)
+
+    def return_statement(self, ctx):
+        return Return(self.expression(ctx.children[1]), ctx.start.line, ctx.start.column)
+
+    def comparison(self, ctx):
+        left, operator, right = ctx.children
+        return Comparison(self.expression(left), sys.intern(operator.start.text), self.expression(right),
+                          ctx.start.line, ctx.start.column)
+
+    def expression(self, ctx):
+        children = ctx.children
+        # Una expresión de un solo término se reduce al término
+        if len(children) == 1:
+            return self.term(children[0])
+        operands = tuple(self.term(children[i]) for i in range(0, len(children), 2))
+        operators = tuple(sys.intern(children[i].start.text) for i in range(1, len(children), 2))
+        return Expression(operands, operators, ctx.start.line, ctx.start.column)
+
+    def term(self, ctx):
+        node = ctx.children[0]
+        if isinstance(node, P.LlamadaFuncionContext):
+            return self.call(node)
+        token = node.symbol
+        if token.type == P.ID:
+            return Name(sys.intern(token.text), token.line, token.column)
+        if token.type == P.NUMERO_VALORES:
+            value, type_name = parse_number(token.text)
+            return Number(token.text, value, type_name, token.line, token.column)
+        if token.type == P.STRING:
+            return String(token.text[1:-1], token.line, token.column)
+        # '(' expresion ')'
+        return self.expression(ctx.children[1])
+
+    def call(self, ctx):
+        args = tuple(self.expression(child) for child in ctx.children if isinstance(child, P.ExpresionContext))
+        return Call(sys.intern(ctx.children[0].symbol.text), args, ctx.start.line, ctx.start.column)
+
+    STATEMENT_BUILDERS = {
+        P.DeclaracionContext: declaration,
+        P.AsignacionContext: assignment,
+        P.EstructuraIfContext: if_statement,
+        P.CicloForContext: for_loop,
+        P.CicloWhileContext: while_loop,
+        P.LlamadaFuncionContext: call,
+        P.KwClgContext: print_statement,
+        P.FuncionConRetornoContext: function,
+        P.FuncionSinRetornoContext: function,
+        P.RetornoSentenciaContext: return_statement,
+    }
+
+
+def lower_program(tree):
+    """Genera el AST compacto a partir del contexto retornado por `parser.programa()`"""
+    # El AST solo crea objetos nuevos y sin ciclos: pausar el recolector de ciclos evita
+    # que recorra una y otra vez el árbol de ANTLR, que sigue vivo durante la conversión
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return AstBuilder().build(tree)
+    finally:
+        if gc_enabled:
+            gc.enable()
@@ -1,32 +1,45 @@
 import sys
 import os
+import io
+from contextlib import redirect_stdout
+from multiprocessing import Pool
 from antlr4 import *
-from antlr4.error.ErrorListener import ErrorListener
+from antlr4.error.ErrorStrategy import DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
 from MiLenguajeLexer import MiLenguajeLexer
+from fast_lexer import FastLexer
+from error_listener import MiErrorListener
+from char_streams import CompactInputStream, CompactFileStream
 from MiLenguajeParser import MiLenguajeParser
 from semantic_analyzer import SemanticAnalyzer
+from lowering import lower_program
 from symbol_table import SemanticError
+from compile_cache import CompileCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
+from phase_profiler import PhaseProfiler, profile_phase, count_tree_nodes
+from execution_profiler import ExecutionProfiler, MODES as PROFILE_MODES
+from codegen import BackendError
+from runtime import MiRuntimeError, ProgramIO, MemoTable, DEFAULT_MEMO_SIZE
+from optimizer import fold_constants, eliminate_dead_code
+from source_writer import milenguaje_source
+import bytecode
+import transpiler
+import c_backend
+import interpreter
 
-class MiErrorListener(ErrorListener):
-    def __init__(self):
-        super(MiErrorListener, self).__init__()
-        self.errors = []
-    
-    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
-        error_message = f"Error sintáctico en línea {line}, columna {column}: {msg}"
-        error_context = f"Contexto: '{offendingSymbol.text if offendingSymbol else 'EOF'}'"
-        self.errors.append(error_message)
-        self.errors.append(error_context)
-    
-    def get_errors(self):
-        return self.errors
+# Lexers disponibles para --lexer
+LEXERS = {
+    'antlr': MiLenguajeLexer,
+    'fast': FastLexer,
+}
 
-def show_token_stream(lexer):
-    """Muestra todos los tokens generados por el lexer (función de depuración)"""
-    print("\n=== TABLA DE TOKENS ===")
-    print("TOKEN_TYPE".ljust(20) + "TEXT".ljust(30) + "LINE:COL")
-    print("-" * 70)
-    
+# Backends de ejecución disponibles para --run
+RUN_BACKENDS = ('vm', 'python', 'c', 'closure')
+
+# Backends que memorizan las llamadas a funciones puras (ver runtime.MemoTable)
+MEMO_BACKENDS = ('vm', 'closure')
+
+def show_token_stream(token_stream, lexer):
+    """Muestra todos los tokens del buffer del stream (función de depuración)"""
     # Crear un diccionario inverso de nombres de tokens
     token_names = {}
     for i, name in enumerate(lexer.ruleNames):
@@ -35,18 +48,44 @@ def show_token_stream(lexer):
     # Añadir nombres de tokens especiales
     token_names[Token.EOF] = 'EOF'
     
-    lexer.reset()
-    token = lexer.nextToken()
-    while token.type != Token.EOF:
+    # Lexear una sola vez; el mismo buffer lo consume después el parser
+    token_stream.fill()
+    
+    # Escribir toda la tabla de una vez en lugar de un print por token
+    lines = ["\n=== TABLA DE TOKENS ===",
+             "TOKEN_TYPE".ljust(20) + "TEXT".ljust(30) + "LINE:COL",
+             "-" * 70]
+    for token in token_stream.tokens:
+        if token.type == Token.EOF:
+            break
         # Obtener el nombre del token o usar el tipo como cadena si no está disponible
         token_name = token_names.get(token.type, str(token.type))
-        print(f"{token_name}".ljust(20) + f"'{token.text}'".ljust(30) + f"{token.line}:{token.column}")
-        token = lexer.nextToken()
+        lines.append(f"{token_name}".ljust(20) + f"'{token.text}'".ljust(30) + f"{token.line}:{token.column}")
     
     # Mostrar el token EOF al final
-    print(f"EOF".ljust(20) + "'<EOF>'".ljust(30) + "N/A")
-    print("-" * 70)
-    lexer.reset()
+    lines.append(f"EOF".ljust(20) + "'<EOF>'".ljust(30) + "N/A")
+    lines.append("-" * 70)
+    lines.append("")
+    sys.stdout.write("\n".join(lines))
+    sys.stdout.flush()
+
+def parse_program(parser, error_listener):
+    """Analiza el programa en dos etapas: SLL con abandono rápido y, si falla, LL completo"""
+    # Primera etapa: predicción SLL sin reportar errores, abandonando al primer fallo
+    parser.removeErrorListeners()
+    parser._errHandler = BailErrorStrategy()
+    parser._interp.predictionMode = PredictionMode.SLL
+    try:
+        return parser.programa()
+    except ParseCancellationException:
+        pass
+
+    # Segunda etapa: reanalizar desde el inicio con LL completo y recuperación de errores
+    parser.reset()
+    parser.addErrorListener(error_listener)
+    parser._errHandler = DefaultErrorStrategy()
+    parser._interp.predictionMode = PredictionMode.LL
+    return parser.programa()
 
 def print_tree(tree, parser, indent=0):
     """Imprime el árbol sintáctico de forma recursiva"""
@@ -70,25 +109,70 @@ def print_tree(tree, parser, indent=0):
         for i in range(tree.getChildCount()):
             print_tree(tree.getChild(i), parser, indent + 1)
 
-def compile_code(input_file, debug=False):
-    # Leer archivo de entrada
-    try:
-        print(f"Leyendo archivo: {input_file}")
-        input_stream = FileStream(input_file, encoding='utf-8')
-    except Exception as e:
-        print(f"Error al leer el archivo: {e}")
-        return False
+class CompilationResult:
+    """Resultado de compilar un programa: fase alcanzada, errores y tabla de símbolos"""
+    STAGE_HEADERS = {
+        'lexico': "Errores léxicos encontrados:",
+        'sintactico': "Errores sintácticos encontrados:",
+        'semantico': "Errores semánticos encontrados:",
+    }
+
+    def __init__(self, stage=None, errors=None, failure=None, symbols=None):
+        self.stage = stage              # Última fase ejecutada: 'lectura', 'lexico', 'sintactico' o 'semantico'
+        self.errors = errors or []      # Mensajes de error de esa fase
+        self.failure = failure          # Mensaje de una excepción inesperada durante la fase
+        self.symbols = symbols or []    # Filas (ámbito, nombre, tipo, constante, valor), agrupadas por
+                                        # ámbito; al compilar es un iterador (ver symbol_rows)
+        self.program = None             # AST analizado (solo en memoria, no se serializa)
+
+    @property
+    def success(self):
+        return self.failure is None and not self.errors
+
+    def to_dict(self):
+        if type(self.symbols) is not list:
+            self.symbols = list(self.symbols)  # El iterador se consume: la lista queda para el reporte
+        return {
+            'stage': self.stage,
+            'errors': self.errors,
+            'failure': self.failure,
+            'symbols': self.symbols,
+            'success': self.success,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['stage'], data['errors'], data['failure'], [tuple(row) for row in data['symbols']])
+
+def symbol_rows(symbol_table):
+    """Genera las filas (ámbito, nombre, tipo, constante, valor) de la tabla de símbolos,
+    agrupadas por ámbito"""
+    # El tipo se guarda por nombre para que las filas sean serializables (caché, servidor)
+    for scope_name, name, symbol in symbol_table.iter_symbols_by_scope():
+        yield scope_name, name, str(symbol.type), symbol.is_constant, symbol.value
+
+def collect_symbol_rows(symbol_table):
+    """Obtiene la lista de filas de la tabla de símbolos (ver symbol_rows)"""
+    return list(symbol_rows(symbol_table))
+
+def compile_stream(input_stream, debug=False, log=print, lexer_class=MiLenguajeLexer, profiler=None,
+                   report_symbols=True):
+    """Ejecuta las fases léxica, sintáctica y semántica sobre un stream de caracteres"""
+    result = CompilationResult('lexico')
     
     # Crear lexer
-    lexer = MiLenguajeLexer(input_stream)
+    lexer = lexer_class(input_stream)
     lexer.removeErrorListeners()
     lexer_error_listener = MiErrorListener()
     lexer.addErrorListener(lexer_error_listener)
     
+    # Crear stream de tokens
+    token_stream = CommonTokenStream(lexer)
+    
     # Mostrar tokens si estamos en modo debug
     if debug:
         try:
-            show_token_stream(lexer)
+            show_token_stream(token_stream, lexer)
         except Exception as e:
             print(f"Error al mostrar tokens: {e}")
             import traceback
@@ -97,24 +181,27 @@ def compile_code(input_file, debug=False):
     # Verificar errores léxicos
     lexer_errors = lexer_error_listener.get_errors()
     if lexer_errors:
-        print("Errores léxicos encontrados:")
-        for error in lexer_errors:
-            print(f"  {error}")
-        return False
+        result.errors = list(lexer_errors)
+        return result
     
-    # Crear stream de tokens
-    token_stream = CommonTokenStream(lexer)
+    # Al perfilar, el lexer se mide por separado llenando el stream antes del parser
+    if profiler is not None:
+        with profiler.phase('lexico'):
+            token_stream.fill()
+        profiler.count('tokens', len(token_stream.tokens))
     
     # Crear parser
     parser = MiLenguajeParser(token_stream)
-    parser.removeErrorListeners()
     parser_error_listener = MiErrorListener()
-    parser.addErrorListener(parser_error_listener)
     
     # Ejecutar parser
+    result.stage = 'sintactico'
     try:
-        print("Analizando sintaxis...")
-        tree = parser.programa()
+        log("Analizando sintaxis...")
+        with profile_phase(profiler, 'sintactico'):
+            tree = parse_program(parser, parser_error_listener)
+        if profiler is not None:
+            profiler.count('parse_tree_nodes', count_tree_nodes(tree))
         
         # Mostrar árbol sintáctico si estamos en modo debug
         if debug:
@@ -127,81 +214,664 @@ def compile_code(input_file, debug=False):
                 import traceback
                 traceback.print_exc()
     except Exception as e:
-        print(f"Error durante el análisis sintáctico: {e}")
-        return False
+        result.failure = f"Error durante el análisis sintáctico: {e}"
+        return result
     
     # Verificar errores sintácticos
     parser_errors = parser_error_listener.get_errors()
     if parser_errors:
-        print("Errores sintácticos encontrados:")
-        for error in parser_errors:
-            print(f"  {error}")
-        return False
+        result.errors = list(parser_errors)
+        return result
     
     # Ejecutar análisis semántico
-    print("Realizando análisis semántico...")
-    analyzer = SemanticAnalyzer()
-    walker = ParseTreeWalker()
+    result.stage = 'semantico'
+    log("Realizando análisis semántico...")
+    analyzer = SemanticAnalyzer(keep_history=report_symbols)
     
     try:
-        walker.walk(analyzer, tree)
+        with profile_phase(profiler, 'semantico'):
+            program = lower_program(tree)
+            tree = None  # El análisis trabaja solo sobre el AST; liberar el árbol de ANTLR
+            analyzer.analyze(program)
     except Exception as e:
-        print(f"Error durante el análisis semántico: {e}")
-        return False
+        result.failure = f"Error durante el análisis semántico: {e}"
+        return result
     
     # Verificar errores semánticos
     semantic_errors = analyzer.get_errors()
     if semantic_errors:
-        print("Errores semánticos encontrados:")
-        for error in semantic_errors:
+        result.errors = [str(error) for error in semantic_errors]
+        return result
+    
+    if report_symbols:
+        # Se generan al imprimirlas; solo la caché y el servidor las guardan en una lista
+        result.symbols = symbol_rows(analyzer.symbol_table)
+    result.program = program
+    return result
+
+def report_progress(result):
+    """Imprime los mensajes de progreso de las fases que alcanzó un resultado ya calculado"""
+    if result.stage in ('sintactico', 'semantico'):
+        print("Analizando sintaxis...")
+    if result.stage == 'semantico':
+        print("Realizando análisis semántico...")
+
+def report_result(result, report_symbols=True):
+    """Imprime los errores o la tabla de símbolos de un resultado de compilación"""
+    if result.failure is not None:
+        print(result.failure)
+        return False
+    
+    if result.errors:
+        print(CompilationResult.STAGE_HEADERS[result.stage])
+        for error in result.errors:
             print(f"  {error}")
         return False
     
     print("Compilación exitosa. No se encontraron errores.")
+    if not report_symbols:
+        return True
     print("\n=== TABLA DE SÍMBOLOS ===")
     print("ÁMBITO".ljust(20) + "NOMBRE".ljust(15) + "TIPO".ljust(10) + "CONSTANTE".ljust(10) + "VALOR")
     print("-" * 75)
 
-    # Ordenar los símbolos por ámbito
-    symbols_by_scope = {}
-    for scope_name, name, symbol in analyzer.symbol_table.get_all_symbols_with_scopes():
-        if scope_name not in symbols_by_scope:
-            symbols_by_scope[scope_name] = []
-        symbols_by_scope[scope_name].append((name, symbol))
-
-    # Imprimir por ámbito
-    for scope_name, symbols in symbols_by_scope.items():
-        print(f"\n>> Ámbito: {scope_name}")
-        for name, symbol in symbols:
-            const_str = "Sí" if symbol.is_constant else "No"
-            value_str = str(symbol.value) if symbol.value is not None else "N/A"
-            print(f"  {name}".ljust(20) + f"{symbol.type}".ljust(10) + f"{const_str}".ljust(10) + f"{value_str}")
+    # Las filas ya vienen agrupadas por ámbito: se imprimen a medida que se generan
+    current_scope = None
+    for scope_name, name, symbol_type, is_constant, value in result.symbols:
+        if scope_name != current_scope:
+            current_scope = scope_name
+            print(f"\n>> Ámbito: {scope_name}")
+        const_str = "Sí" if is_constant else "No"
+        value_str = str(value) if value is not None else "N/A"
+        print(f"  {name}".ljust(20) + f"{symbol_type}".ljust(10) + f"{const_str}".ljust(10) + f"{value_str}")
+    
+    return True
+
+def compile_code(input_file, debug=False, cache=None, lexer_class=MiLenguajeLexer, profiler=None,
+                 report_symbols=True):
+    # La caché no se usa en modo debug ni al perfilar: ambos requieren ejecutar las fases
+    use_cache = cache is not None and not debug and profiler is None
+    
+    # Leer archivo de entrada
+    try:
+        print(f"Leyendo archivo: {input_file}")
+        with profile_phase(profiler, 'lectura'):
+            if use_cache:
+                with open(input_file, 'rb') as f:
+                    source = f.read().decode('utf-8')
+                input_stream = CompactInputStream(source, input_file)
+            else:
+                input_stream = CompactFileStream(input_file, encoding='utf-8')
+    except Exception as e:
+        print(f"Error al leer el archivo: {e}")
+        return False
+    
+    # Buscar un resultado previo para el mismo código y versión del compilador
+    if use_cache:
+        key = cache.key(source, lexer_class.__name__)
+        data = cache.get(key)
+        if data is not None:
+            result = CompilationResult.from_dict(data)
+            report_progress(result)
+            return report_result(result, report_symbols)
+    
+    result = compile_stream(input_stream, debug, lexer_class=lexer_class, profiler=profiler,
+                            report_symbols=report_symbols)
+    
+    # Las excepciones inesperadas no se guardan, pueden depender del entorno; sin
+    # reporte tampoco, porque el resultado no trae la tabla de símbolos
+    if use_cache and result.failure is None and report_symbols:
+        cache.put(key, result.to_dict())
+    
+    with profile_phase(profiler, 'reporte'):
+        return report_result(result, report_symbols)
+
+def compile_profiled(input_file, debug, lexer_name, output_path=None, dump_path=None, report_symbols=True):
+    """Compila un archivo midiendo cada fase y emite las métricas en JSON"""
+    profiler = PhaseProfiler(dump_path)
+    profiler.start()
+    try:
+        success = compile_code(input_file, debug, lexer_class=LEXERS[lexer_name], profiler=profiler,
+                               report_symbols=report_symbols)
+    finally:
+        report = profiler.finish(file=input_file, lexer=lexer_name)
+    report['success'] = success
+    
+    text = PhaseProfiler.to_json(report)
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print("\n=== PERFIL ===")
+        print(text)
+    return success
+
+def silent(message):
+    pass
+
+def mlc_path_for(input_file):
+    return os.path.splitext(input_file)[0] + ".mlc"
+
+def load_analyzed_program(input_file, source, lexer_class=MiLenguajeLexer, optimize=False,
+                          optimize_report=False):
+    """Compila el código sin imprimir progreso; retorna el AST analizado o None si hay errores.
+    Con optimize se propagan sus constantes y se quita el código muerto (ver optimize_program)"""
+    result = compile_stream(CompactInputStream(source, input_file), log=silent,
+                            lexer_class=lexer_class, report_symbols=False)
+    if not result.success:
+        print(f"Leyendo archivo: {input_file}")
+        report_result(result)
+        return None
+    if optimize:
+        optimize_program(result.program, optimize_report)
+    return result.program
+
+def optimize_program(program, report=False):
+    """Reemplaza las expresiones de valor conocido por literales y después quita el código
+    muerto que eso deja; con report imprime los conteos de ambas pasadas y las instrucciones
+    de bytecode que quedan (la medida de lo que se ahorra)"""
+    before = bytecode_size(program) if report else None
+    stats = fold_constants(program)
+    dead_code = eliminate_dead_code(program)
+    if report:
+        print(stats.report())
+        print(dead_code.report())
+        if before is not None:
+            print(f"Instrucciones de bytecode:   {before} -> {bytecode_size(program)}")
+    return stats, dead_code
+
+def bytecode_size(program):
+    try:
+        return bytecode.compile_program(program).instruction_count()
+    except BackendError:
+        return None
+
+def emit_optimized(input_file, lexer_class=MiLenguajeLexer, source_path='-', report=False):
+    """Escribe el programa optimizado (constantes propagadas, sin código muerto) como código
+    MiLenguaje en source_path, o en la salida si es '-'"""
+    try:
+        with open(input_file, 'rb') as f:
+            program = load_analyzed_program(input_file, f.read().decode('utf-8'), lexer_class, True, report)
+    except OSError as e:
+        print(f"Error al leer el archivo: {e}")
+        return False
+    if program is None:
+        return False
+    source = milenguaje_source(program)
+    if source_path == '-':
+        print(source, end="")
+    else:
+        with open(source_path, 'w', encoding='utf-8') as f:
+            f.write(source)
+    return True
+
+def emit_python(program, python_path):
+    """Escribe el código Python generado en python_path, o en la salida si es '-'"""
+    source = transpiler.python_source(program)
+    if python_path == '-':
+        print(source)
+    else:
+        with open(python_path, 'w', encoding='utf-8') as f:
+            f.write(source)
+
+def emit_c(program, c_path):
+    """Escribe el código C generado en c_path, o en la salida si es '-'"""
+    source = c_backend.c_source(program)
+    if c_path == '-':
+        print(source)
+    else:
+        with open(c_path, 'w', encoding='utf-8') as f:
+            f.write(source)
+
+def build_native(input_file, lexer_class=MiLenguajeLexer, executable_path=None, c_path=None, flush_lines=False,
+                 optimize=False):
+    """Genera el código C de un programa y lo compila con el compilador del sistema"""
+    try:
+        with open(input_file, 'rb') as f:
+            program = load_analyzed_program(input_file, f.read().decode('utf-8'), lexer_class, optimize)
+        if program is None:
+            return False
+        if c_path:
+            emit_c(program, c_path)
+        if executable_path:
+            c_backend.build_executable(program, executable_path, flush_lines=flush_lines)
+    except OSError as e:
+        print(f"Error al leer el archivo: {e}")
+        return False
+    except BackendError as e:
+        print(e)
+        return False
+    return True
+
+def run_code(input_file, lexer_class=MiLenguajeLexer, mlc_path=None, backend='vm', python_path=None,
+             vectorize=False, memo=None, flush_lines=False, profiler=None, optimize=False,
+             optimize_report=False):
+    """Compila un programa y lo ejecuta con el backend indicado.
+
+    'vm': bytecode en la VM. Un archivo .mlc se ejecuta directamente; con mlc_path el
+    bytecode se guarda ahí y se reutiliza si el código fuente no cambió.
+    'python': se traduce a un módulo de Python y se ejecuta con compile()/exec.
+    'c': se traduce a C, se compila con `cc` ($CC) y se ejecuta el binario.
+    'closure': se convierte el AST en clausuras de Python y se ejecuta sin generar código;
+    es el de menor latencia de arranque para programas cortos. Con vectorize los for
+    contados sin efectos se calculan con NumPy (si está instalado).
+    Con python_path se emite además el código Python generado ('-' para la salida).
+    Con memo (un MemoTable), 'vm' y 'closure' memorizan las llamadas a funciones puras.
+    La salida de clg se escribe por bloques; con flush_lines, una línea a la vez.
+    Con profiler (un ExecutionProfiler, solo 'closure') se perfila la ejecución.
+    Con optimize se ejecuta el programa optimizado (sin reusar el .mlc)."""
+    program_io = ProgramIO(flush_lines=flush_lines)
+    try:
+        if backend == 'python' or python_path:
+            with open(input_file, 'rb') as f:
+                program = load_analyzed_program(input_file, f.read().decode('utf-8'), lexer_class, optimize,
+                                                optimize_report)
+            if program is None:
+                return False
+            if python_path:
+                emit_python(program, python_path)
+                if backend != 'python':
+                    return True
+            code = transpiler.compile_python(program, input_file)
+            runner = lambda: transpiler.run_python(code, program_io)
+        elif backend == 'c':
+            with open(input_file, 'rb') as f:
+                program = load_analyzed_program(input_file, f.read().decode('utf-8'), lexer_class, optimize,
+                                                optimize_report)
+            if program is None:
+                return False
+            # El ejecutable reporta sus propios errores de ejecución
+            return c_backend.run_program(program, flush_lines=flush_lines)
+        elif backend == 'closure':
+            with open(input_file, 'rb') as f:
+                program = load_analyzed_program(input_file, f.read().decode('utf-8'), lexer_class, optimize,
+                                                optimize_report)
+            if program is None:
+                return False
+            closure_program = interpreter.compile_program(program, vectorize, memo, profiler)
+            runner = lambda: closure_program.run(program_io)
+        elif input_file.endswith('.mlc'):
+            module = bytecode.load_module(input_file)
+            if module is None:
+                print(f"Error: {input_file} no es un .mlc válido para esta versión del compilador")
+                return False
+        else:
+            with open(input_file, 'rb') as f:
+                source_bytes = f.read()
+            source_hash = bytecode.source_digest(source_bytes)
+            module = bytecode.load_module(mlc_path, source_hash) if mlc_path and not optimize else None
+            if module is None:
+                program = load_analyzed_program(input_file, source_bytes.decode('utf-8'), lexer_class, optimize,
+                                                optimize_report)
+                if program is None:
+                    return False
+                module = bytecode.compile_program(program)
+                if mlc_path:
+                    bytecode.save_module(module, mlc_path, source_hash)
+            runner = lambda: bytecode.run_module(module, program_io, memo)
+    except OSError as e:
+        print(f"Error al leer el archivo: {e}")
+        return False
+    except BackendError as e:
+        print(e)
+        return False
     
+    try:
+        runner()
+    except MiRuntimeError as e:
+        sys.stdout.flush()
+        print(e)
+        return False
     return True
 
+def report_execution_profile(profiler, input_file, folded_path=None):
+    """Imprime la tabla de líneas más ejecutadas y guarda (o imprime) las pilas plegadas"""
+    try:
+        with open(input_file, 'rb') as f:
+            source = f.read().decode('utf-8')
+    except OSError:
+        source = None
+    print(profiler.hot_table(source))
+    folded = profiler.folded()
+    if folded_path:
+        with open(folded_path, 'w', encoding='utf-8') as f:
+            f.write(folded)
+        print(f"Pilas plegadas guardadas en: {folded_path}")
+    else:
+        print("\n=== PILAS PLEGADAS ===")
+        print(folded, end="")
+
+def collect_input_files(paths):
+    """Expande archivos y directorios (recursivamente, archivos .txt) en una lista ordenada"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            found = []
+            for root, dirs, names in os.walk(path):
+                for name in names:
+                    if name.endswith('.txt'):
+                        found.append(os.path.join(root, name))
+            files.extend(sorted(found))
+        else:
+            files.append(path)
+    return files
+
+# Caché de compilación y lexer del proceso actual (cada proceso del pool crea los suyos)
+_worker_cache = None
+_worker_lexer = MiLenguajeLexer
+_worker_report_symbols = True
+
+def init_worker(cache_options, lexer_class=MiLenguajeLexer, report_symbols=True):
+    """Inicializa un proceso del pool con su instancia de caché y el lexer elegido"""
+    global _worker_cache, _worker_lexer, _worker_report_symbols
+    _worker_cache = CompileCache(*cache_options) if cache_options else None
+    _worker_lexer = lexer_class
+    _worker_report_symbols = report_symbols
+
+def compile_file_captured(input_file):
+    """Compila un archivo capturando su salida (se ejecuta en los procesos del pool)"""
+    # Cada proceso del pool conserva los DFA del lexer y del parser (atributos de clase)
+    # entre archivos, así que solo el primer archivo de cada proceso paga el arranque en frío
+    hits_before = _worker_cache.hits if _worker_cache else 0
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        try:
+            success = compile_code(input_file, cache=_worker_cache, lexer_class=_worker_lexer,
+                                   report_symbols=_worker_report_symbols)
+        except Exception as e:
+            print(f"Error inesperado: {e}")
+            success = False
+    cache_hit = _worker_cache is not None and _worker_cache.hits > hits_before
+    return input_file, success, buffer.getvalue(), cache_hit
+
+def compile_batch(paths, jobs=None, cache_options=None, lexer_class=MiLenguajeLexer, report_symbols=True):
+    """Compila varios archivos en paralelo y muestra los resultados en orden"""
+    files = collect_input_files(paths)
+    if not files:
+        print("No se encontraron archivos de entrada.")
+        return False
+    
+    jobs = jobs or os.cpu_count() or 1
+    jobs = min(jobs, len(files))
+    
+    failed = []
+    cache_hits = 0
+    
+    def report(results):
+        nonlocal cache_hits
+        # Los resultados llegan en el mismo orden que los archivos de entrada
+        for input_file, success, output, cache_hit in results:
+            sys.stdout.write(output)
+            sys.stdout.write("\n")
+            sys.stdout.flush()
+            if not success:
+                failed.append(input_file)
+            if cache_hit:
+                cache_hits += 1
+    
+    if jobs == 1:
+        init_worker(cache_options, lexer_class, report_symbols)
+        report(map(compile_file_captured, files))
+    else:
+        with Pool(jobs, initializer=init_worker, initargs=(cache_options, lexer_class, report_symbols)) as pool:
+            report(pool.imap(compile_file_captured, files))
+    
+    print("=== RESUMEN ===")
+    print(f"Archivos compilados: {len(files)}")
+    print(f"Exitosos: {len(files) - len(failed)}")
+    print(f"Con errores: {len(failed)}")
+    for input_file in failed:
+        print(f"  {input_file}")
+    if cache_options:
+        print(f"Caché: {cache_hits} aciertos, {len(files) - cache_hits} fallos")
+    
+    return not failed
+
+def parse_jobs(args):
+    """Extrae el valor de --jobs N o --jobs=N de los argumentos (None si no se indicó);
+    ValueError si falta el valor o no es un entero positivo"""
+    for i, arg in enumerate(args):
+        if arg.startswith('--jobs='):
+            jobs = int(arg.split('=', 1)[1])
+        elif arg == '--jobs':
+            if i + 1 == len(args):
+                raise ValueError("--jobs sin valor")
+            jobs = int(args[i + 1])
+        else:
+            continue
+        if jobs < 1:
+            raise ValueError(f"--jobs {jobs}")
+        return jobs
+    return None
+
+def parse_cache_options(args):
+    """Extrae --cache[=DIR] y --cache-size=MB; retorna (directorio, bytes) o None"""
+    directory = None
+    max_bytes = DEFAULT_MAX_BYTES
+    for arg in args:
+        if arg == '--cache':
+            directory = DEFAULT_CACHE_DIR
+        elif arg.startswith('--cache='):
+            directory = arg.split('=', 1)[1]
+        elif arg.startswith('--cache-size='):
+            max_bytes = int(float(arg.split('=', 1)[1]) * 1024 * 1024)
+    if directory is None:
+        return None
+    return directory, max_bytes
+
 def main():
     if len(sys.argv) < 2:
         print("Uso: python main.py archivo.txt [--debug]")
+        print("     python main.py archivo.txt|directorio ... [--jobs N]")
+        print("     python main.py --serve=socket")
+        print("     python main.py archivo.txt --socket=socket")
+        print("Opciones de caché: --cache[=directorio] --cache-size=MB")
+        print("Lexer: --lexer=antlr (por defecto) o --lexer=fast")
+        print("Perfil por fases: --profile[=salida.json] --profile-dump=fase.prof")
+        print("Sin tabla de símbolos: --no-symbols (descarta los ámbitos cerrados)")
+        print("Ejecución: --run[=vm|python|c|closure] [--emit-mlc[=archivo.mlc]]; python main.py programa.mlc")
+        print("Código Python generado: --emit-python[=archivo.py]")
+        print("Ciclos for con NumPy: --run=closure --vectorize")
+        print("Memorización de funciones puras (vm, closure): --no-memo --memo-size=N --memo-report")
+        print("Salida de clg línea por línea (sin buffer): --flush-lines")
+        print("Perfil de ejecución (closure): --run-profile[=sample|exact] [--sample-interval=ms]"
+              " [--folded=archivo]")
+        print("Código C: --emit-c[=archivo.c] [--native=ejecutable] (compila con cc o $CC)")
+        print("Optimización (constantes y código muerto): --optimize [--optimize-report] [--emit-optimized[=archivo.txt]]")
+        return
+    
+    serve_path = None
+    socket_path = None
+    profile = False
+    profile_path = None
+    profile_dump = None
+    run_backend = None
+    mlc_path = None
+    emit_mlc = False
+    python_path = None
+    c_path = None
+    native_path = None
+    memo_size = DEFAULT_MEMO_SIZE
+    run_profile = None
+    sample_interval = None
+    folded_path = None
+    optimized_path = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--serve='):
+            serve_path = arg.split('=', 1)[1]
+        elif arg.startswith('--socket='):
+            socket_path = arg.split('=', 1)[1]
+        elif arg == '--profile':
+            profile = True
+        elif arg.startswith('--profile='):
+            profile = True
+            profile_path = arg.split('=', 1)[1]
+        elif arg.startswith('--profile-dump='):
+            profile = True
+            profile_dump = arg.split('=', 1)[1]
+        elif arg == '--run':
+            run_backend = 'vm'
+        elif arg.startswith('--run='):
+            run_backend = arg.split('=', 1)[1]
+        elif arg == '--emit-mlc':
+            emit_mlc = True
+        elif arg.startswith('--emit-mlc='):
+            emit_mlc = True
+            mlc_path = arg.split('=', 1)[1]
+        elif arg == '--emit-python':
+            python_path = '-'
+        elif arg.startswith('--emit-python='):
+            python_path = arg.split('=', 1)[1]
+        elif arg == '--emit-c':
+            c_path = '-'
+        elif arg.startswith('--emit-c='):
+            c_path = arg.split('=', 1)[1]
+        elif arg.startswith('--native='):
+            native_path = arg.split('=', 1)[1]
+        elif arg == '--run-profile':
+            run_profile = 'sample'
+        elif arg.startswith('--run-profile='):
+            run_profile = arg.split('=', 1)[1]
+        elif arg.startswith('--sample-interval='):
+            try:
+                sample_interval = float(arg.split('=', 1)[1]) / 1000
+            except ValueError:
+                print("El valor de --sample-interval debe ser un número (milisegundos).")
+                sys.exit(2)
+        elif arg == '--emit-optimized':
+            optimized_path = '-'
+        elif arg.startswith('--emit-optimized='):
+            optimized_path = arg.split('=', 1)[1]
+        elif arg.startswith('--folded='):
+            folded_path = arg.split('=', 1)[1]
+        elif arg == '--no-memo':
+            memo_size = 0
+        elif arg.startswith('--memo-size='):
+            try:
+                memo_size = int(arg.split('=', 1)[1])
+            except ValueError:
+                print("El valor de --memo-size debe ser un número entero.")
+                sys.exit(2)
+    
+    # Servidor de compilación persistente con las cachés de ANTLR calientes
+    if serve_path:
+        from compile_server import CompileServer
+        CompileServer(serve_path).serve()
         return
     
     debug_mode = "--debug" in sys.argv
+    flush_lines = "--flush-lines" in sys.argv
+    report_symbols = "--no-symbols" not in sys.argv
+    optimize_report = "--optimize-report" in sys.argv
+    optimize = "--optimize" in sys.argv or optimize_report
+    
+    lexer_name = 'antlr'
+    for arg in sys.argv[1:]:
+        if arg.startswith('--lexer='):
+            lexer_name = arg.split('=', 1)[1]
+    if lexer_name not in LEXERS:
+        print(f"Lexer desconocido: {lexer_name}. Opciones: {', '.join(LEXERS)}")
+        sys.exit(2)
+    lexer_class = LEXERS[lexer_name]
+    
+    if run_backend is not None and run_backend not in RUN_BACKENDS:
+        print(f"Backend de ejecución desconocido: {run_backend}. Opciones: {', '.join(RUN_BACKENDS)}")
+        sys.exit(2)
+    
+    # El perfil de ejecución envuelve las clausuras: implica --run=closure
+    if run_profile is not None:
+        if run_profile not in PROFILE_MODES:
+            print(f"Modo de perfil desconocido: {run_profile}. Opciones: {', '.join(PROFILE_MODES)}")
+            sys.exit(2)
+        if run_backend not in (None, 'closure'):
+            print("--run-profile solo está disponible con --run=closure")
+            sys.exit(2)
+        run_backend = 'closure'
+    
+    try:
+        jobs = parse_jobs(sys.argv[1:])
+    except ValueError:
+        print("El valor de --jobs debe ser un número entero positivo.")
+        sys.exit(2)
+    
+    try:
+        cache_options = parse_cache_options(sys.argv[1:])
+    except ValueError:
+        print("El valor de --cache-size debe ser un número.")
+        sys.exit(2)
     
-    input_file = None
+    input_files = []
+    skip_next = False
     for arg in sys.argv[1:]:
+        if skip_next:
+            skip_next = False
+            continue
+        if arg == '--jobs':
+            skip_next = True
+            continue
         if not arg.startswith('--'):
-            input_file = arg
-            break
+            input_files.append(arg)
     
-    if not input_file:
+    if not input_files:
         print("Debe especificar un archivo de entrada.")
         return
     
+    # Modo por lotes: varios archivos, algún directorio o --jobs explícito
+    if jobs is not None or len(input_files) > 1 or os.path.isdir(input_files[0]):
+        if profile:
+            print("--profile solo se aplica a un único archivo; se ignora en modo por lotes.")
+        if not compile_batch(input_files, jobs, cache_options, lexer_class, report_symbols):
+            sys.exit(1)
+        return
+    
+    # Programa optimizado como código MiLenguaje (con --run además se ejecuta)
+    if optimized_path:
+        if not emit_optimized(input_files[0], lexer_class, optimized_path, optimize_report):
+            sys.exit(1)
+        if run_backend is None and not (c_path or native_path):
+            return
+        optimize_report = False  # Ya se imprimió
+    
+    # Código C y ejecutable nativo (con --run además se ejecuta)
+    if c_path or native_path:
+        if not build_native(input_files[0], lexer_class, native_path, c_path, flush_lines, optimize):
+            sys.exit(1)
+        if run_backend is None:
+            return
+    
+    # Ejecución: un .mlc se ejecuta directamente; --run compila y ejecuta el programa
+    if run_backend is not None or python_path or input_files[0].endswith('.mlc'):
+        if emit_mlc and mlc_path is None:
+            mlc_path = mlc_path_for(input_files[0])
+        vectorize = "--vectorize" in sys.argv
+        backend = run_backend or 'vm'
+        memo = MemoTable(memo_size) if memo_size > 0 and backend in MEMO_BACKENDS else None
+        profiler = None
+        if run_profile is not None:
+            profiler = ExecutionProfiler(run_profile, *([sample_interval] if sample_interval else []))
+        ok = run_code(input_files[0], lexer_class, mlc_path, backend, python_path, vectorize, memo,
+                      flush_lines, profiler, optimize, optimize_report)
+        if memo is not None and "--memo-report" in sys.argv:
+            print(memo.report())
+        if profiler is not None:
+            report_execution_profile(profiler, input_files[0], folded_path)
+        if not ok:
+            sys.exit(1)
+        return
+    
     try:
-        compile_code(input_file, debug_mode)
+        if socket_path:
+            from compile_server import compile_remote
+            compile_remote(socket_path, input_files[0], lexer_name, report_symbols)
+        elif profile:
+            compile_profiled(input_files[0], debug_mode, lexer_name, profile_path, profile_dump, report_symbols)
+        else:
+            cache = CompileCache(*cache_options) if cache_options else None
+            compile_code(input_files[0], debug_mode, cache, lexer_class, report_symbols=report_symbols)
     except Exception as e:
         print(f"Error inesperado: {e}")
         import traceback
         traceback.print_exc()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,680 @@
+import re
+import math
+import operator
+from ast_nodes import (Declaration, Assignment, ForStep, Function, If, For, While, Print, Return,
+                       Expression, Comparison, Call, Name, Number, String)
+from codegen import value_type
+from semantic_analyzer import condition_outcome
+from type_system import Type
+
+# Operaciones que se pliegan, con la misma semántica que en ejecución ('/' es división real)
+OPERATIONS = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv,
+              '%': operator.mod}
+
+# Enteros que cada tipo representa en el backend de C (ent: int32_t, lg: int64_t): fuera de
+# ese rango el resultado allí desborda, así que no se reemplaza por un literal
+INTEGER_LIMITS = {Type.ENT: 1 << 31, Type.LG: 1 << 63}
+
+# Un flt solo se escribe si su repr es un NUMERO_VALORES (sin exponente, inf ni nan)
+FLOAT_LITERAL = re.compile(r'\d+\.\d+\Z')
+
+
+def fold_operation(operator_text, left, right):
+    """Valor de `left operator right` como en ejecución, o None si no se debe plegar: las
+    divisiones por cero y las operaciones inválidas con textos quedan para la ejecución"""
+    if type(left) is str or type(right) is str:
+        if operator_text == '+' and type(left) is type(right):
+            return left + right
+        return None
+    if operator_text in ('/', '%') and right == 0:
+        return None
+    try:
+        return OPERATIONS[operator_text](left, right)
+    except OverflowError:
+        return None  # Entero demasiado grande para combinarlo con un flt
+
+
+def literal(value, type_code, line, column):
+    """Nodo literal para un valor constante del tipo indicado, o None si no tiene uno que se
+    lea igual (p. ej. 1e+20 o textos con comillas). Un negativo queda con su signo en el
+    texto; SourceWriter lo escribe como (0 - n) porque no hay literales negativos"""
+    kind = type(value)
+    if type_code == Type.STR:
+        if kind is str and '"' not in value and '\n' not in value:
+            return String(value, line, column)
+        return None
+    if type_code == Type.FLT:
+        if kind is not float or not math.isfinite(value) or math.copysign(1.0, value) < 0 and value == 0:
+            return None
+        text = repr(abs(value))
+        if not FLOAT_LITERAL.match(text):
+            return None
+        return Number(text if value >= 0 else f"-{text}", value, Type.FLT, line, column)
+    limit = INTEGER_LIMITS.get(type_code)
+    if kind is not int or limit is None or not -limit <= value < limit:
+        return None
+    suffix = "l" if type_code == Type.LG else ""
+    return Number(f"{value}{suffix}", value, type_code, line, column)
+
+
+class FoldStats:
+    """Conteos de un plegado de constantes"""
+    __slots__ = ('expressions', 'operations', 'names', 'conditions')
+
+    def __init__(self):
+        self.expressions = 0  # Expresiones reemplazadas (completas o su prefijo constante)
+        self.operations = 0   # Operaciones aritméticas que ya no se ejecutan
+        self.names = 0        # Lecturas de variables reemplazadas por su valor
+        self.conditions = 0   # Comparaciones que quedaron entre dos literales
+
+    def report(self):
+        return "\n".join([
+            "\n=== PROPAGACIÓN DE CONSTANTES ===",
+            f"Expresiones plegadas:        {self.expressions}",
+            f"Operaciones eliminadas:      {self.operations}",
+            f"Variables reemplazadas:      {self.names}",
+            f"Condiciones constantes:      {self.conditions}",
+        ])
+
+
+class ConstantFolder:
+    """Reemplaza en el AST analizado cada expresión de valor conocido por un literal.
+
+    Los valores vienen del análisis semántico, que los calcula por flujo (ver
+    SemanticAnalyzer.visit_if y enter_loop): node.value de un Name es el valor de la
+    variable en ese punto por todos los caminos, así que se puede sustituir. Una cadena
+    con valor desconocido pliega solo su prefijo constante: se evalúa de izquierda a
+    derecha, y reordenarla cambiaría el redondeo de flt o el desborde en C.
+
+    No se pliega lo que fallaría al ejecutar (división por cero, str - str) ni un 0 como
+    divisor, que el analizador rechazaría al compilar el programa emitido."""
+
+    def __init__(self):
+        self.stats = FoldStats()
+
+    def fold(self, program):
+        self.body(program.body)
+        return self.stats
+
+    # Sentencias
+    def body(self, statements):
+        for statement in statements:
+            self.STATEMENT_FOLDERS[type(statement)](self, statement)
+
+    def declaration(self, node):
+        if node.init is not None:
+            node.init = self.expression(node.init)
+
+    def assignment(self, node):
+        node.value = self.expression(node.value)
+
+    def function(self, node):
+        self.body(node.body)
+
+    def if_statement(self, node):
+        self.comparison(node.condition)
+        self.body(node.then_body)
+        self.body(node.else_body)
+
+    def for_loop(self, node):
+        if node.init is not None:
+            self.STATEMENT_FOLDERS[type(node.init)](self, node.init)
+        self.comparison(node.condition)
+        self.assignment(node.step)
+        self.body(node.body)
+
+    def while_loop(self, node):
+        self.comparison(node.condition)
+        self.body(node.body)
+
+    def print_statement(self, node):
+        if node.value is not None:
+            node.value = self.expression(node.value)
+
+    def return_statement(self, node):
+        # rtn f(...) de cola se queda como llamada: solo se pliegan sus argumentos
+        node.value = self.expression(node.value)
+
+    def call_statement(self, node):
+        self.call(node)
+
+    # Expresiones
+    def expression(self, node, divisor=False):
+        """Expresión equivalente a `node` con lo constante plegado (puede ser el mismo nodo)"""
+        kind = type(node)
+        if kind is Number or kind is String:
+            return node
+        if kind is Call:
+            self.call(node)
+            return node
+        if node.value is not None:
+            folded = self.replacement(node, divisor)
+            if folded is not None:
+                if kind is Name:
+                    self.stats.names += 1
+                else:
+                    self.stats.expressions += 1
+                    self.stats.operations += count_operations(node)
+                return folded
+        if kind is Name:
+            return node
+        node.operands = tuple(self.expression(operand, index > 0 and node.operators[index - 1] in ('/', '%'))
+                              for index, operand in enumerate(node.operands))
+        return self.fold_prefix(node, divisor)
+
+    def replacement(self, node, divisor):
+        if divisor and node.value == 0:
+            return None
+        return literal(node.value, value_type(node), node.line, node.column)
+
+    def fold_prefix(self, node, divisor=False):
+        """Pliega los primeros operandos de la cadena mientras sean literales"""
+        operands, operators = node.operands, node.operators
+        value = operands[0].value
+        if type(operands[0]) not in (Number, String) or value is None:
+            return node
+        count = 1
+        for operator_text, operand in zip(operators, operands[1:]):
+            if type(operand) not in (Number, String) or operand.value is None:
+                break
+            result = fold_operation(operator_text, value, operand.value)
+            if result is None:
+                break
+            value = result
+            count += 1
+        if count < 2 or count == len(operands) and divisor and value == 0:
+            return node
+        prefix = Expression(operands[:count], operators[:count - 1], node.line, node.column)
+        folded = literal(value, value_type(prefix), node.line, node.column)
+        if folded is None:
+            return node
+        self.stats.expressions += 1
+        self.stats.operations += count - 1
+        if count == len(operands):
+            return folded
+        node.operands = (folded,) + operands[count:]
+        node.operators = operators[count - 1:]
+        return node
+
+    def comparison(self, node):
+        node.left = self.expression(node.left)
+        node.right = self.expression(node.right)
+        if type(node.left) in (Number, String) and type(node.right) in (Number, String):
+            self.stats.conditions += 1
+
+    def call(self, node):
+        node.args = tuple(self.expression(arg) for arg in node.args)
+
+    STATEMENT_FOLDERS = {
+        Declaration: declaration,
+        Assignment: assignment,
+        ForStep: assignment,
+        Function: function,
+        If: if_statement,
+        For: for_loop,
+        While: while_loop,
+        Print: print_statement,
+        Return: return_statement,
+        Call: call_statement,
+    }
+
+
+def count_operations(node):
+    """Operaciones aritméticas de una expresión, contando las subexpresiones"""
+    if type(node) is not Expression:
+        return 0
+    return len(node.operators) + sum(count_operations(operand) for operand in node.operands)
+
+
+def fold_constants(program):
+    """Propaga y pliega las constantes de un Program analizado (lo modifica); retorna los conteos"""
+    return ConstantFolder().fold(program)
+
+
+# Eliminación de código muerto
+
+# Comparación opuesta: `if (c) {} else {b}` con c siempre falsa queda como `if (no c) {b}`
+NEGATED_OPERATORS = {'<': '>=', '>=': '<', '>': '<=', '<=': '>', '==': '!=', '!=': '=='}
+
+
+def child_nodes(node):
+    """Nodos hijos de una sentencia o expresión, en orden de ejecución"""
+    kind = type(node)
+    if kind is Expression:
+        return node.operands
+    if kind is Call:
+        return node.args
+    if kind is Comparison:
+        return (node.left, node.right)
+    if kind is Declaration:
+        return () if node.init is None else (node.init,)
+    if kind is Assignment or kind is ForStep or kind is Return:
+        return (node.value,)
+    if kind is Print:
+        return () if node.value is None else (node.value,)
+    if kind is If:
+        return (node.condition,) + node.then_body + node.else_body
+    if kind is While:
+        return (node.condition,) + node.body
+    if kind is For:
+        init = () if node.init is None else (node.init,)
+        return init + (node.condition,) + node.body + (node.step,)
+    if kind is Function:
+        return node.body
+    return ()
+
+
+def count_nodes(node):
+    """Nodos del subárbol (sentencias, comparaciones y expresiones)"""
+    count = 0
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        count += 1
+        pending.extend(child_nodes(node))
+    return count
+
+
+def is_pure_expression(node):
+    """Si evaluar la expresión no tiene efectos ni puede fallar: sin llamadas, con divisores
+    constantes distintos de cero y sin operaciones de textos que no sean '+'"""
+    kind = type(node)
+    if kind is Call:
+        return False
+    if kind is not Expression:
+        return True
+    for operator_text, operand in zip(node.operators, node.operands[1:]):
+        if operator_text in ('/', '%') and not operand.value:
+            return False
+    if value_type(node) == Type.STR and any(operator_text != '+' for operator_text in node.operators):
+        return False
+    return all(is_pure_expression(operand) for operand in node.operands)
+
+
+def declares_names(statements):
+    """Si el bloque declara algo en su propio ámbito (no se puede fundir con el de afuera)"""
+    return any(type(statement) is Declaration or type(statement) is Function for statement in statements)
+
+
+def contains_tail_call(statements):
+    """Si queda algún rtn marcado como llamada de cola (quitar ramas puede eliminarlos)"""
+    pending = list(statements)
+    while pending:
+        node = pending.pop()
+        kind = type(node)
+        if kind is Return and node.tail_call:
+            return True
+        if kind is not Function:
+            pending.extend(node for node in child_nodes(node) if isinstance(node, (If, While, For, Return)))
+    return False
+
+
+class Variable:
+    """Variable (o parámetro) resuelta por el eliminador: quién la lee y quién la asigna"""
+    __slots__ = ('declaration', 'function', 'is_global', 'private', 'reads', 'stores', 'step_target')
+
+    def __init__(self, declaration, function, is_global, private):
+        self.declaration = declaration  # Declaration, o None si es un parámetro
+        self.function = function        # Function que la declara (None en el programa principal)
+        self.is_global = is_global      # Declarada en el ámbito global (no en un bloque)
+        self.private = private          # Solo la ve su función: las llamadas no la leen
+        self.reads = 0
+        self.stores = []                # Assignment que la modifican
+        self.step_target = False        # La modifica el paso de un for
+
+
+class DeadCodeStats:
+    """Conteos de una eliminación de código muerto"""
+    __slots__ = ('unreachable', 'branches', 'declarations', 'stores', 'nodes_before', 'nodes_after')
+
+    def __init__(self):
+        self.unreachable = 0   # Sentencias después de un rtn (o de un ciclo que no termina)
+        self.branches = 0      # if y ciclos con condición constante simplificados
+        self.declarations = 0  # Declaraciones sin uso (con sus asignaciones)
+        self.stores = 0        # Asignaciones (o inicializaciones) sobrescritas antes de leerse
+        self.nodes_before = 0
+        self.nodes_after = 0
+
+    def report(self):
+        removed = self.nodes_before - self.nodes_after
+        return "\n".join([
+            "\n=== CÓDIGO MUERTO ===",
+            f"Sentencias inalcanzables:    {self.unreachable}",
+            f"Ramas constantes:            {self.branches}",
+            f"Declaraciones sin uso:       {self.declarations}",
+            f"Asignaciones muertas:        {self.stores}",
+            f"Nodos del AST:               {self.nodes_before} -> {self.nodes_after} ({removed} eliminados)",
+        ])
+
+
+class DeadCodeEliminator:
+    """Quita del AST analizado lo que no cambia la salida del programa:
+
+    - las sentencias después de un rtn, o de un if cuyas ramas tomables terminan todas;
+    - las ramas de if con condición constante y los ciclos que nunca entran (las
+      condiciones usan los valores por flujo del analizador, o los literales del plegado);
+    - las declaraciones locales que nunca se leen, si ni su inicialización ni sus
+      asignaciones tienen efectos;
+    - las asignaciones sin efectos sobrescritas (o que salen de su función) antes de leerse.
+
+    Cada ronda resuelve los nombres y luego reescribe; se repite mientras quite algo,
+    porque quitar una lectura puede dejar sin uso otra variable."""
+
+    def __init__(self):
+        self.stats = DeadCodeStats()
+        self.scopes = None
+        self.function = None
+        self.variables = {}     # Declaration o Assignment -> Variable
+        self.name_targets = {}  # Name o Print -> Variable(s) que lee
+        self.private = {}       # Function -> sus variables privadas
+        self.dead = set()       # Declarations y Assignments de variables sin uso
+        self.changed = False
+
+    def eliminate(self, program):
+        self.stats.nodes_before = sum(count_nodes(statement) for statement in program.body)
+        self.changed = True
+        while self.changed:
+            self.changed = False
+            self.resolve(program)
+            program.body = self.body(program.body, None)
+        self.stats.nodes_after = sum(count_nodes(statement) for statement in program.body)
+        return self.stats
+
+    # Resolución de nombres (las mismas reglas de ámbito que SlotResolver)
+    def resolve(self, program):
+        self.scopes = [{}]
+        self.function = None
+        self.variables = {}
+        self.name_targets = {}
+        self.private = {}
+        self.resolve_body(program.body)
+        self.dead = set()
+        for variable in set(self.variables.values()):
+            declaration = variable.declaration
+            if (declaration is not None and not variable.is_global and not variable.reads
+                    and not variable.step_target and not declaration.reads_input
+                    and (declaration.init is None or is_pure_expression(declaration.init))
+                    and all(is_pure_expression(store.value) for store in variable.stores)):
+                self.dead.add(declaration)
+                self.dead.update(variable.stores)
+
+    def lookup(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def resolve_body(self, statements):
+        for statement in statements:
+            self.RESOLVERS[type(statement)](self, statement)
+
+    def declare(self, declaration, name):
+        function = self.function
+        variable = Variable(declaration, function, len(self.scopes) == 1,
+                            function is not None and function in self.private)
+        if variable.private:
+            self.private[function].append(variable)
+        self.scopes[-1][name] = variable
+        return variable
+
+    def resolve_declaration(self, node):
+        if node.init is not None:
+            self.resolve_expression(node.init)
+        self.variables[node] = self.declare(node, node.name)
+
+    def resolve_assignment(self, node):
+        self.resolve_expression(node.value)
+        variable = self.lookup(node.name)
+        if variable is not None:
+            self.variables[node] = variable
+            if type(node) is ForStep:
+                variable.step_target = True
+            else:
+                variable.stores.append(node)
+
+    def resolve_function(self, node):
+        self.scopes[-1][node.name] = None  # Oculta una variable de afuera con el mismo nombre
+        function = self.function
+        self.function = node
+        # Sin funciones anidadas, nadie más puede leer sus variables
+        if not any(type(child) is Function for child in iter_statements(node.body)):
+            self.private[node] = []
+        self.scopes.append({})
+        for name, _ in node.params:
+            self.declare(None, name)
+        self.resolve_body(node.body)
+        self.scopes.pop()
+        self.function = function
+
+    def resolve_if(self, node):
+        self.scopes.append({})
+        self.resolve_comparison(node.condition)
+        self.resolve_body(node.then_body)
+        self.resolve_body(node.else_body)
+        self.scopes.pop()
+
+    def resolve_for(self, node):
+        self.scopes.append({})
+        if node.init is not None:
+            self.RESOLVERS[type(node.init)](self, node.init)
+        self.resolve_comparison(node.condition)
+        self.resolve_body(node.body)
+        self.resolve_assignment(node.step)
+        self.scopes.pop()
+
+    def resolve_while(self, node):
+        self.scopes.append({})
+        self.resolve_comparison(node.condition)
+        self.resolve_body(node.body)
+        self.scopes.pop()
+
+    def resolve_print(self, node):
+        if node.value is not None:
+            self.resolve_expression(node.value)
+        variables = []
+        for name in node.names:
+            variable = self.lookup(name)
+            if variable is not None:
+                variable.reads += 1
+                variables.append(variable)
+        self.name_targets[node] = variables
+
+    def resolve_return(self, node):
+        self.resolve_expression(node.value)
+
+    def resolve_comparison(self, node):
+        self.resolve_expression(node.left)
+        self.resolve_expression(node.right)
+
+    def resolve_expression(self, node):
+        kind = type(node)
+        if kind is Name:
+            variable = self.lookup(node.name)
+            if variable is not None:
+                variable.reads += 1
+                self.name_targets[node] = variable
+        elif kind is Expression or kind is Call:
+            for child in child_nodes(node):
+                self.resolve_expression(child)
+
+    RESOLVERS = {
+        Declaration: resolve_declaration,
+        Assignment: resolve_assignment,
+        ForStep: resolve_assignment,
+        Function: resolve_function,
+        If: resolve_if,
+        For: resolve_for,
+        While: resolve_while,
+        Print: resolve_print,
+        Return: resolve_return,
+        Call: resolve_expression,
+    }
+
+    # Reescritura
+    def removed(self, counter):
+        setattr(self.stats, counter, getattr(self.stats, counter) + 1)
+        self.changed = True
+
+    def removed_definition(self, node):
+        self.removed('declarations' if type(node) is Declaration else 'stores')
+
+    def body(self, statements, function, function_body=False):
+        """Bloque sin sentencias muertas; function es la Function que lo contiene"""
+        result = []
+        for index, statement in enumerate(statements):
+            result.extend(self.statement(statement, function))
+            if result and self.terminates(result[-1]):
+                if index + 1 < len(statements):
+                    self.stats.unreachable += len(statements) - index - 1
+                    self.changed = True
+                break
+        self.remove_dead_stores(result, function, function_body)
+        return tuple(result)
+
+    def statement(self, node, function):
+        """Sentencias que reemplazan a `node` (ninguna si está muerta)"""
+        if node in self.dead:
+            self.removed_definition(node)
+            return ()
+        kind = type(node)
+        if kind is Function:
+            node.body = self.body(node.body, node, True)
+            node.has_tail_call = node.return_type is not None and contains_tail_call(node.body)
+        elif kind is If:
+            return self.if_statement(node, function)
+        elif kind is While:
+            if condition_outcome(node.condition) is False:
+                self.removed('branches')
+                return ()
+            node.body = self.body(node.body, function)
+        elif kind is For:
+            return self.for_loop(node, function)
+        return (node,)
+
+    def if_statement(self, node, function):
+        taken = condition_outcome(node.condition)
+        node.then_body = self.body(node.then_body, function)
+        node.else_body = self.body(node.else_body, function)
+        # Con un solo ámbito para ambas ramas, el else puede usar lo que declara el then
+        if taken is None or taken is False and declares_names(node.then_body):
+            return (node,)
+        if taken and not node.else_body and declares_names(node.then_body):
+            return (node,)  # Ya simplificado: queda como bloque con su propio ámbito
+        self.removed('branches')
+        kept = node.then_body if taken else node.else_body
+        # La rama que queda se funde con el bloque de afuera si no declara nada en el suyo
+        if not declares_names(kept):
+            return kept
+        if not taken:
+            node.condition.operator = NEGATED_OPERATORS[node.condition.operator]
+        node.then_body, node.else_body = kept, ()
+        return (node,)
+
+    def for_loop(self, node, function):
+        if node.init is not None and node.init in self.dead:
+            self.removed_definition(node.init)
+            node.init = None
+        if condition_outcome(node.condition) is not False:
+            node.body = self.body(node.body, function)
+            return (node,)
+        # El cuerpo nunca se ejecuta: queda solo la inicialización, si tiene efectos
+        init = node.init
+        if init is None or type(init) is Declaration and not init.reads_input and (
+                init.init is None or is_pure_expression(init.init)):
+            self.removed('branches')
+            return ()
+        if type(init) is Assignment:
+            self.removed('branches')
+            return (init,)
+        node.body = self.body(node.body, function)
+        return (node,)
+
+    @staticmethod
+    def terminates(node):
+        """Si después de la sentencia no se ejecuta nada más del bloque"""
+        kind = type(node)
+        if kind is Return:
+            return True
+        if kind is If:
+            taken = condition_outcome(node.condition)
+            then_ends = any(DeadCodeEliminator.terminates(s) for s in node.then_body)
+            else_ends = any(DeadCodeEliminator.terminates(s) for s in node.else_body)
+            if taken is None:
+                return then_ends and else_ends
+            return then_ends if taken else else_ends
+        if kind is While or kind is For:
+            # Sin break, un ciclo con condición siempre verdadera solo sale con rtn
+            return condition_outcome(node.condition) is True
+        return False
+
+    # Asignaciones muertas: se recorre el bloque hacia atrás llevando las variables que se
+    # sobrescriben (o dejan de existir) antes de volver a leerse
+    def remove_dead_stores(self, statements, function, function_body):
+        private = self.private.get(function, ())
+        overwritten = set(private) if function_body else set()
+        for index in range(len(statements) - 1, -1, -1):
+            node = statements[index]
+            kind = type(node)
+            if kind is Assignment:
+                variable = self.variables.get(node)
+                if variable in overwritten and is_pure_expression(node.value):
+                    del statements[index]
+                    self.removed('stores')
+                    continue
+                if variable is not None:
+                    overwritten.add(variable)
+                self.forget_reads(node, overwritten)  # Después: a = a + 1 lee el valor anterior
+            elif kind is Declaration:
+                variable = self.variables.get(node)
+                if (node.init is not None and variable in overwritten and not node.reads_input
+                        and is_pure_expression(node.init)):
+                    node.init = None
+                    self.removed('stores')
+                overwritten.discard(variable)
+                self.forget_reads(node, overwritten)
+            elif kind is Return:
+                overwritten = set(private)
+                self.forget_reads(node, overwritten)
+            elif kind is not Function:
+                self.forget_reads(node, overwritten)
+
+    def forget_reads(self, node, overwritten):
+        """Quita de overwritten lo que lee la sentencia; una llamada puede leer cualquier
+        variable que no sea privada de su función"""
+        if not overwritten:
+            return
+        pending = [node]
+        while pending:
+            node = pending.pop()
+            kind = type(node)
+            if kind is Function:
+                continue  # Su cuerpo no se ejecuta al declararla
+            if kind is Name or kind is Print:
+                targets = self.name_targets.get(node)
+                if type(targets) is list:
+                    overwritten.difference_update(targets)
+                elif targets is not None:
+                    overwritten.discard(targets)
+            elif kind is Call:
+                for variable in [variable for variable in overwritten if not variable.private]:
+                    overwritten.discard(variable)
+            pending.extend(child_nodes(node))
+
+
+def iter_statements(statements):
+    """Todas las sentencias de los bloques, incluidas las de bloques y funciones anidados"""
+    pending = list(statements)
+    while pending:
+        node = pending.pop()
+        yield node
+        kind = type(node)
+        if kind is If:
+            pending.extend(node.then_body)
+            pending.extend(node.else_body)
+        elif kind is While or kind is For or kind is Function:
+            pending.extend(node.body)
+
+
+def eliminate_dead_code(program):
+    """Quita el código muerto de un Program analizado (lo modifica); retorna los conteos"""
+    return DeadCodeEliminator().eliminate(program)
@@ -0,0 +1,93 @@
+import json
+import time
+import cProfile
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+class PhaseProfiler:
+    """Mide tiempo real, tiempo de CPU y memoria máxima (tracemalloc) de cada fase.
+
+    Con `dump_path` cada fase se ejecuta además bajo su propio cProfile y al final se
+    guardan solo las estadísticas de la fase más lenta (en ese caso los tiempos
+    incluyen la sobrecarga de cProfile)."""
+
+    def __init__(self, dump_path=None):
+        self.dump_path = dump_path
+        self.phases = {}
+        self.counts = {}
+        self.profiles = {}
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name):
+        profile = cProfile.Profile() if self.dump_path else None
+        tracemalloc.reset_peak()
+        memory_start = tracemalloc.get_traced_memory()[0]
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profile:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+                self.profiles[name] = profile
+            cpu = time.process_time() - cpu_start
+            wall = time.perf_counter() - wall_start
+            current, peak = tracemalloc.get_traced_memory()
+            self.phases[name] = {
+                'wall_ms': round(wall * 1000, 3),
+                'cpu_ms': round(cpu * 1000, 3),
+                'peak_memory_bytes': peak,
+                'allocated_bytes': current - memory_start,
+            }
+
+    def count(self, name, value):
+        self.counts[name] = value
+
+    def slowest_phase(self):
+        if not self.phases:
+            return None
+        return max(self.phases, key=lambda name: self.phases[name]['wall_ms'])
+
+    def finish(self, **fields):
+        """Detiene tracemalloc, guarda el cProfile de la fase más lenta y retorna el informe"""
+        tracemalloc.stop()
+        slowest = self.slowest_phase()
+        dumped = None
+        if self.dump_path and slowest in self.profiles:
+            self.profiles[slowest].dump_stats(self.dump_path)
+            dumped = self.dump_path
+        report = dict(fields)
+        report.update(self.counts)
+        report['phases'] = self.phases
+        report['slowest_phase'] = slowest
+        report['cprofile_dump'] = dumped
+        return report
+
+    @staticmethod
+    def to_json(report):
+        return json.dumps(report, indent=2, ensure_ascii=False)
+
+
+def profile_phase(profiler, name):
+    """Contexto de medición de una fase, o uno vacío si no se está perfilando"""
+    return profiler.phase(name) if profiler is not None else nullcontext()
+
+
+def count_tree_nodes(tree):
+    """Cantidad de nodos (reglas y terminales) de un árbol de ANTLR, sin recursión"""
+    count = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        count += 1
+        children = getattr(node, 'children', None)
+        if children:
+            stack.extend(children)
+    return count
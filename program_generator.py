@@ -0,0 +1,197 @@
+import sys
+import random
+
+# Cada valor guardado se reduce módulo este primo: al ejecutar el programa las variables no
+# crecen sin límite dentro de los ciclos anidados
+VALUE_BOUND = 9973
+
+
+class ProgramGenerator:
+    """Genera programas MiLenguaje válidos (léxica, sintáctica y semánticamente).
+
+    Parámetros:
+      functions          funciones con retorno definidas al inicio (más una sin retorno)
+      nesting            profundidad máxima de if/while/for anidados
+      expression_length  número de términos por expresión aritmética
+      string_density     probabilidad (0-1) de que una sentencia use cadenas o clg con $
+
+    Los ciclos siempre terminan (contadores con límite literal que el cuerpo nunca
+    reasigna), los valores guardados se reducen módulo VALUE_BOUND y no hay divisiones,
+    así que los programas también sirven para medir y comparar la ejecución."""
+
+    def __init__(self, functions=5, nesting=2, expression_length=4, string_density=0.1, seed=0):
+        self.functions = max(1, functions)
+        self.nesting = nesting
+        self.expression_length = max(1, expression_length)
+        self.string_density = string_density
+        self.rng = random.Random(seed)
+        self.counter = 0
+        self.scopes = [[]]  # Variables enteras visibles por ámbito
+        self.counters = set()  # Contadores de ciclos: se leen pero nunca se reasignan
+        self.function_names = []
+
+    def new_name(self, prefix):
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def visible(self):
+        return [name for scope in self.scopes for name in scope]
+
+    # Expresiones
+    def term(self, depth=0):
+        choice = self.rng.random()
+        names = self.visible()
+        if names and choice < 0.45:
+            return self.rng.choice(names)
+        if self.function_names and depth == 0 and choice < 0.55:
+            function = self.rng.choice(self.function_names)
+            return f"{function}({self.expression(2, depth + 1)}, {self.expression(1, depth + 1)})"
+        if depth == 0 and choice < 0.62:
+            return f"({self.expression(2, depth + 1)})"
+        return str(self.rng.randint(0, 99))
+
+    def expression(self, length=None, depth=0):
+        length = length or self.rng.randint(1, self.expression_length)
+        parts = [self.term(depth)]
+        for _ in range(length - 1):
+            op = self.rng.choice("+-*+-")
+            parts.append(op)
+            # El módulo solo con un literal distinto de cero
+            parts.append(self.term(depth) if self.rng.random() < 0.9 else "3 % 2")
+        return " ".join(parts)
+
+    def condition(self):
+        op = self.rng.choice(["<", ">", "<=", ">=", "==", "!="])
+        return f"{self.expression(2)} {op} {self.expression(2)}"
+
+    # Sentencias
+    def statement(self, indent, depth):
+        pad = "    " * indent
+        roll = self.rng.random()
+        names = self.visible()
+
+        if roll < self.string_density:
+            if names and self.rng.random() < 0.5:
+                text = self.rng.choice(["valor", "total", "resultado"])
+                ids = " $ ".join(self.rng.choice(names) for _ in range(self.rng.randint(1, 3)))
+                return f'{pad}clg("{text}" $ {ids});'
+            name = self.new_name("s")
+            return f'{pad}str {name} = "texto {self.counter}";'
+
+        if depth < self.nesting and roll < self.string_density + 0.2:
+            return self.compound(indent, depth)
+
+        targets = [name for name in names if name not in self.counters]
+        if targets and roll < 0.5:
+            return f"{pad}{self.rng.choice(targets)} = {self.expression()} % {VALUE_BOUND};"
+
+        if self.function_names and roll < 0.55:
+            return f"{pad}{self.rng.choice(self.function_names)}({self.expression(1)}, {self.expression(1)});"
+
+        name = self.new_name("v")
+        line = f"{pad}ent {name} = {self.expression()} % {VALUE_BOUND};"
+        self.scopes[-1].append(name)
+        return line
+
+    def block(self, indent, depth, count):
+        self.scopes.append([])
+        lines = [self.statement(indent, depth) for _ in range(count)]
+        self.scopes.pop()
+        return lines
+
+    def compound(self, indent, depth):
+        pad = "    " * indent
+        kind = self.rng.choice(["if", "while", "for"])
+        count = self.rng.randint(1, 3)
+        if kind == "if":
+            lines = [f"{pad}if ({self.condition()}) {{"]
+            lines += self.block(indent + 1, depth + 1, count)
+            lines.append(f"{pad}}} else {{")
+            lines += self.block(indent + 1, depth + 1, count)
+        elif kind == "while":
+            counter = self.new_name("w")
+            self.counters.add(counter)
+            self.scopes[-1].append(counter)
+            lines = [f"{pad}ent {counter} = 0;", f"{pad}while ({counter} < {self.rng.randint(1, 5)}) {{"]
+            lines += self.block(indent + 1, depth + 1, count)
+            lines.append(f"{pad}    {counter} = {counter} + 1;")
+        else:
+            counter = self.new_name("i")
+            self.counters.add(counter)
+            lines = [f"{pad}for (ent {counter} = 0; {counter} < {self.rng.randint(1, 5)}; {counter} = {counter} + 1) {{"]
+            self.scopes.append([counter])
+            lines += self.block(indent + 1, depth + 1, count)
+            self.scopes.pop()
+        lines.append(f"{pad}}}")
+        return "\n".join(lines)
+
+    def function(self):
+        name = self.new_name("f")
+        self.scopes.append(["a", "b"])
+        lines = [f"fct {name}(ent a, ent b) : ent {{"]
+        lines += [self.statement(1, self.nesting) for _ in range(self.rng.randint(1, 3))]
+        lines.append(f"    rtn {self.expression()} % {VALUE_BOUND};")
+        lines.append("}")
+        self.scopes.pop()
+        self.function_names.append(name)
+        return "\n".join(lines)
+
+    def header(self):
+        lines = [self.function() for _ in range(self.functions)]
+        lines.append("fct mostrar(ent a) {\n    clg(\"mostrar\" $ a);\n}")
+        return lines
+
+    def generate(self, statements):
+        """Programa completo con `statements` sentencias de nivel superior"""
+        lines = self.header()
+        lines += [self.statement(0, 0) for _ in range(statements)]
+        return "\n".join(lines) + "\n"
+
+    def write(self, out, target_bytes):
+        """Escribe sentencias en `out` hasta alcanzar aproximadamente `target_bytes`"""
+        written = 0
+        for line in self.header():
+            out.write(line + "\n")
+            written += len(line) + 1
+        while written < target_bytes:
+            line = self.statement(0, 0) + "\n"
+            out.write(line)
+            written += len(line)
+        return written
+
+
+def parse_size(text):
+    """Convierte tamaños como 1KB, 10MB o 512 a bytes"""
+    text = text.upper().strip()
+    for suffix, factor in (("KB", 1024), ("MB", 1024 * 1024), ("GB", 1024 ** 3), ("B", 1)):
+        if text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(text)
+
+
+def main():
+    """Uso: python program_generator.py TAMAÑO [salida.txt] [--functions=N] [--nesting=N]
+    [--expression-length=N] [--string-density=F] [--seed=N]"""
+    options = {}
+    positional = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--') and '=' in arg:
+            key, value = arg[2:].split('=', 1)
+            options[key.replace('-', '_')] = float(value) if key == 'string-density' else int(value)
+        else:
+            positional.append(arg)
+    if not positional:
+        print(main.__doc__)
+        return
+
+    generator = ProgramGenerator(**options)
+    size = parse_size(positional[0])
+    if len(positional) > 1:
+        with open(positional[1], 'w', encoding='utf-8') as out:
+            generator.write(out, size)
+    else:
+        generator.write(sys.stdout, size)
+
+
+if __name__ == "__main__":
+    main()
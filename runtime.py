@@ -0,0 +1,258 @@
+import os
+import sys
+import math
+import codecs
+from collections import OrderedDict
+from type_system import Type
+
+
+class MiRuntimeError(Exception):
+    """Error durante la ejecución de un programa MiLenguaje"""
+    def __init__(self, message, line=None):
+        self.message = message
+        self.line = line
+        super().__init__(message)
+
+    def __str__(self):
+        if self.line:
+            return f"Error de ejecución en línea {self.line}: {self.message}"
+        return f"Error de ejecución: {self.message}"
+
+
+# Mensaje para operaciones que el analizador acepta pero los valores no soportan (p. ej. str - str)
+INVALID_OPERATION = "Operación no válida para los operandos"
+
+# Valor inicial de una variable declarada sin inicialización
+DEFAULT_VALUES = {Type.ENT: 0, Type.LG: 0, Type.FLT: 0.0, Type.STR: ""}
+
+# Conversión al tipo declarado al guardar un valor (variables, parámetros y retornos)
+CONVERTERS = {Type.ENT: int, Type.LG: int, Type.FLT: float, Type.STR: str}
+
+
+def convert(value, type_code):
+    return CONVERTERS[type_code](value)
+
+
+def format_value(value):
+    """Texto que imprime clg para un valor"""
+    return str(value)
+
+
+def divide(left, right, line):
+    if right == 0:
+        raise MiRuntimeError("División por cero", line)
+    return left / right
+
+
+def modulo(left, right, line):
+    if right == 0:
+        raise MiRuntimeError("Módulo por cero", line)
+    return left % right
+
+
+# Resultados guardados por cada función pura al memorizar (ver MemoCache)
+DEFAULT_MEMO_SIZE = 4096
+
+# Marca de "no está en el caché" (None no sirve: no es un valor de MiLenguaje pero sí de Python)
+MISSING = object()
+
+
+def signed_key(key):
+    """Clave con el signo de cada flt: -0.0 == 0.0 (y tienen el mismo hash), pero la
+    función puede dar resultados que se escriben distinto para cada uno"""
+    return key + tuple([math.copysign(1.0, arg) for arg in key if type(arg) is float])
+
+
+class MemoCache:
+    """Caché LRU acotado de los resultados de una función pura, indexado por la tupla de
+    argumentos. Está en Python a propósito: un envoltorio en C como functools.lru_cache
+    haría que cada llamada recursiva consuma pila de C además de marcos de Python."""
+    __slots__ = ('name', 'maxsize', 'entries', 'hits', 'misses')
+
+    def __init__(self, name, maxsize=DEFAULT_MEMO_SIZE):
+        self.name = name
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key):
+        """Resultado guardado para `key` (y lo marca como reciente), o MISSING"""
+        if 0.0 in key:
+            key = signed_key(key)
+        entries = self.entries
+        value = entries.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            entries.move_to_end(key)
+        return value
+
+    def store(self, key, value):
+        if 0.0 in key:
+            key = signed_key(key)
+        entries = self.entries
+        entries[key] = value
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = 0
+
+
+class MemoTable:
+    """Cachés de las funciones puras de un programa en ejecución"""
+
+    def __init__(self, maxsize=DEFAULT_MEMO_SIZE):
+        self.maxsize = maxsize
+        self.caches = []
+
+    def cache(self, name):
+        cache = MemoCache(name, self.maxsize)
+        self.caches.append(cache)
+        return cache
+
+    def wrap(self, function, name):
+        """Versión memorizada de una función de Python con argumentos posicionales"""
+        cache = self.cache(name)
+        lookup, store = cache.lookup, cache.store
+
+        def memoized(*args):
+            value = lookup(args)
+            if value is MISSING:
+                value = function(*args)
+                store(args, value)
+            return value
+        return memoized
+
+    def clear(self):
+        for cache in self.caches:
+            cache.clear()
+
+    def report(self):
+        """Tabla de aciertos por función memorizada"""
+        lines = ["\n=== MEMORIZACIÓN ===",
+                 "FUNCIÓN".ljust(20) + "LLAMADAS".rjust(12) + "ACIERTOS".rjust(12) + "TASA".rjust(8)
+                 + "GUARDADOS".rjust(11),
+                 "-" * 63]
+        for cache in self.caches:
+            calls = cache.hits + cache.misses
+            rate = cache.hits / calls if calls else 0.0
+            lines.append(cache.name.ljust(20) + str(calls).rjust(12) + str(cache.hits).rjust(12)
+                         + f"{rate:.1%}".rjust(8) + str(len(cache.entries)).rjust(11))
+        if not self.caches:
+            lines.append("(sin funciones puras)")
+        return "\n".join(lines)
+
+
+# Bytes de salida que se acumulan antes de escribir y tamaño de cada lectura de la entrada
+OUTPUT_BUFFER_SIZE = 1 << 16
+INPUT_CHUNK_SIZE = 1 << 16
+
+
+class ProgramIO:
+    """Entrada y salida de un programa en ejecución: clg escribe líneas, scn las lee.
+
+    La salida se acumula y se escribe de una vez al llenarse el buffer, antes de leer una
+    entrada que no esté ya en memoria (para que se vean las preguntas) y al terminar con
+    flush(); con flush_lines se escribe cada línea. La entrada se lee por bloques y scn()
+    toma una línea del bloque. Si stdin es un archivo del sistema se lee con os.read, que
+    retorna lo disponible (una línea en una terminal) sin esperar a llenar el bloque."""
+
+    def __init__(self, stdin=None, stdout=None, flush_lines=False, buffer_size=OUTPUT_BUFFER_SIZE):
+        self.stdin = stdin or sys.stdin
+        self.stdout = stdout or sys.stdout
+        self.flush_lines = flush_lines
+        self.buffer_size = buffer_size
+        self.pending = []       # Líneas de salida aún no escritas
+        self.pending_size = 0
+        self.input = ""         # Bloque de entrada leído y posición de la próxima línea
+        self.input_pos = 0
+        self.input_parts = []   # Resto ya revisado de bloques anteriores (línea sin terminar)
+        self.input_done = False
+        self.input_fd = None
+        self.decoder = None
+        try:
+            if self.stdin is sys.__stdin__:
+                self.input_fd = self.stdin.fileno()
+                self.decoder = codecs.getincrementaldecoder(self.stdin.encoding or 'utf-8')()
+        except (AttributeError, OSError, ValueError):
+            self.input_fd = None
+
+    def write_line(self, text):
+        self.pending.append(text)
+        self.pending_size += len(text) + 1
+        if self.flush_lines or self.pending_size >= self.buffer_size:
+            self.flush()
+
+    def read_chunk(self):
+        """Siguiente bloque de la entrada ("" al terminar)"""
+        if self.input_fd is not None:
+            while True:
+                data = os.read(self.input_fd, INPUT_CHUNK_SIZE)
+                text = self.decoder.decode(data, final=not data)
+                # Un bloque con solo parte de un carácter no es el fin de la entrada
+                if text or not data:
+                    return text
+        return self.stdin.read(INPUT_CHUNK_SIZE)
+
+    def read_line(self):
+        while True:
+            end = self.input.find("\n", self.input_pos)
+            if end >= 0:
+                line = self.input[self.input_pos:end]
+                self.input_pos = end + 1
+                if self.input_parts:
+                    self.input_parts.append(line)
+                    line = "".join(self.input_parts)
+                    self.input_parts = []
+                # Como la lectura en modo texto: "\r\n" es fin de línea aunque el par quede
+                # partido entre dos bloques de os.read
+                if self.input_fd is not None and line.endswith("\r"):
+                    line = line[:-1]
+                return line
+            # Guardar el resto del bloque para no volver a revisarlo ni copiarlo en cada lectura
+            if self.input_pos < len(self.input):
+                self.input_parts.append(self.input[self.input_pos:])
+            self.input, self.input_pos = "", 0
+            if self.input_done:
+                line = "".join(self.input_parts)
+                self.input_parts = []
+                return line
+            if self.pending:
+                self.flush()
+            chunk = self.read_chunk()
+            self.input = chunk
+            self.input_done = not chunk
+
+    def read_rest(self):
+        """Toda la entrada que queda sin leer (para pasarla a otro proceso)"""
+        rest = self.input_parts + [self.input[self.input_pos:]]
+        while not self.input_done:
+            chunk = self.read_chunk()
+            rest.append(chunk)
+            self.input_done = not chunk
+        self.input, self.input_pos, self.input_parts = "", 0, []
+        text = "".join(rest)
+        return text.replace("\r\n", "\n") if self.input_fd is not None and "\r" in text else text
+
+    def read_value(self, type_code, line=None):
+        """Lee una línea para scn() y la convierte al tipo de la variable"""
+        type_code = Type(type_code)
+        text = self.read_line()
+        if type_code == Type.STR:
+            return text
+        try:
+            return CONVERTERS[type_code](text.strip())
+        except ValueError:
+            raise MiRuntimeError(f"Entrada inválida para '{type_code}': {text!r}", line)
+
+    def flush(self):
+        if self.pending:
+            self.pending.append("")
+            self.stdout.write("\n".join(self.pending))
+            self.pending = []
+            self.pending_size = 0
+        self.stdout.flush()
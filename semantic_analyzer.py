@@ -1,628 +1,674 @@
-from antlr4 import *
-from MiLenguajeListener import MiLenguajeListener
-from MiLenguajeParser import MiLenguajeParser
-from symbol_table import SymbolTable, SemanticError
+from ast_nodes import (Declaration, Assignment, ForStep, Function, If, For, While, Print, Return,
+                       Expression, Comparison, Call, Name, Number, String)
+from symbol_table import ScopedSymbolTable, SemanticError
+from type_system import Type, RESULT_TYPES, COMPARABLE, COMPARISON_OPERATORS
 
+# Valor de un símbolo en un camino que no llega a un punto (p. ej. tras un rtn)
+UNREACHED = object()
 
-class SemanticAnalyzer(MiLenguajeListener):
-    def __init__(self):
-        self.symbol_table = SymbolTable()
+
+def join_values(left, right):
+    """Valor de una variable donde se unen dos caminos: solo se conoce si es el mismo en ambos"""
+    return left if type(left) is type(right) and left == right else None
+
+
+def condition_outcome(node):
+    """Resultado de una comparación con operandos de valor conocido, o None"""
+    left, right = node.left.value, node.right.value
+    if left is None or right is None:
+        return None
+    try:
+        return COMPARISON_OPERATORS[node.operator](left, right)
+    except TypeError:
+        return None  # Tipos incomparables: ya se reportó el error
+
+
+def assigned_names(statements, functions=False):
+    """Nombres asignados en las sentencias y sus bloques anidados (asignaciones y pasos de
+    for), sin entrar a las funciones declaradas ahí: su cuerpo no se ejecuta en ese punto.
+    Con functions se incluyen también los que asignan esas funciones"""
+    names = set()
+    pending = list(statements)
+    while pending:
+        node = pending.pop()
+        kind = type(node)
+        if kind is Assignment or kind is ForStep:
+            names.add(node.name)
+        elif kind is Function:
+            if functions:
+                pending.extend(node.body)
+        elif kind is If:
+            pending.extend(node.then_body)
+            pending.extend(node.else_body)
+        elif kind is While:
+            pending.extend(node.body)
+        elif kind is For:
+            if node.init is not None:
+                pending.append(node.init)
+            pending.append(node.step)
+            pending.extend(node.body)
+    return names
+
+
+def calls_functions(nodes):
+    """Si las sentencias o expresiones llaman a alguna función (sin entrar a las funciones
+    declaradas ahí)"""
+    pending = list(nodes)
+    while pending:
+        node = pending.pop()
+        kind = type(node)
+        if kind is Call:
+            return True
+        if kind is Expression:
+            pending.extend(node.operands)
+        elif kind is Comparison:
+            pending.append(node.left)
+            pending.append(node.right)
+        elif kind is Declaration:
+            if node.init is not None:
+                pending.append(node.init)
+        elif kind is Print:
+            if node.value is not None:
+                pending.append(node.value)
+        elif kind is Assignment or kind is ForStep or kind is Return:
+            pending.append(node.value)
+        elif kind is If:
+            pending.append(node.condition)
+            pending.extend(node.then_body)
+            pending.extend(node.else_body)
+        elif kind is While:
+            pending.append(node.condition)
+            pending.extend(node.body)
+        elif kind is For:
+            if node.init is not None:
+                pending.append(node.init)
+            pending.append(node.condition)
+            pending.append(node.step)
+            pending.extend(node.body)
+    return False
+
+
+class FunctionContext:
+    """Función en análisis: dónde empieza su ámbito y a qué funciones llama (para la pureza)"""
+    __slots__ = ('node', 'scope_depth', 'callees')
+
+    def __init__(self, node, scope_depth):
+        self.node = node
+        self.scope_depth = scope_depth  # Primer ámbito propio (parámetros)
+        self.callees = set()             # Nodos Function llamados desde el cuerpo
+
+
+class SemanticAnalyzer:
+    """Análisis semántico sobre el AST compacto generado por lowering.lower_program"""
+
+    def __init__(self, keep_history=True):
+        # keep_history=False descarta los ámbitos cerrados (sin reporte de símbolos)
+        self.symbol_table = ScopedSymbolTable(keep_history)
         self.errors = []
         self.current_function_type = None  # Para verificar el tipo de retorno
         self.has_return = False  # Para verificar si una función tiene retorno
-
-    def get_param_type(self, tipo_ctx):
-        """Obtiene el tipo de un parámetro a partir de su contexto"""
-        if tipo_ctx.kwEnt():
-            return "ent"
-        elif tipo_ctx.kwFlt():
-            return "flt"
-        elif tipo_ctx.kwLg():
-            return "lg"
-        elif tipo_ctx.kwStr():
-            return "str"
-        return None
+        self.function_contexts = []  # Pila de funciones abiertas (la más interna al final)
+        self.function_nodes = {}     # Symbol de cada función -> su nodo Function
+        self.call_graph = []         # FunctionContext de todas las funciones analizadas
+        # Flujo de valores constantes (ver visit_if y enter_loop)
+        self.unreachable = False     # El camino actual ya terminó con un rtn
+        self.escaped = set()         # Símbolos que alguna función asigna fuera de su ámbito
+        self.exit_values = {}        # Símbolo -> valor unido de los rtn que salen de su ámbito
 
     def get_errors(self):
         return self.errors
 
-    def add_error(self, ctx, message):
-        line = ctx.start.line
-        column = ctx.start.column
-        self.errors.append(SemanticError(message, line, column))
+    def add_error(self, node, message):
+        self.errors.append(SemanticError(message, node.line, node.column))
 
     def get_type_compatibility(self, type1, type2):
-        """Verifica la compatibilidad de tipos para operaciones."""
-        # Si ambos tipos son el mismo, son compatibles
-        if type1 == type2:
-            return type1
-        
-        # Reglas de conversión
-        numeric_types = ["ent", "flt", "lg"]
-        
-        # Si ambos son tipos numéricos, el resultado es el tipo más "amplio"
-        if type1 in numeric_types and type2 in numeric_types:
-            if "lg" in [type1, type2]:
-                return "lg"
-            elif "flt" in [type1, type2]:
-                return "flt"
-            else:
-                return "ent"
-        
-        # String con cualquier otro tipo es error
-        if "str" in [type1, type2] and type1 != type2:
-            return None
-        
-        return None  # Tipos incompatibles
-
-    def evaluate_expression(self, ctx):
-        """Evalúa una expresión y retorna su valor si es posible."""
-        # Si solo hay un término sin operadores
-        if len(ctx.termino()) == 1 and not ctx.operadoresAritmeticos():
-            return self.evaluate_term(ctx.termino(0))
-            
-        # Si hay operadores aritméticos
-        if ctx.operadoresAritmeticos():
-            # Evaluar el primer término
-            result = self.evaluate_term(ctx.termino(0))
-            
-            # Si no se pudo evaluar el primer término, no podemos seguir
-            if result is None:
-                return None
-            
-            # Aplicar operaciones
-            for i, op in enumerate(ctx.operadoresAritmeticos()):
-                term = ctx.termino(i + 1)
-                term_value = self.evaluate_term(term)
-                
-                # Si algún término no se puede evaluar, no podemos seguir
-                if term_value is None:
-                    return None
-                
-                # Realizar la operación con prioridad
-                op_text = op.getText()
-                if op_text == '*':
-                    result *= term_value
-                elif op_text == '/':
-                    # Evitar división por cero
-                    if term_value == 0:
-                        self.add_error(ctx, "División por cero")
-                        return None
-                    result /= term_value
-                elif op_text == '%':
-                    # Evitar módulo por cero
-                    if term_value == 0:
-                        self.add_error(ctx, "Módulo por cero")
-                        return None
-                    result %= term_value
-                elif op_text == '+':
-                    result += term_value
-                elif op_text == '-':
-                    result -= term_value
-            
-            return result
-        
-        return None
+        """Tipo resultante de operar o asignar dos tipos, o None si son incompatibles"""
+        return RESULT_TYPES[type1][type2]
 
-    
-    def evaluate_additive_expression(self, ctx):
-        """Evalúa una expresión aditiva."""
-        # Evaluar primera expresión multiplicativa
-        result = self.evaluate_multiplicative_expression(ctx.expresionMultiplicativa(0))
-        if result is None:
+    # Expresiones: cada nodo se tipa y se pliega una sola vez, de abajo hacia arriba,
+    # y el resultado queda guardado en node.type y node.value
+    def visit_expr(self, node, fold_errors=False):
+        """Calcula y guarda el tipo y el valor constante de una expresión; retorna el tipo.
+
+        fold_errors indica si las divisiones por cero encontradas al plegar se reportan
+        (solo en inicializaciones y asignaciones, donde el valor se usa)."""
+        return self.EXPRESSION_VISITORS[type(node)](self, node, fold_errors)
+
+    def visit_literal(self, node, fold_errors):
+        if node.value is None:
+            # Solo un lg con decimales (1.5l) queda sin valor: los lg son enteros
+            self.add_error(node, f"Literal lg con decimales: '{node.text}'")
+        return node.type
+
+    def visit_name(self, node, fold_errors):
+        symbol = self.symbol_table.lookup(node.name)
+        if symbol is None:
+            self.add_error(node, f"Variable '{node.name}' no declarada")
             return None
-        
-        # Aplicar operadores aditivos
-        for i, op in enumerate(ctx.operadoresAditivos()):
-            term_value = self.evaluate_multiplicative_expression(ctx.expresionMultiplicativa(i + 1))
-            if term_value is None:
+        node.type = symbol.type
+        # Fuera de su ámbito, una variable puede cambiar entre llamadas: su valor no se conoce
+        if not symbol.is_constant and self.check_outer_access(node.name):
+            node.value = None
+        else:
+            node.value = symbol.value
+        return node.type
+
+    def visit_call(self, node, fold_errors=False):
+        # Los argumentos se tipan primero; su valor no se usa, así que no reportan plegado
+        arg_types = [self.visit_expr(arg) for arg in node.args]
+        function = self.check_call(node, arg_types)
+        if function is not None:
+            node.type = function.type
+            if self.function_contexts:
+                callee = self.function_nodes.get(function)
+                if callee is None:
+                    self.mark_impure()
+                else:
+                    self.function_contexts[-1].callees.add(callee)
+        # La llamada puede asignar las variables que alguna función escribe fuera de su ámbito
+        for symbol in self.escaped:
+            symbol.value = None
+        # Las llamadas a funciones no se evalúan en tiempo de compilación
+        return node.type
+
+    def visit_expression(self, node, fold_errors):
+        operand_types = [self.visit_expr(term, fold_errors) for term in node.operands]
+
+        # Verificamos la división por cero con un literal
+        literal_zero = False
+        for op_text, term in zip(node.operators, node.operands[1:]):
+            if op_text == '/' and isinstance(term, Number) and term.text == '0':
+                self.add_error(node, "División por cero")
+                literal_zero = True
+                break
+
+        if None in operand_types:
+            return None  # Propagar error
+
+        # Verificar compatibilidad entre todos los términos
+        result_type = operand_types[0]
+        for term_type in operand_types[1:]:
+            result_type = RESULT_TYPES[result_type][term_type]
+            if result_type is None:
+                self.add_error(node, f"Operación aritmética entre tipos incompatibles")
                 return None
-            
-            if op.getText() == '+':
-                result += term_value
-            elif op.getText() == '-':
-                result -= term_value
-        
-        return result
-    
-    def evaluate_multiplicative_expression(self, ctx):
-        """Evalúa una expresión multiplicativa."""
-        # Evaluar primer término
-        result = self.evaluate_term(ctx.termino(0))
+        node.type = result_type
+        node.value = self.fold(node, fold_errors and not literal_zero)
+        return result_type
+
+    def fold(self, node, report_errors):
+        """Pliega los valores ya calculados de los operandos, de izquierda a derecha."""
+        result = node.operands[0].value
         if result is None:
             return None
-        
-        # Aplicar operadores multiplicativos
-        for i, op in enumerate(ctx.operadoresMultiplicativos()):
-            term_value = self.evaluate_term(ctx.termino(i + 1))
+
+        for op_text, term in zip(node.operators, node.operands[1:]):
+            term_value = term.value
+
+            # Si algún término no se puede evaluar, no podemos seguir
             if term_value is None:
                 return None
-            
-            if op.getText() == '*':
+
+            if op_text == '*':
                 result *= term_value
-            elif op.getText() == '/':
+            elif op_text == '/':
+                # Evitar división por cero
                 if term_value == 0:
-                    self.add_error(ctx, "División por cero")
+                    if report_errors:
+                        self.add_error(node, "División por cero")
                     return None
                 result /= term_value
-            elif op.getText() == '%':
+            elif op_text == '%':
+                # Evitar módulo por cero
                 if term_value == 0:
-                    self.add_error(ctx, "Módulo por cero")
+                    if report_errors:
+                        self.add_error(node, "Módulo por cero")
                     return None
                 result %= term_value
-        
-        return result
-    
-    def evaluate_expression_aditiva(self, ctx):
-        """Evalúa una expresión aditiva (suma, resta)."""
-        # Evaluar primera expresión multiplicativa
-        result = self.evaluate_expression_multiplicativa(ctx.expresionMultiplicativa(0))
-        if result is None:
-            return None
-        
-        # Aplicar operadores aditivos (+ o -)
-        for i, op in enumerate(ctx.operadoresAditivos()):
-            term_value = self.evaluate_expression_multiplicativa(ctx.expresionMultiplicativa(i + 1))
-            if term_value is None:
-                return None
-            
-            if op.getText() == '+':
+            elif op_text == '+':
                 result += term_value
-            elif op.getText() == '-':
+            elif op_text == '-':
                 result -= term_value
-        
-        return result
 
-    def evaluate_expression_multiplicativa(self, ctx):
-        """Evalúa una expresión multiplicativa (multiplicación, división, módulo)."""
-        # Evaluar primer término
-        result = self.evaluate_term(ctx.termino(0))
-        if result is None:
-            return None
-        
-        # Aplicar operadores multiplicativos (*, /, %)
-        for i, op in enumerate(ctx.operadoresMultiplicativos()):
-            term_value = self.evaluate_term(ctx.termino(i + 1))
-            if term_value is None:
-                return None
-            
-            if op.getText() == '*':
-                result *= term_value
-            elif op.getText() == '/':
-                if term_value == 0:
-                    self.add_error(ctx, "División por cero")
-                    return None
-                result /= term_value
-            elif op.getText() == '%':
-                if term_value == 0:
-                    self.add_error(ctx, "Módulo por cero")
-                    return None
-                result %= term_value
-        
         return result
 
-    def evaluate_term(self, ctx):
-        """Evalúa un término y retorna su valor si es posible."""
-        if ctx.ID():
-            symbol = self.symbol_table.lookup(ctx.ID().getText())
-            if symbol is None:
-                self.add_error(ctx, f"Variable '{ctx.ID().getText()}' no declarada")
-                return None
-            return symbol.value
-        elif ctx.NUMERO_VALORES():
-            num_text = ctx.NUMERO_VALORES().getText()
-            if 'l' in num_text:
-                return int(num_text.replace('l', ''))
-            elif '.' in num_text:
-                return float(num_text)
-            else:
-                return int(num_text)
-        elif ctx.STRING():
-            # Eliminar las comillas
-            return ctx.STRING().getText()[1:-1]
-        elif ctx.llamadaFuncion():
-            # Las llamadas a funciones no se evalúan en tiempo de compilación
-            return None
-        elif ctx.expresion():
-            # Para expresiones entre paréntesis
-            return self.evaluate_expression(ctx.expresion())
-            
-        return None
-    
-    def get_additive_expression_type(self, ctx):
-        """Determina el tipo de una expresión aditiva."""
-        # Obtener tipo de la primera expresión multiplicativa
-        result_type = self.get_multiplicative_expression_type(ctx.expresionMultiplicativa(0))
-        if result_type is None:
-            return None
-        
-        # Verificar compatibilidad con otras expresiones multiplicativas
-        for i in range(1, len(ctx.expresionMultiplicativa())):
-            mult_type = self.get_multiplicative_expression_type(ctx.expresionMultiplicativa(i))
-            if mult_type is None:
-                return None
-            
-            result_type = self.get_type_compatibility(result_type, mult_type)
-            if result_type is None:
-                self.add_error(ctx, f"Operación aritmética entre tipos incompatibles")
-                return None
-        
-        return result_type
-    
-    def get_multiplicative_expression_type(self, ctx):
-        """Determina el tipo de una expresión multiplicativa."""
-        # Obtener tipo del primer término
-        result_type = self.get_term_type(ctx.termino(0))
-        if result_type is None:
-            return None
-        
-        # Verificar compatibilidad con otros términos
-        for i in range(1, len(ctx.termino())):
-            term_type = self.get_term_type(ctx.termino(i))
-            if term_type is None:
-                return None
-            
-            result_type = self.get_type_compatibility(result_type, term_type)
-            if result_type is None:
-                self.add_error(ctx, f"Operación aritmética entre tipos incompatibles")
-                return None
-        
-        return result_type
+    def convert_value(self, value, type_name):
+        """Convierte un valor evaluado al tipo declarado."""
+        if value is not None:
+            if type_name == Type.ENT or type_name == Type.LG:
+                value = int(value)
+            elif type_name == Type.FLT:
+                value = float(value)
+        return value
 
-    def get_expression_type(self, ctx):
-        """Determina el tipo de una expresión."""
-        # Si solo hay un término sin operadores
-        if len(ctx.termino()) == 1 and not ctx.operadoresAritmeticos():
-            return self.get_term_type(ctx.termino(0))
-            
-        # Si hay operadores aritméticos, evaluamos la compatibilidad
-        if ctx.operadoresAritmeticos():
-            term_types = []
-            for term in ctx.termino():
-                term_type = self.get_term_type(term)
-                if term_type is None:
-                    return None  # Propagar error
-                term_types.append(term_type)
-            
-            # Verificar compatibilidad entre todos los términos
-            result_type = term_types[0]
-            for i in range(1, len(term_types)):
-                result_type = self.get_type_compatibility(result_type, term_types[i])
-                if result_type is None:
-                    self.add_error(ctx, f"Operación aritmética entre tipos incompatibles")
-                    return None
-            
-            return result_type
-            
-        return None        
-
-    def get_term_type(self, ctx):
-        """Determina el tipo de un término."""
-        if ctx.ID():
-            symbol = self.symbol_table.lookup(ctx.ID().getText())
-            if symbol is None:
-                self.add_error(ctx, f"Variable '{ctx.ID().getText()}' no declarada")
-                return None
-            return symbol.type
-        elif ctx.NUMERO_VALORES():
-            num_text = ctx.NUMERO_VALORES().getText()
-            if 'l' in num_text:
-                return "lg"
-            elif '.' in num_text:
-                return "flt"
-            else:
-                return "ent"
-        elif ctx.STRING():
-            return "str"
-        elif ctx.llamadaFuncion():
-            function_name = ctx.llamadaFuncion().ID().getText()
-            # Buscar la función en la tabla de símbolos
-            function = self.symbol_table.lookup(function_name)
-            if function is None:
-                self.add_error(ctx, f"Función '{function_name}' no declarada")
-                return None
-            return function.type
-        elif ctx.expresion():
-            # Para expresiones entre paréntesis
-            return self.get_expression_type(ctx.expresion())
-            
-        return None
+    # Pureza: una función con retorno es pura si no usa clg ni scn, no lee ni escribe
+    # variables no constantes fuera de su propio ámbito y solo llama funciones puras. Sus
+    # resultados dependen solo de los argumentos, así que se pueden memorizar al ejecutar.
+    def mark_impure(self):
+        if self.function_contexts:
+            self.function_contexts[-1].node.is_pure = False
+
+    def check_outer_access(self, name):
+        """Marca impura la función actual si `name` no es uno de sus parámetros o locales;
+        retorna si el acceso es a una variable de fuera de la función"""
+        if not self.function_contexts:
+            return False
+        scopes = self.symbol_table.scopes[self.function_contexts[-1].scope_depth:]
+        if not any(name in scope for scope in scopes):
+            self.mark_impure()
+            return True
+        return False
+
+    def resolve_purity(self):
+        """Propaga la impureza por el grafo de llamadas (las recursivas quedan puras si nada
+        en el ciclo de llamadas es impuro)"""
+        changed = True
+        while changed:
+            changed = False
+            for context in self.call_graph:
+                node = context.node
+                if node.is_pure and not all(callee.is_pure for callee in context.callees):
+                    node.is_pure = False
+                    changed = True
+
+    # Recorrido del AST
+    def analyze(self, program):
+        self.visit_body(program.body)
+        self.resolve_purity()
+
+    def visit(self, node):
+        self.VISITORS[type(node)](self, node)
+
+    def visit_body(self, statements):
+        for statement in statements:
+            self.visit(statement)
 
     # Visitar declaraciones
-    def enterDeclaracion(self, ctx):
-        name = ctx.ID().getText()
-        type_name = ""
-        
-        # Obtener el tipo
-        if ctx.tipo().kwEnt():
-            type_name = "ent"
-        elif ctx.tipo().kwFlt():
-            type_name = "flt"
-        elif ctx.tipo().kwLg():
-            type_name = "lg"
-        elif ctx.tipo().kwStr():
-            type_name = "str"
-        
-        # Verificar si es constante
-        is_constant = ctx.kwUnmutable() is not None
-        
+    def visit_declaration(self, node):
+        name = node.name
+        type_name = node.type
+
+        expr_type = None
+        if node.init is not None:
+            expr_type = self.visit_expr(node.init, fold_errors=True)
+        if node.reads_input:
+            self.mark_impure()
+
         # Verificar si ya existe en el ámbito actual
         if name in self.symbol_table.get_current_scope_symbols():
-            self.add_error(ctx, f"Variable '{name}' ya declarada en este ámbito")
+            self.add_error(node, f"Variable '{name}' ya declarada en este ámbito")
             return
-        
+
         # Agregar a la tabla de símbolos
         value = None
-        if ctx.expresion():
+        if node.init is not None:
             # Si hay una inicialización, verificar compatibilidad de tipos
-            expr_type = self.get_expression_type(ctx.expresion())
             if expr_type is None:
-                self.add_error(ctx, f"Error en la expresión de inicialización para '{name}'")
+                self.add_error(node, f"Error en la expresión de inicialización para '{name}'")
                 return
-            
+
             # Verificar compatibilidad de tipos
             compatible_type = self.get_type_compatibility(type_name, expr_type)
             if compatible_type is None:
-                self.add_error(ctx, f"Tipo incompatible: no se puede asignar '{expr_type}' a '{type_name}'")
+                self.add_error(node, f"Tipo incompatible: no se puede asignar '{expr_type}' a '{type_name}'")
                 return
-            
-            # Evaluar la expresión si es posible
-            value = self.evaluate_expression(ctx.expresion())
-            
-            # Convertir el valor al tipo adecuado si es necesario
-            if value is not None:
-                if type_name == "ent":
-                    value = int(value)
-                elif type_name == "flt":
-                    value = float(value)
-                elif type_name == "lg":
-                    value = int(value)
-        
+
+            # Convertir el valor plegado al tipo declarado
+            value = self.convert_value(node.init.value, type_name)
+
         # Declarar la variable
-        self.symbol_table.declare(name, type_name, is_constant, value)
+        self.symbol_table.declare(name, type_name, node.is_constant, value)
 
     # Visitar asignaciones
-    def enterAsignacion(self, ctx):
-        name = ctx.ID().getText()
+    def visit_assignment(self, node):
+        name = node.name
+        expr_type = self.visit_expr(node.value, fold_errors=True)
         symbol = self.symbol_table.lookup(name)
-        
+
         # Verificar si la variable existe
         if symbol is None:
-            self.add_error(ctx, f"Variable '{name}' no declarada")
+            self.add_error(node, f"Variable '{name}' no declarada")
             return
-        
+
         # Verificar si es constante
         if symbol.is_constant:
-            self.add_error(ctx, f"No se puede modificar la constante '{name}'")
+            self.add_error(node, f"No se puede modificar la constante '{name}'")
             return
-        
+        if self.check_outer_access(name):
+            self.escaped.add(symbol)
+
         # Verificar compatibilidad de tipos
-        expr_type = self.get_expression_type(ctx.expresion())
         if expr_type is None:
-            self.add_error(ctx, f"Error en la expresión para asignar a '{name}'")
+            self.add_error(node, f"Error en la expresión para asignar a '{name}'")
             return
-        
+
         compatible_type = self.get_type_compatibility(symbol.type, expr_type)
         if compatible_type is None:
-            self.add_error(ctx, f"Tipo incompatible: no se puede asignar '{expr_type}' a '{symbol.type}'")
+            self.add_error(node, f"Tipo incompatible: no se puede asignar '{expr_type}' a '{symbol.type}'")
             return
-        
-        # Evaluar la expresión si es posible
-        value = self.evaluate_expression(ctx.expresion())
-        
-        # Convertir el valor al tipo adecuado si es necesario
-        if value is not None:
-            if symbol.type == "ent":
-                value = int(value)
-            elif symbol.type == "flt":
-                value = float(value)
-            elif symbol.type == "lg":
-                value = int(value)
-        
-        # Actualizar el valor
-        self.symbol_table.update(name, value)
-
-    # Verificar expresiones (incluyendo operaciones aritméticas)
-    def enterExpresion(self, ctx):
-        # Verificamos la división por cero
-        for i, op in enumerate(ctx.operadoresAritmeticos()):
-            if op.getText() == '/' and i+1 < len(ctx.termino()):
-                term = ctx.termino(i+1)
-                # Si el término es un número literal
-                if term.NUMERO_VALORES() and term.NUMERO_VALORES().getText() == '0':
-                    self.add_error(ctx, "División por cero")
-                    return
+
+        # Actualizar el valor con el resultado plegado
+        self.symbol_table.update(name, self.convert_value(node.value.value, symbol.type))
+
+    def visit_for_step(self, node):
+        self.visit_expr(node.value)
+        if self.check_outer_access(node.name):
+            symbol = self.symbol_table.lookup(node.name)
+            if symbol is not None:
+                self.escaped.add(symbol)
+
+    def visit_call_statement(self, node):
+        self.visit_call(node)
 
     # Entrar a un nuevo ámbito (función, if, ciclos)
-    def enterFuncionConRetorno(self, ctx):
-        name = ctx.ID().getText()
-        
-        # Obtener el tipo de retorno
-        return_type = ""
-        if ctx.tipo().kwEnt():
-            return_type = "ent"
-        elif ctx.tipo().kwFlt():
-            return_type = "flt"
-        elif ctx.tipo().kwLg():
-            return_type = "lg"
-        elif ctx.tipo().kwStr():
-            return_type = "str"
-        
+    def visit_function(self, node):
+        # El cuerpo no se ejecuta al declararla: lo que asigna fuera de su ámbito se restaura
+        saved = self.snapshot(assigned_names(node.body))
+        unreachable, self.unreachable = self.unreachable, False
+        if node.return_type is None:
+            self.enter_procedure(node)
+            self.open_function_context(node)
+            self.visit_body(node.body)
+            self.function_contexts.pop()
+            self.exit_scope()
+        else:
+            self.enter_function(node)
+            self.open_function_context(node)
+            node.is_pure = True  # Hasta encontrar algo impuro en el cuerpo
+            self.visit_body(node.body)
+            self.function_contexts.pop()
+
+            # Verificar si la función tiene un retorno
+            if not self.has_return:
+                self.add_error(node, f"La función '{node.name}' debe tener una sentencia de retorno")
+
+            # Salir del ámbito
+            self.exit_scope()
+            self.current_function_type = None
+            self.has_return = False
+        self.restore(saved)
+        self.unreachable = unreachable
+
+    def open_function_context(self, node):
+        symbol = self.symbol_table.lookup(node.name)
+        if symbol is not None:
+            self.function_nodes[symbol] = node
+        context = FunctionContext(node, self.symbol_table.current_scope)
+        self.function_contexts.append(context)
+        self.call_graph.append(context)
+
+    def enter_function(self, node):
+        name = node.name
+        return_type = node.return_type
+
         # Verificar si ya existe
         if self.symbol_table.lookup(name) is not None:
-            self.add_error(ctx, f"Función '{name}' ya declarada")
+            self.add_error(node, f"Función '{name}' ya declarada")
             return
-        
-        # Recopilar información de parámetros
-        params_info = []
-        if ctx.parametros():
-            param_ctx = ctx.parametros()
-            param_types = param_ctx.tipo()
-            param_names = param_ctx.ID()
-            
-            for i in range(len(param_types)):
-                param_type = self.get_param_type(param_types[i])
-                param_name = param_names[i].getText()
-                params_info.append((param_name, param_type))
-        
+
         # Declarar la función con sus parámetros
-        self.symbol_table.declare(name, return_type, False, None, params_info)
-        
+        self.symbol_table.declare(name, return_type, False, None, list(node.params))
+
         # Crear un nuevo ámbito para los parámetros y variables locales
         self.symbol_table.enter_scope(f"función_{name}")
         self.current_function_type = return_type
         self.has_return = False
-        
-        # Declarar los parámetros en el ámbito local
-        if ctx.parametros():
-            param_ctx = ctx.parametros()
-            param_types = param_ctx.tipo()
-            param_names = param_ctx.ID()
-            
-            for i in range(len(param_types)):
-                param_type = self.get_param_type(param_types[i])
-                param_name = param_names[i].getText()
-                
-                # Verificar si ya existe en el ámbito actual
-                if param_name in self.symbol_table.get_current_scope_symbols():
-                    self.add_error(param_ctx, f"Parámetro '{param_name}' duplicado")
-                    continue
-                
-                # Declarar el parámetro
-                self.symbol_table.declare(param_name, param_type, False, None)
-
-    def exitFuncionConRetorno(self, ctx):
-        # Verificar si la función tiene un retorno
-        if not self.has_return:
-            self.add_error(ctx, f"La función '{ctx.ID().getText()}' debe tener una sentencia de retorno")
-        
-        # Salir del ámbito
-        self.symbol_table.exit_scope()
-        self.current_function_type = None
-        self.has_return = False
 
-    def enterFuncionSinRetorno(self, ctx):
-        name = ctx.ID().getText()
-        
+        self.declare_params(node)
+
+    def enter_procedure(self, node):
+        name = node.name
+
         # Verificar si ya existe
         if self.symbol_table.lookup(name) is not None:
-            self.add_error(ctx, f"Función '{name}' ya declarada")
+            self.add_error(node, f"Función '{name}' ya declarada")
             return
-        
+
         # Declarar la función en el ámbito actual (tipo void)
-        self.symbol_table.declare(name, "void")
-        
+        self.symbol_table.declare(name, Type.VOID)
+
         # Crear un nuevo ámbito para los parámetros y variables locales
         self.symbol_table.enter_scope(f"función_{name}")
-        
-        # Procesar parámetros si los hay
-        if ctx.parametros():
-            param_ctx = ctx.parametros()
-            param_types = param_ctx.tipo()
-            param_names = param_ctx.ID()
-            
-            for i in range(len(param_types)):
-                param_type = ""
-                if param_types[i].kwEnt():
-                    param_type = "ent"
-                elif param_types[i].kwFlt():
-                    param_type = "flt"
-                elif param_types[i].kwLg():
-                    param_type = "lg"
-                elif param_types[i].kwStr():
-                    param_type = "str"
-                
-                param_name = param_names[i].getText()
-                
-                # Verificar si ya existe en el ámbito actual
-                if param_name in self.symbol_table.get_current_scope_symbols():
-                    self.add_error(param_ctx, f"Parámetro '{param_name}' duplicado")
-                    continue
-                
-                # Declarar el parámetro
-                self.symbol_table.declare(param_name, param_type, False, None)
-
-    def exitFuncionSinRetorno(self, ctx):
-        # Salir del ámbito
+
+        self.declare_params(node)
+
+    def declare_params(self, node):
+        """Declara los parámetros en el ámbito local de la función"""
+        for param_name, param_type in node.params:
+            # Verificar si ya existe en el ámbito actual
+            if param_name in self.symbol_table.get_current_scope_symbols():
+                self.errors.append(SemanticError(f"Parámetro '{param_name}' duplicado",
+                                                 node.params_line, node.params_column))
+                continue
+
+            # Declarar el parámetro
+            self.symbol_table.declare(param_name, param_type, False, None)
+
+    # Flujo de valores: node.value y Symbol.value son el valor en el punto del recorrido por
+    # todos los caminos que llegan a él (None si difiere o no se conoce). Los if unen los
+    # valores de sus ramas alcanzables y los ciclos desconocen lo que asignan.
+    def snapshot(self, names):
+        """(símbolo, valor) de las variables visibles con esos nombres"""
+        saved = []
+        for name in names:
+            symbol = self.symbol_table.lookup(name)
+            if symbol is not None and not symbol.is_constant:
+                saved.append((symbol, symbol.value))
+        return saved
+
+    @staticmethod
+    def restore(saved):
+        for symbol, value in saved:
+            symbol.value = value
+
+    def leave_path(self):
+        """Un rtn termina el camino: guarda el valor con que salen los símbolos de la función"""
+        if not self.unreachable and self.function_contexts:
+            exit_values = self.exit_values
+            for scope in self.symbol_table.scopes[self.function_contexts[-1].scope_depth:]:
+                for symbol in scope.values():
+                    value = exit_values.get(symbol, UNREACHED)
+                    exit_values[symbol] = symbol.value if value is UNREACHED else join_values(value, symbol.value)
+        self.unreachable = True
+
+    def exit_scope(self):
+        """Cierra el ámbito dejando en cada símbolo su valor al salir por cualquier camino
+        (el final del bloque si se alcanza y cada rtn dentro de él); es el que se reporta"""
+        exit_values = self.exit_values
+        for symbol in self.symbol_table.get_current_scope_symbols().values():
+            value = exit_values.pop(symbol, UNREACHED) if exit_values else UNREACHED
+            if not self.unreachable:
+                value = symbol.value if value is UNREACHED else join_values(value, symbol.value)
+            symbol.value = None if value is UNREACHED else value
         self.symbol_table.exit_scope()
 
     # Entrar a un ciclo o un if
-    def enterEstructuraIf(self, ctx):
+    def visit_if(self, node):
         self.symbol_table.enter_scope("if")
+        self.visit(node.condition)
+        taken = condition_outcome(node.condition)
+        saved = self.snapshot(assigned_names(node.then_body) | assigned_names(node.else_body))
+        unreachable = self.unreachable
 
-    def exitEstructuraIf(self, ctx):
-        self.symbol_table.exit_scope()
+        # Cada rama parte de los valores de antes del if; solo se unen las que se pueden
+        # tomar y no terminan en rtn
+        branches = []
+        for body, reachable in ((node.then_body, taken is not False), (node.else_body, taken is not True)):
+            self.restore(saved)
+            self.unreachable = False
+            self.visit_body(body)
+            if reachable and not self.unreachable:
+                branches.append([symbol.value for symbol, _ in saved])
 
-    def enterCicloFor(self, ctx):
-        self.symbol_table.enter_scope("for")
+        if branches:
+            values = branches[0]
+            if len(branches) == 2:
+                values = [join_values(left, right) for left, right in zip(*branches)]
+            for (symbol, _), value in zip(saved, values):
+                symbol.value = value
+            self.unreachable = unreachable
+        else:
+            self.unreachable = True
+        self.exit_scope()
 
-    def exitCicloFor(self, ctx):
-        self.symbol_table.exit_scope()
+    def visit_for(self, node):
+        self.symbol_table.enter_scope("for")
+        if node.init is not None:
+            self.visit(node.init)
+        names = assigned_names(node.body)
+        names.add(node.step.name)
+        saved = self.enter_loop(names, (node.condition, node.step) + node.body)
+        self.visit(node.condition)
+        taken = condition_outcome(node.condition)
+        self.visit(node.step)
+        self.visit_loop_body(node.body, saved, taken)
+        self.exit_scope()
 
-    def enterCicloWhile(self, ctx):
+    def visit_while(self, node):
         self.symbol_table.enter_scope("while")
+        saved = self.enter_loop(assigned_names(node.body), (node.condition,) + node.body)
+        self.visit(node.condition)
+        self.visit_loop_body(node.body, saved, condition_outcome(node.condition))
+        self.exit_scope()
 
-    def exitCicloWhile(self, ctx):
-        self.symbol_table.exit_scope()
+    def enter_loop(self, names, nodes):
+        """Lo que asigna un ciclo cambia entre iteraciones: su valor no se conoce en la
+        condición, el cuerpo ni después del ciclo. Si el ciclo (nodes: condición, paso y
+        cuerpo) llama funciones, tampoco se conoce lo que ellas asignan fuera de su ámbito:
+        una lectura al inicio del cuerpo ve lo que asignó la llamada de la vuelta anterior"""
+        calls = calls_functions(nodes)
+        if calls:
+            # Incluye lo que asignan las funciones declaradas en el cuerpo, que aún no están
+            # en self.escaped
+            names = names | assigned_names(nodes, functions=True)
+        saved = self.snapshot(names)
+        if calls:
+            known = {symbol for symbol, _ in saved}
+            saved.extend((symbol, symbol.value) for symbol in self.escaped if symbol not in known)
+        for symbol, _ in saved:
+            symbol.value = None
+        return saved
+
+    def visit_loop_body(self, body, saved, taken):
+        unreachable = self.unreachable
+        self.visit_body(body)
+        if taken is False:
+            # La condición es falsa desde el inicio: el cuerpo nunca se ejecuta
+            self.restore(saved)
+        else:
+            for symbol, _ in saved:
+                symbol.value = None
+        # Sin break, un ciclo con condición siempre verdadera solo termina con rtn
+        self.unreachable = unreachable or taken is True
 
     # Verificar expresión lógica
-    def enterExpresionLogica(self, ctx):
-        left_expr = ctx.expresion(0)
-        right_expr = ctx.expresion(1)
-        
-        left_type = self.get_expression_type(left_expr)
-        right_type = self.get_expression_type(right_expr)
-        
+    def visit_comparison(self, node):
+        left_type = self.visit_expr(node.left)
+        right_type = self.visit_expr(node.right)
+
         if left_type is None or right_type is None:
             return  # Ya se reportó el error
-        
+
         # Verificar compatibilidad
-        compatible_type = self.get_type_compatibility(left_type, right_type)
-        if compatible_type is None:
-            self.add_error(ctx, f"Comparación entre tipos incompatibles: '{left_type}' y '{right_type}'")
+        if not COMPARABLE[left_type][right_type]:
+            self.add_error(node, f"Comparación entre tipos incompatibles: '{left_type}' y '{right_type}'")
+
+    def visit_print(self, node):
+        self.mark_impure()
+        if node.value is not None:
+            self.visit_expr(node.value)
+        # Las variables de clg("texto" $ id) se resuelven aquí, no al imprimir
+        for name in node.names:
+            symbol = self.symbol_table.lookup(name)
+            if symbol is None:
+                self.add_error(node, f"Variable '{name}' no declarada")
+            elif not symbol.is_constant:
+                self.check_outer_access(name)
 
     # Verificar retorno
-    def enterRetornoSentencia(self, ctx):
+    def visit_return(self, node):
+        expr_type = self.visit_expr(node.value)
+        self.leave_path()
+
         if self.current_function_type is None:
-            self.add_error(ctx, "Sentencia de retorno fuera de función")
+            self.add_error(node, "Sentencia de retorno fuera de función")
             return
-        
-        expr_type = self.get_expression_type(ctx.expresion())
+
         if expr_type is None:
-            self.add_error(ctx, "Error en la expresión de retorno")
+            self.add_error(node, "Error en la expresión de retorno")
             return
-        
+
         compatible_type = self.get_type_compatibility(self.current_function_type, expr_type)
         if compatible_type is None:
-            self.add_error(ctx, f"Tipo de retorno incompatible: '{expr_type}' no se puede convertir a '{self.current_function_type}'")
+            self.add_error(node, f"Tipo de retorno incompatible: '{expr_type}' no se puede convertir a '{self.current_function_type}'")
             return
-        
+
         self.has_return = True
+        self.check_tail_call(node)
+
+    def check_tail_call(self, node):
+        """Marca `rtn f(...)` dentro de la propia f (funcionConRetorno) como llamada de cola:
+        el rtn termina la función, así que esté donde esté (if, else, ciclos) no queda nada
+        por hacer con el resultado y los backends pueden reutilizar el marco"""
+        call = node.value
+        if type(call) is not Call or not self.function_contexts:
+            return
+        function = self.function_contexts[-1].node
+        if function.return_type is None or len(call.args) != len(function.params):
+            return
+        symbol = self.symbol_table.lookup(call.name)
+        if symbol is not None and self.function_nodes.get(symbol) is function:
+            node.tail_call = True
+            function.has_tail_call = True
 
     # Verificar llamada a función
-    def enterLlamadaFuncion(self, ctx):
-        function_name = ctx.ID().getText()
+    def check_call(self, node, arg_types):
+        """Verifica la llamada con los tipos ya calculados de sus argumentos; retorna el símbolo"""
+        function_name = node.name
         function = self.symbol_table.lookup(function_name)
-        
+
         # Verificar si la función existe
         if function is None:
-            self.add_error(ctx, f"Función '{function_name}' no declarada")
-            return
-        
+            self.add_error(node, f"Función '{function_name}' no declarada")
+            return None
+
         # Verificar número de parámetros
         expected_params = function.params if function.params else []
-        actual_params = ctx.expresion()
-        
-        if len(actual_params) != len(expected_params):
-            self.add_error(ctx, f"Número incorrecto de parámetros en llamada a '{function_name}': esperados {len(expected_params)}, encontrados {len(actual_params)}")
-            return
-        
+
+        if len(arg_types) != len(expected_params):
+            self.add_error(node, f"Número incorrecto de parámetros en llamada a '{function_name}': esperados {len(expected_params)}, encontrados {len(arg_types)}")
+            return function
+
         # Verificar tipos de parámetros
         for i, (param_name, param_type) in enumerate(expected_params):
-            expr_type = self.get_expression_type(actual_params[i])
+            expr_type = arg_types[i]
             if expr_type is None:
                 continue  # Ya se reportó un error
-            
+
             compat_type = self.get_type_compatibility(param_type, expr_type)
             if compat_type is None:
-                self.add_error(ctx, f"Tipo incompatible en parámetro {i+1} de '{function_name}': esperado '{param_type}', encontrado '{expr_type}'")
\ No newline at end of file
+                self.add_error(node, f"Tipo incompatible en parámetro {i+1} de '{function_name}': esperado '{param_type}', encontrado '{expr_type}'")
+
+        return function
+
+    VISITORS = {
+        Declaration: visit_declaration,
+        Assignment: visit_assignment,
+        ForStep: visit_for_step,
+        Function: visit_function,
+        If: visit_if,
+        For: visit_for,
+        While: visit_while,
+        Print: visit_print,
+        Return: visit_return,
+        Comparison: visit_comparison,
+        Call: visit_call_statement,
+    }
+
+    EXPRESSION_VISITORS = {
+        Expression: visit_expression,
+        Call: visit_call,
+        Name: visit_name,
+        Number: visit_literal,
+        String: visit_literal,
+    }
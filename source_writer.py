@@ -0,0 +1,136 @@
+from ast_nodes import (Declaration, Assignment, ForStep, Function, If, For, While, Print, Return,
+                       Expression, Comparison, Call, Name, Number, String)
+from type_system import Type
+
+# Cero del tipo de un literal negativo: MiLenguaje no tiene signo unario, -5 se escribe (0 - 5)
+NEGATIVE_ZEROS = {Type.ENT: "0", Type.LG: "0l", Type.FLT: "0.0"}
+
+
+class SourceWriter:
+    """Escribe un AST (analizado u optimizado) como código MiLenguaje que se puede volver a
+    compilar. Las expresiones son cadenas planas que se evalúan de izquierda a derecha, así
+    que solo las subexpresiones anidadas llevan paréntesis. Los comentarios no se conservan."""
+
+    def __init__(self):
+        self.lines = []
+        self.depth = 0
+
+    def write(self, program):
+        self.body(program.body)
+        return "\n".join(self.lines) + "\n"
+
+    def emit(self, text):
+        self.lines.append("    " * self.depth + text)
+
+    # Sentencias
+    def body(self, statements):
+        for statement in statements:
+            self.STATEMENT_WRITERS[type(statement)](self, statement)
+
+    def block(self, header, statements):
+        self.emit(f"{header} {{")
+        self.depth += 1
+        self.body(statements)
+        self.depth -= 1
+        self.emit("}")
+
+    def declaration_text(self, node):
+        text = f"{'const ' if node.is_constant else ''}{node.type} {node.name}"
+        if node.reads_input:
+            return f"{text} = scn();"
+        if node.init is not None:
+            return f"{text} = {self.expression(node.init)};"
+        return f"{text};"
+
+    def declaration(self, node):
+        self.emit(self.declaration_text(node))
+
+    def assignment(self, node):
+        self.emit(f"{node.name} = {self.expression(node.value)};")
+
+    def function(self, node):
+        params = ", ".join(f"{param_type} {name}" for name, param_type in node.params)
+        return_type = f" : {node.return_type}" if node.return_type is not None else ""
+        self.block(f"fct {node.name}({params}){return_type}", node.body)
+
+    def if_statement(self, node):
+        self.block(f"if ({self.comparison(node.condition)})", node.then_body)
+        if node.else_body:
+            self.lines[-1] += " else {"
+            self.depth += 1
+            self.body(node.else_body)
+            self.depth -= 1
+            self.emit("}")
+
+    def for_loop(self, node):
+        if node.init is None:
+            init = ";"
+        elif type(node.init) is Declaration:
+            init = self.declaration_text(node.init)
+        else:
+            init = f"{node.init.name} = {self.expression(node.init.value)};"
+        step = f"{node.step.name} = {self.expression(node.step.value)}"
+        self.block(f"for ({init} {self.comparison(node.condition)}; {step})", node.body)
+
+    def while_loop(self, node):
+        self.block(f"while ({self.comparison(node.condition)})", node.body)
+
+    def print_statement(self, node):
+        if node.value is not None:
+            self.emit(f"clg({self.expression(node.value)});")
+        else:
+            names = "".join(f" $ {name}" for name in node.names)
+            self.emit(f'clg("{node.template}"{names});')
+
+    def return_statement(self, node):
+        self.emit(f"rtn {self.expression(node.value)};")
+
+    def call_statement(self, node):
+        self.emit(f"{self.call(node)};")
+
+    # Expresiones
+    def expression(self, node):
+        kind = type(node)
+        if kind is Name:
+            return node.name
+        if kind is Number:
+            if node.text.startswith('-'):
+                return f"({NEGATIVE_ZEROS[node.type]} - {node.text[1:]})"
+            return node.text
+        if kind is String:
+            return f'"{node.value}"'
+        if kind is Call:
+            return self.call(node)
+        parts = [self.operand(node.operands[0])]
+        for operator, operand in zip(node.operators, node.operands[1:]):
+            parts.append(operator)
+            parts.append(self.operand(operand))
+        return " ".join(parts)
+
+    def operand(self, node):
+        if type(node) is Expression:
+            return f"({self.expression(node)})"
+        return self.expression(node)
+
+    def comparison(self, node):
+        return f"{self.expression(node.left)} {node.operator} {self.expression(node.right)}"
+
+    def call(self, node):
+        return f"{node.name}({', '.join(self.expression(arg) for arg in node.args)})"
+
+    STATEMENT_WRITERS = {
+        Declaration: declaration,
+        Assignment: assignment,
+        Function: function,
+        If: if_statement,
+        For: for_loop,
+        While: while_loop,
+        Print: print_statement,
+        Return: return_statement,
+        Call: call_statement,
+    }
+
+
+def milenguaje_source(program):
+    """Código MiLenguaje de un Program"""
+    return SourceWriter().write(program)
@@ -1,4 +1,12 @@
+from array import array
+from type_system import Type
+
+TYPES = tuple(Type)
+
+
 class Symbol:
+    __slots__ = ('name', 'type', 'is_constant', 'value', 'params')
+
     def __init__(self, name, symbol_type, is_constant=False, value=None, params=None):
         self.name = name
         self.type = symbol_type
@@ -69,21 +77,161 @@ class SymbolTable:
         return self.scopes[self.current_scope]
 
     def get_all_symbols_with_scopes(self):
-        """Return all symbols with their scope information (including history)."""
-        result = []
+        """Yield all symbols with their scope information (including history)."""
+        # Primero los ámbitos actuales
+        yield from self.iter_open_scopes()
         
-        # Primero agregar los ámbitos actuales
+        # Luego los ámbitos históricos
+        for scope_info in self.scope_history:
+            for name, symbol in scope_info['scope'].items():
+                yield scope_info['name'], name, symbol
+
+    def open_scopes(self):
+        """Genera (nombre, ámbito) de los ámbitos abiertos, del global al actual"""
         for scope_idx, scope in enumerate(self.scopes):
             scope_name = "global" if scope_idx == 0 else self.scope_names[scope_idx-1] if scope_idx-1 < len(self.scope_names) else f"local_{scope_idx}"
+            yield scope_name, scope
+
+    def iter_open_scopes(self):
+        for scope_name, scope in self.open_scopes():
             for name, symbol in scope.items():
-                result.append((scope_name, name, symbol))
-        
-        # Luego agregar los ámbitos históricos
-        for scope_info in self.scope_history:
-            for name, symbol in scope_info['scope'].items():
-                result.append((scope_info['name'], name, symbol))
-        
-        return result
+                yield scope_name, name, symbol
+
+
+class SymbolArchive:
+    """Almacén columnar de los símbolos de ámbitos cerrados, en orden de cierre.
+
+    Cada símbolo ocupa una fila de arreglos compactos (id de nombre, código de tipo,
+    bandera de constante, id de ámbito) más su valor; los nombres se guardan una vez."""
+
+    def __init__(self):
+        self.name_ids = {}
+        self.names = []
+        self.scope_names = []
+        self.scope_starts = array('I')  # Primera fila de cada ámbito (sus filas son consecutivas)
+        self.name_column = array('I')
+        self.type_column = array('B')
+        self.constant_column = array('B')
+        self.scope_column = array('I')
+        self.value_column = []
+
+    def add_scope(self, scope_name, symbols):
+        scope_id = len(self.scope_names)
+        self.scope_names.append(scope_name)
+        self.scope_starts.append(len(self.name_column))
+        name_ids = self.name_ids
+        for name, symbol in symbols.items():
+            name_id = name_ids.get(name)
+            if name_id is None:
+                name_id = name_ids[name] = len(self.names)
+                self.names.append(name)
+            self.name_column.append(name_id)
+            self.type_column.append(symbol.type)
+            self.constant_column.append(symbol.is_constant)
+            self.scope_column.append(scope_id)
+            self.value_column.append(symbol.value)
+
+    def __len__(self):
+        return len(self.name_column)
+
+    def __iter__(self):
+        """Genera (ámbito, nombre, Symbol) reconstruyendo cada símbolo al vuelo"""
+        names = self.names
+        scope_names = self.scope_names
+        for name_id, type_code, constant, scope_id, value in zip(
+                self.name_column, self.type_column, self.constant_column,
+                self.scope_column, self.value_column):
+            name = names[name_id]
+            yield scope_names[scope_id], name, Symbol(name, TYPES[type_code], bool(constant), value)
+
+    def scope_rows(self, scope_id):
+        """Genera (nombre, Symbol) de los símbolos de un ámbito"""
+        starts = self.scope_starts
+        end = starts[scope_id + 1] if scope_id + 1 < len(starts) else len(self.name_column)
+        names = self.names
+        for row in range(starts[scope_id], end):
+            name = names[self.name_column[row]]
+            yield name, Symbol(name, TYPES[self.type_column[row]], bool(self.constant_column[row]),
+                               self.value_column[row])
+
+
+class ScopedSymbolTable(SymbolTable):
+    """SymbolTable con una pila de enlaces visibles por nombre (estilo LeBlanc-Cook).
+
+    `bindings` asocia cada nombre con la lista de sus símbolos visibles, el más interno
+    al final, así que lookup/update/declare son O(1) sin importar la profundidad. Cada
+    ámbito sigue siendo un dict con sus nombres declarados en orden, y exit_scope solo
+    desapila los nombres de ese ámbito.
+
+    Los ámbitos cerrados pasan a un SymbolArchive columnar; con keep_history=False se
+    descartan (cuando no se va a imprimir la tabla de símbolos)."""
+
+    def __init__(self, keep_history=True):
+        super().__init__()
+        self.bindings = {}
+        self.archive = SymbolArchive() if keep_history else None
+
+    def exit_scope(self):
+        if self.current_scope > 0:
+            bindings = self.bindings
+            scope = self.scopes.pop()
+            for name in scope:
+                stack = bindings[name]
+                stack.pop()
+                if not stack:
+                    del bindings[name]
+            if self.archive is not None:
+                scope_name = self.scope_names[self.current_scope - 1] if self.current_scope - 1 < len(self.scope_names) else f"local_{self.current_scope}"
+                self.archive.add_scope(scope_name, scope)
+            self.current_scope -= 1
+
+    def get_all_symbols_with_scopes(self):
+        yield from self.iter_open_scopes()
+        if self.archive is not None:
+            yield from self.archive
+
+    def iter_symbols_by_scope(self):
+        """Como get_all_symbols_with_scopes, con los ámbitos del mismo nombre juntos (en el
+        orden en que aparece cada nombre), que es el orden de la tabla de símbolos. Solo se
+        agrupan los ámbitos: los símbolos se generan al recorrerlos, sin copiarlos"""
+        groups = {}
+        for scope_name, scope in self.open_scopes():
+            groups.setdefault(scope_name, []).append(scope)
+        archive = self.archive
+        if archive is not None:
+            for scope_id, scope_name in enumerate(archive.scope_names):
+                groups.setdefault(scope_name, []).append(scope_id)
+        for scope_name, scopes in groups.items():
+            for scope in scopes:
+                # Un ámbito abierto es su dict; uno cerrado, su número en el archivo
+                symbols = archive.scope_rows(scope) if type(scope) is int else scope.items()
+                for name, symbol in symbols:
+                    yield scope_name, name, symbol
+
+    def declare(self, name, symbol_type, is_constant=False, value=None, params=None):
+        scope = self.scopes[self.current_scope]
+        if name in scope:
+            return False
+
+        symbol = Symbol(name, symbol_type, is_constant, value, params)
+        scope[name] = symbol
+        stack = self.bindings.get(name)
+        if stack is None:
+            self.bindings[name] = [symbol]
+        else:
+            stack.append(symbol)
+        return True
+
+    def lookup(self, name):
+        stack = self.bindings.get(name)
+        return stack[-1] if stack is not None else None
+
+    def update(self, name, value):
+        symbol = self.lookup(name)
+        if symbol is None or symbol.is_constant:
+            return False
+        symbol.value = value
+        return True
 
 
 class SemanticError(Exception):
@@ -97,4 +245,54 @@ class SemanticError(Exception):
     def __str__(self):
         if self.line and self.column:
             return f"Error semántico en línea {self.line}, columna {self.column}: {self.message}"
-        return f"Error semántico: {self.message}"
\ No newline at end of file
+        return f"Error semántico: {self.message}"
+
+
+def benchmark(table_class, symbols=100_000, depth=1000, lookups=10_000):
+    """Microbenchmark: `depth` ámbitos anidados con `symbols` símbolos en total y búsquedas
+    desde el ámbito más interno de nombres globales (el peor caso del recorrido lineal)"""
+    import time
+    per_scope = max(1, symbols // depth)
+    table = table_class()
+    timings = {}
+
+    start = time.perf_counter()
+    for level in range(depth):
+        for i in range(per_scope):
+            table.declare(f"v{level}_{i}", Type.ENT)
+        if level < depth - 1:
+            table.enter_scope(f"local_{level + 1}")
+    timings['declare'] = time.perf_counter() - start
+
+    names = [f"v0_{i % per_scope}" for i in range(lookups)]
+    start = time.perf_counter()
+    for name in names:
+        table.lookup(name)
+    timings['lookup'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for name in names:
+        table.update(name, 1)
+    timings['update'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(depth - 1):
+        table.exit_scope()
+    timings['exit_scope'] = time.perf_counter() - start
+    return timings
+
+
+def main():
+    """Uso: python symbol_table.py [símbolos] [profundidad] — compara ambas tablas"""
+    import sys
+    symbols = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    print(f"{symbols} símbolos, profundidad {depth}")
+    for table_class in (SymbolTable, ScopedSymbolTable):
+        timings = benchmark(table_class, symbols, depth)
+        details = "  ".join(f"{phase}={seconds * 1000:.1f}ms" for phase, seconds in timings.items())
+        print(f"{table_class.__name__.ljust(20)}{details}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Caché de compilación (--cache): un acierto debe reportar lo mismo que compilar de nuevo y
+la clave debe cambiar con el lexer y con la versión del compilador (python -m pytest -q)"""
+import os
+import subprocess
+import sys
+
+import compile_cache
+from compile_cache import CompileCache
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MAIN = os.path.join(HERE, "main.py")
+
+PROGRAMS = {
+    'valido': """
+const ent a = 2;
+fct doble(ent x) : ent { ent y = x * a; rtn y; }
+ent r = doble(3);
+""",
+    'error_lexico': """
+ent x = 1 @ 2;
+""",
+    'error_semantico': """
+ent x = "texto";
+""",
+}
+
+
+def cli_output(path, cache_dir, *flags):
+    process = subprocess.run([sys.executable, MAIN, str(path), f"--cache={cache_dir}", *flags],
+                             capture_output=True, text=True)
+    return process.stdout
+
+
+def test_hit_matches_miss(tmp_path):
+    cache_dir = tmp_path / "cache"
+    for name, source in PROGRAMS.items():
+        path = tmp_path / f"{name}.txt"
+        path.write_text(source, encoding='utf-8')
+        for flags in [(), ("--lexer=fast",)]:
+            miss = cli_output(path, cache_dir, *flags)
+            assert cli_output(path, cache_dir, *flags) == miss
+    entries = [entry for shard in cache_dir.iterdir() for entry in shard.iterdir()]
+    assert len(entries) == 2 * len(PROGRAMS)
+
+
+def test_key_depends_on_lexer(tmp_path):
+    cache = CompileCache(str(tmp_path))
+    source = PROGRAMS['valido']
+    assert cache.key(source, 'MiLenguajeLexer') == cache.key(source, 'MiLenguajeLexer')
+    assert cache.key(source, 'MiLenguajeLexer') != cache.key(source, 'FastLexer')
+    assert cache.key(source, 'MiLenguajeLexer') != cache.key(source + " ", 'MiLenguajeLexer')
+
+
+def test_version_change_invalidates(tmp_path, monkeypatch):
+    cache = CompileCache(str(tmp_path))
+    key = cache.key(PROGRAMS['valido'], 'MiLenguajeLexer')
+    cache.put(key, {'stage': 'semantico'})
+    assert cache.get(key) == {'stage': 'semantico'}
+
+    monkeypatch.setattr(compile_cache, '_compiler_version', "0" * 64)
+    new_key = cache.key(PROGRAMS['valido'], 'MiLenguajeLexer')
+    assert new_key != key and cache.get(new_key) is None
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'evictions': 0}
+
+
+def test_versioned_modules_exist():
+    for module in compile_cache.VERSIONED_MODULES:
+        assert os.path.exists(os.path.join(HERE, module)), module
+
+
+def test_eviction_keeps_limit(tmp_path):
+    cache = CompileCache(str(tmp_path), max_bytes=300)
+    keys = [cache.key(f"ent x = {i};", 'MiLenguajeLexer') for i in range(10)]
+    for i, key in enumerate(keys):
+        cache.put(key, {'errors': ["x" * 50], 'index': i})
+        os.utime(cache._entry_path(key), (i, i))  # Orden de uso explícito
+    assert sum(size for _, size, _ in cache._entries()) <= 300
+    assert cache.evictions > 0
+    assert cache.get(keys[-1])['index'] == 9
+    assert cache.get(keys[0]) is None
@@ -0,0 +1,75 @@
+"""El servidor de compilación (--serve / --socket) debe reportar lo mismo que compilar
+directamente, respetando --lexer y --no-symbols (python -m pytest -q)"""
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from compile_server import CompileServer, CompileClient
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MAIN = os.path.join(HERE, "main.py")
+
+PROGRAMS = {
+    'valido': """
+const ent a = 2;
+fct doble(ent x) : ent { ent y = x * a; rtn y; }
+ent r = doble(3);
+clg(r);
+""",
+    'error_semantico': """
+ent x = "texto";
+clg(y);
+""",
+    'error_sintactico': """
+ent x = ;
+""",
+}
+
+
+@pytest.fixture(scope='module')
+def socket_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("servidor") / "compilador.sock")
+    server = CompileServer(path)
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    yield path
+    client = CompileClient(path)
+    client.shutdown()
+    client.close()
+    thread.join(5)
+
+
+def cli_output(*args):
+    process = subprocess.run([sys.executable, MAIN, *args], capture_output=True, text=True)
+    return process.stdout
+
+
+@pytest.mark.parametrize('flags', [(), ("--lexer=fast",), ("--no-symbols",)])
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_remote_matches_local(tmp_path, socket_path, name, flags):
+    path = tmp_path / f"{name}.txt"
+    path.write_text(PROGRAMS[name], encoding='utf-8')
+    assert cli_output(str(path), f"--socket={socket_path}", *flags) == cli_output(str(path), *flags)
+
+
+def compile_source(socket_path, source, **options):
+    # El servidor atiende una conexión a la vez: cada petición usa su propio cliente
+    client = CompileClient(socket_path, **options)
+    try:
+        return client.compile_source(source)
+    finally:
+        client.close()
+
+
+def test_no_symbols_forwarded(socket_path):
+    assert compile_source(socket_path, PROGRAMS['valido']).symbols
+    result = compile_source(socket_path, PROGRAMS['valido'], report_symbols=False)
+    assert result.success and not result.symbols
+
+
+def test_unknown_lexer_rejected(socket_path):
+    with pytest.raises(RuntimeError, match="lexer desconocido"):
+        compile_source(socket_path, PROGRAMS['valido'], lexer_name='otro')
@@ -0,0 +1,60 @@
+"""Comparación diferencial de FastLexer contra el lexer generado por ANTLR: mismos tokens
+(tipo, texto, posiciones) y mismos errores para cada entrada (python -m pytest -q)"""
+import os
+import random
+
+import pytest
+from antlr4 import InputStream, Token
+
+from MiLenguajeLexer import MiLenguajeLexer
+from error_listener import MiErrorListener
+from fast_lexer import FastLexer, LITERAL_TYPES
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SAMPLES = {
+    'declaraciones': 'ent x = 12;\nflt y = 3.14;\nlg z = 7l;\nstr s = "hola";\n',
+    'control': 'for (ent i = 0; i < 3; i = i + 1) {\n    if (i == 2) { clg("dos" $ i); }\n}\n',
+    'comentarios': '// comentario\nent a = 1; // otro\r\n\tclg(a);//fin',
+    'errores': 'ent x = @;\n"sin cerrar\nñ = 2.5l # 12lx\n',
+}
+
+FUZZ_PIECES = list(LITERAL_TYPES) + [
+    "x", "abc_1", "Z9", "if2", "ent_", "0", "12", "3.14", "7l", "2.5l", "1.", ".5", "12lx",
+    '"hola"', '"a b"', '"', '""', "//c\n", "//", "/", "!", "!x", "@", "#", "é", "ñ2", "\U0001F600", "\n", "\r\n", "\t", " ", "  ",
+]
+
+
+def tokenize(lexer_class, source):
+    """Lista de (tipo, texto, inicio, fin, línea, columna) y errores producidos por un lexer"""
+    lexer = lexer_class(InputStream(source))
+    lexer.removeErrorListeners()
+    listener = MiErrorListener()
+    lexer.addErrorListener(listener)
+    tokens = []
+    while True:
+        token = lexer.nextToken()
+        tokens.append((token.type, token.text, token.start, token.stop, token.line, token.column))
+        if token.type == Token.EOF:
+            return tokens, listener.get_errors()
+
+
+def assert_same_tokens(source):
+    assert tokenize(FastLexer, source) == tokenize(MiLenguajeLexer, source), repr(source)
+
+
+def test_example_program():
+    with open(os.path.join(HERE, "test_ok.txt"), encoding='utf-8') as f:
+        assert_same_tokens(f.read())
+
+
+@pytest.mark.parametrize('name', SAMPLES)
+def test_samples(name):
+    assert_same_tokens(SAMPLES[name])
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_fuzz(seed):
+    rng = random.Random(seed)
+    for _ in range(400):
+        assert_same_tokens("".join(rng.choice(FUZZ_PIECES) for _ in range(rng.randint(1, 40))))
@@ -0,0 +1,102 @@
+"""Regresión de la memorización de funciones puras: con y sin MemoTable (y con --no-memo)
+cada programa debe imprimir lo mismo (python -m pytest -q)"""
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+
+import bytecode
+import interpreter
+from main import load_analyzed_program
+from runtime import ProgramIO, MemoTable, MiRuntimeError
+
+PROGRAMS = {
+    # -0.0 == 0.0: la clave del caché debe distinguirlos
+    'cero_negativo': """
+fct inv(flt x) : flt { rtn x * 1.0; }
+flt nz = 0.0 * (0 - 1);
+clg(inv(nz));
+clg(inv(0.0));
+clg(inv(nz));
+""",
+    'recursion': """
+fct fib(ent n) : ent {
+    if (n < 2) {
+        rtn n;
+    }
+    rtn fib(n - 1) + fib(n - 2);
+}
+for (ent i = 0; i < 20; i = i + 1) {
+    ent f = fib(i);
+    clg("fib" $ i $ f);
+}
+""",
+    # Varios argumentos y tipos, con más claves que entradas en un caché chico
+    'argumentos': """
+fct mezcla(ent a, flt b, str s) : str {
+    rtn s + "!";
+}
+fct escala(lg a, flt b) : flt {
+    rtn a * b;
+}
+for (ent i = 0; i < 6; i = i + 1) {
+    flt e = escala(3l, 0.5 * i);
+    str m = mezcla(i, 1.5, "hola");
+    clg("valor" $ e $ m);
+    e = escala(3l, 0.5 * (i % 2));
+    clg(e);
+}
+""",
+}
+
+BACKENDS = {
+    'vm': lambda program, io_, memo: bytecode.run_module(bytecode.compile_program(program), io_, memo),
+    'closure': lambda program, io_, memo: interpreter.run_program(program, io_, memo=memo),
+}
+
+
+def run(name, backend, memo):
+    program = load_analyzed_program(name, PROGRAMS[name])
+    assert program is not None
+    out = io.StringIO()
+    try:
+        BACKENDS[backend](program, ProgramIO(io.StringIO(""), out), memo)
+    except MiRuntimeError as e:
+        out.write(f"<error> {e}")
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('size', [1, 2, 4096])
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_memo_keeps_output(name, backend, size):
+    assert run(name, backend, MemoTable(size)) == run(name, backend, None)
+
+
+def test_memo_signed_zero():
+    assert run('cero_negativo', 'vm', MemoTable()) == "-0.0\n0.0\n-0.0\n"
+
+
+def test_memo_hits():
+    memo = MemoTable()
+    run('recursion', 'closure', memo)
+    cache, = memo.caches
+    assert cache.name == 'fib' and cache.hits > 0
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_no_memo_flag(tmp_path, backend):
+    path = tmp_path / "programa.txt"
+    path.write_text(PROGRAMS['cero_negativo'], encoding='utf-8')
+    main = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+    def output(*flags):
+        process = subprocess.run([sys.executable, main, str(path), f"--run={backend}", *flags],
+                                 capture_output=True, text=True)
+        return process.stdout
+
+    memoized = output("--memo-report")
+    assert "=== MEMORIZACIÓN ===" in memoized and "inv" in memoized
+    assert output() == output("--no-memo")
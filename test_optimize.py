@@ -0,0 +1,95 @@
+"""Regresión de --optimize: cada programa debe imprimir lo mismo con y sin optimizar en
+todos los backends (python -m pytest -q)"""
+import io
+
+import pytest
+
+import bytecode
+import c_backend
+import interpreter
+import transpiler
+from codegen import BackendError
+from main import load_analyzed_program
+from runtime import ProgramIO, MiRuntimeError
+
+PROGRAMS = {
+    # Una llamada dentro del ciclo asigna una global que el cuerpo lee antes de la llamada
+    'llamada_en_ciclo': """
+ent g = 1;
+fct setg(ent v) : ent { g = v; rtn 0; }
+ent i = 0;
+while (i < 3) { clg(g); ent z = setg(i + 10); i = i + 1; }
+clg(g);
+""",
+    # Igual, con la función declarada dentro del cuerpo de un for
+    'funcion_en_ciclo': """
+ent h = 1;
+for (ent k = 0; k < 3; k = k + 1) {
+    clg(h);
+    fct seth(ent v) : ent { h = v; rtn 0; }
+    ent q = seth(k + 20);
+}
+clg(h);
+""",
+    # La llamada está en la condición del ciclo
+    'llamada_en_condicion': """
+ent n = 0;
+fct siguiente() : ent { n = n + 1; rtn n; }
+ent vueltas = 0;
+while (siguiente() < 4) { clg(n); vueltas = vueltas + 1; }
+clg(vueltas);
+""",
+    'constantes_y_codigo_muerto': """
+const ent base = 6;
+fct sumar(ent a, ent b) : ent {
+    ent c = 10;
+    rtn a + b;
+    clg("nunca");
+}
+ent x = base * 2;
+if (1 == 2) {
+    clg("falso");
+} else {
+    x = x + 1;
+}
+ent y = 3;
+y = x + base;
+for (ent i = 0; i < 3; i = i + 1) {
+    ent s = sumar(x, i);
+    clg("suma" $ s $ y);
+}
+""",
+}
+
+BACKENDS = {
+    'vm': lambda program, io_: bytecode.run_module(bytecode.compile_program(program), io_),
+    'python': lambda program, io_: transpiler.run_python(transpiler.compile_python(program), io_),
+    'closure': lambda program, io_: interpreter.run_program(program, io_),
+    'c': lambda program, io_: c_backend.run_program(program, io_),
+}
+
+
+def run(name, backend, optimize):
+    program = load_analyzed_program(name, PROGRAMS[name], optimize=optimize)
+    assert program is not None
+    out = io.StringIO()
+    try:
+        BACKENDS[backend](program, ProgramIO(io.StringIO(""), out))
+    except MiRuntimeError as e:
+        out.write(f"<error> {e}")
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_optimize_keeps_output(name, backend):
+    if backend == 'c':
+        try:
+            c_backend.find_compiler()
+        except BackendError:
+            pytest.skip("sin compilador de C")
+    assert run(name, backend, True) == run(name, backend, False)
+
+
+def test_loop_call_output():
+    assert run('llamada_en_ciclo', 'vm', True) == "1\n10\n11\n12\n"
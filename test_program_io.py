@@ -0,0 +1,104 @@
+"""Entrada y salida con buffer de los programas (ProgramIO): las líneas leídas por bloques y
+la salida acumulada deben coincidir con la lectura y escritura línea por línea
+(python -m pytest -q)"""
+import codecs
+import io
+import os
+
+import pytest
+
+import runtime
+from runtime import ProgramIO
+
+
+class CountingWriter(io.StringIO):
+    """Salida que cuenta las escrituras"""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def pipe_io(data):
+    """ProgramIO leyendo con os.read de una tubería que ya contiene data"""
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, data)
+    os.close(write_fd)
+    program_io = ProgramIO(io.StringIO(), io.StringIO())
+    program_io.input_fd = read_fd
+    program_io.decoder = codecs.getincrementaldecoder('utf-8')()
+    return program_io, read_fd
+
+
+def read_lines(program_io, count):
+    return [program_io.read_line() for _ in range(count)]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 1 << 16])
+def test_lines_across_chunks(monkeypatch, chunk_size):
+    monkeypatch.setattr(runtime, 'INPUT_CHUNK_SIZE', chunk_size)
+    program_io = ProgramIO(io.StringIO("uno\ndos\n\ntres ñ\nfinal"), io.StringIO())
+    assert read_lines(program_io, 6) == ["uno", "dos", "", "tres ñ", "final", ""]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 4, 1 << 16])
+def test_crlf_split_between_reads(monkeypatch, chunk_size):
+    monkeypatch.setattr(runtime, 'INPUT_CHUNK_SIZE', chunk_size)
+    program_io, read_fd = pipe_io("ab\r\ncd\r\n\r\né\r\nfin".encode('utf-8'))
+    try:
+        assert read_lines(program_io, 6) == ["ab", "cd", "", "é", "fin", ""]
+    finally:
+        os.close(read_fd)
+
+
+def test_read_rest_after_line(monkeypatch):
+    monkeypatch.setattr(runtime, 'INPUT_CHUNK_SIZE', 3)
+    program_io, read_fd = pipe_io(b"a\r\nbcdef\r\ng")
+    try:
+        assert program_io.read_line() == "a"
+        assert program_io.read_rest() == "bcdef\ng"
+    finally:
+        os.close(read_fd)
+
+
+def test_long_line(monkeypatch):
+    monkeypatch.setattr(runtime, 'INPUT_CHUNK_SIZE', 16)
+    line = "x" * 100000
+    program_io = ProgramIO(io.StringIO(line + "\ncorta\n"), io.StringIO())
+    assert read_lines(program_io, 2) == [line, "corta"]
+    assert program_io.input_parts == []
+
+
+def test_output_buffered_until_input():
+    out = CountingWriter()
+    program_io = ProgramIO(io.StringIO("respuesta\n"), out)
+    program_io.write_line("pregunta")
+    program_io.write_line("otra")
+    assert out.getvalue() == ""
+    assert program_io.read_line() == "respuesta"
+    assert out.getvalue() == "pregunta\notra\n" and out.writes == 1
+
+
+def test_output_buffer_size():
+    out = io.StringIO()
+    program_io = ProgramIO(io.StringIO(""), out, buffer_size=10)
+    program_io.write_line("1234")
+    assert out.getvalue() == ""
+    program_io.write_line("5678")
+    assert out.getvalue() == "1234\n5678\n"
+    program_io.write_line("9")
+    program_io.flush()
+    assert out.getvalue() == "1234\n5678\n9\n"
+
+
+def test_flush_lines():
+    out = io.StringIO()
+    program_io = ProgramIO(io.StringIO(""), out, flush_lines=True)
+    program_io.write_line("a")
+    assert out.getvalue() == "a\n"
+    program_io.write_line("b")
+    assert out.getvalue() == "a\nb\n"
@@ -0,0 +1,339 @@
+import ast
+import sys
+import traceback
+from ast_nodes import (Declaration, Assignment, ForStep, Function, If, For, While, Print, Return,
+                       Expression, Comparison, Call, Name, Number, String)
+from codegen import SlotResolver, value_type, needs_conversion
+from runtime import MiRuntimeError, ProgramIO, DEFAULT_VALUES, INVALID_OPERATION
+from type_system import Type
+
+ARITHMETIC_OPERATORS = {'+': ast.Add, '-': ast.Sub, '*': ast.Mult, '/': ast.Div, '%': ast.Mod}
+
+COMPARISON_OPERATORS = {'<': ast.Lt, '>': ast.Gt, '<=': ast.LtE, '>=': ast.GtE, '==': ast.Eq, '!=': ast.NotEq}
+
+CONVERSION_FUNCTIONS = {Type.ENT: 'int', Type.LG: 'int', Type.FLT: 'float'}
+
+# Nombres internos del código generado; los de MiLenguaje llevan prefijo y no chocan con estos
+ENTRY_POINT = '_principal'
+WRITE_LINE = '_escribir'
+READ_VALUE = '_leer'
+TAIL_CALL_FLAG = '_cola'  # Verdadero mientras una llamada de cola sale de los ciclos con break
+
+# Límite de recursión de Python mientras se ejecuta el programa (cada llamada de
+# MiLenguaje es una llamada de Python)
+RECURSION_LIMIT = 20000
+
+
+def located(node, line):
+    """Asigna la línea de MiLenguaje a los nodos de Python que aún no tienen posición"""
+    for child in ast.walk(node):
+        if 'lineno' in child._attributes and getattr(child, 'lineno', None) is None:
+            child.lineno = child.end_lineno = line
+            child.col_offset = child.end_col_offset = 0
+    return node
+
+
+class PythonTranspiler:
+    """Traduce el AST analizado a un módulo de Python (`ast`).
+
+    Todo el programa queda dentro de la función _principal: sus variables son locales de
+    Python (rápidas) y cada `fct` es una función anidada que las ve como clausura y usa
+    `nonlocal` para modificarlas. Cada declaración tiene su propio nombre de Python
+    (prefijo g/l + slot), así que el sombreado entre bloques se conserva."""
+
+    def __init__(self):
+        self.resolver = SlotResolver()
+        self.assigned_globals = []  # Por función en construcción: nombres globales modificados
+        self.loop_depth = 0         # Ciclos abiertos dentro de la función en construcción
+        self.tail_jumps = 0         # Llamadas de cola traducidas a continue en esa función
+        self.tail_breaks = 0        # De ellas, las que están dentro de un ciclo (break)
+
+    def transpile(self, program):
+        body = self.body(program.body)
+        function = ast.FunctionDef(
+            name=ENTRY_POINT,
+            args=self.arguments([WRITE_LINE, READ_VALUE]),
+            body=body or [ast.Pass()], decorator_list=[], returns=None, type_params=[])
+        module = ast.Module(body=[located(function, 1)], type_ignores=[])
+        return ast.fix_missing_locations(module)
+
+    @staticmethod
+    def arguments(names):
+        return ast.arguments(posonlyargs=[], args=[ast.arg(arg=name) for name in names],
+                             kwonlyargs=[], kw_defaults=[], defaults=[])
+
+    # Nombres
+    def variable_name(self, variable):
+        prefix = 'g' if variable.is_global else 'l'
+        return f"{prefix}{variable.index}_{variable.name}"
+
+    @staticmethod
+    def function_name(function):
+        return f"f{function.index}_{function.name}"
+
+    def load(self, variable):
+        return ast.Name(id=self.variable_name(variable), ctx=ast.Load())
+
+    def store(self, variable, value):
+        name = self.variable_name(variable)
+        if variable.is_global and self.assigned_globals:
+            self.assigned_globals[-1].add(name)
+        return ast.Assign(targets=[ast.Name(id=name, ctx=ast.Store())], value=value)
+
+    @staticmethod
+    def convert(value, source_type, target_type):
+        if needs_conversion(source_type, target_type):
+            return ast.Call(func=ast.Name(id=CONVERSION_FUNCTIONS[target_type], ctx=ast.Load()),
+                            args=[value], keywords=[])
+        return value
+
+    # Sentencias
+    def body(self, statements):
+        result = []
+        for statement in statements:
+            generated = self.STATEMENT_TRANSLATORS[type(statement)](self, statement)
+            if isinstance(generated, list):
+                result.extend(generated)
+            else:
+                result.append(located(generated, statement.line))
+        return result
+
+    def block(self, statements):
+        return self.body(statements) or [ast.Pass()]
+
+    def declaration(self, node):
+        if node.reads_input:
+            value = ast.Call(func=ast.Name(id=READ_VALUE, ctx=ast.Load()),
+                             args=[ast.Constant(int(node.type)), ast.Constant(node.line)], keywords=[])
+        elif node.init is not None:
+            value = self.convert(self.expression(node.init), value_type(node.init), node.type)
+        else:
+            value = ast.Constant(DEFAULT_VALUES[node.type])
+        return self.store(self.resolver.declare_variable(node.name, node.type), value)
+
+    def assignment(self, node):
+        variable = self.resolver.variable(node.name, node)
+        value = self.convert(self.expression(node.value), value_type(node.value), variable.type)
+        return self.store(variable, value)
+
+    def function(self, node):
+        function = self.resolver.declare_function(node)
+        self.resolver.enter_function(function)
+        self.assigned_globals.append(set())
+        outer = self.loop_depth, self.tail_jumps, self.tail_breaks
+        self.loop_depth = self.tail_jumps = self.tail_breaks = 0
+        body = self.body(node.body)
+        tail_jumps, tail_breaks = self.tail_jumps, self.tail_breaks
+        self.loop_depth, self.tail_jumps, self.tail_breaks = outer
+        if function.return_type != Type.VOID:
+            # Al llegar al final sin rtn se retorna el valor por defecto del tipo
+            body.append(ast.Return(value=ast.Constant(DEFAULT_VALUES[function.return_type])))
+            if tail_jumps:
+                # Las llamadas de cola reasignan los parámetros y vuelven aquí con continue
+                body = [located(ast.While(test=ast.Constant(True), body=body, orelse=[]), node.line)]
+                if tail_breaks:
+                    body.insert(0, located(self.set_tail_flag(False), node.line))
+        modified = self.assigned_globals.pop()
+        if modified:
+            body.insert(0, ast.Nonlocal(names=sorted(modified)))
+        params = [self.variable_name(param) for param in function.params]
+        self.resolver.exit_function()
+        return ast.FunctionDef(name=self.function_name(function), args=self.arguments(params),
+                               body=body or [ast.Pass()], decorator_list=[], returns=None, type_params=[])
+
+    def if_statement(self, node):
+        self.resolver.enter_block()
+        test = self.comparison(node.condition)
+        then_body = self.block(node.then_body)
+        else_body = self.body(node.else_body)
+        self.resolver.exit_block()
+        return ast.If(test=test, body=then_body, orelse=else_body)
+
+    def while_loop(self, node):
+        self.resolver.enter_block()
+        test = self.comparison(node.condition)
+        tail_breaks = self.tail_breaks
+        self.loop_depth += 1
+        body = self.block(node.body)
+        self.loop_depth -= 1
+        self.resolver.exit_block()
+        loop = located(ast.While(test=test, body=body, orelse=[]), node.line)
+        return [loop] + self.after_tail_break(tail_breaks, node.line)
+
+    def for_loop(self, node):
+        # for (init; condición; paso) { cuerpo } -> init; while condición: cuerpo; paso
+        self.resolver.enter_block()
+        statements = []
+        if node.init is not None:
+            init = self.STATEMENT_TRANSLATORS[type(node.init)](self, node.init)
+            statements.append(located(init, node.init.line))
+        test = self.comparison(node.condition)
+        tail_breaks = self.tail_breaks
+        self.loop_depth += 1
+        body = self.body(node.body)
+        self.loop_depth -= 1
+        body.append(located(self.assignment(node.step), node.step.line))
+        statements.append(located(ast.While(test=test, body=body, orelse=[]), node.line))
+        statements.extend(self.after_tail_break(tail_breaks, node.line))
+        self.resolver.exit_block()
+        return statements
+
+    def print_statement(self, node):
+        if node.value is not None:
+            text = self.expression(node.value)
+            if value_type(node.value) != Type.STR:
+                text = ast.Call(func=ast.Name(id='str', ctx=ast.Load()), args=[text], keywords=[])
+        else:
+            parts = [ast.Constant(node.template)] if node.template else []
+            for name in node.names:
+                parts.append(ast.FormattedValue(value=self.load(self.resolver.variable(name, node)),
+                                                conversion=-1, format_spec=None))
+            text = ast.JoinedStr(values=parts) if node.names else ast.Constant(node.template)
+        return ast.Expr(value=ast.Call(func=ast.Name(id=WRITE_LINE, ctx=ast.Load()), args=[text], keywords=[]))
+
+    def return_statement(self, node):
+        if node.tail_call:
+            return self.tail_call(node)
+        value = self.convert(self.expression(node.value), value_type(node.value),
+                             self.resolver.current_function.return_type)
+        return ast.Return(value=value)
+
+    def tail_call(self, node):
+        """rtn f(...) en la propia f: asignación a los parámetros y continue del while que
+        envuelve el cuerpo. Dentro de un ciclo de MiLenguaje el continue sería de ese ciclo:
+        ahí se marca TAIL_CALL_FLAG y se sale con break (ver after_tail_break)"""
+        function = self.resolver.current_function
+        self.tail_jumps += 1
+        values = [self.convert(self.expression(arg), value_type(arg), param.type)
+                  for arg, param in zip(node.value.args, function.params)]
+        statements = []
+        if values:
+            targets = [ast.Name(id=self.variable_name(param), ctx=ast.Store()) for param in function.params]
+            if len(values) == 1:
+                statements.append(ast.Assign(targets=targets, value=values[0]))
+            else:
+                statements.append(ast.Assign(targets=[ast.Tuple(elts=targets, ctx=ast.Store())],
+                                             value=ast.Tuple(elts=values, ctx=ast.Load())))
+        if self.loop_depth:
+            self.tail_breaks += 1
+            statements.append(self.set_tail_flag(True))
+            statements.append(ast.Break())
+        else:
+            statements.append(ast.Continue())
+        return [located(statement, node.line) for statement in statements]
+
+    def after_tail_break(self, tail_breaks, line):
+        """Sentencias tras un ciclo del que puede salir una llamada de cola (si hubo más
+        desde tail_breaks): sale también del ciclo que lo contiene, o en el cuerpo de la
+        función baja la marca y vuelve al inicio"""
+        if self.tail_breaks == tail_breaks:
+            return []
+        if self.loop_depth:
+            body = [ast.Break()]
+        else:
+            body = [self.set_tail_flag(False), ast.Continue()]
+        test = ast.Name(id=TAIL_CALL_FLAG, ctx=ast.Load())
+        return [located(ast.If(test=test, body=body, orelse=[]), line)]
+
+    @staticmethod
+    def set_tail_flag(value):
+        return ast.Assign(targets=[ast.Name(id=TAIL_CALL_FLAG, ctx=ast.Store())], value=ast.Constant(value))
+
+    def call_statement(self, node):
+        return ast.Expr(value=self.call(node))
+
+    # Expresiones
+    def expression(self, node):
+        kind = type(node)
+        if kind is Name:
+            return self.load(self.resolver.variable(node.name, node))
+        if kind is Number or kind is String:
+            return ast.Constant(node.value)
+        if kind is Call:
+            return self.call(node)
+        # Evaluación de izquierda a derecha, sin precedencia
+        result = self.expression(node.operands[0])
+        for operator, operand in zip(node.operators, node.operands[1:]):
+            result = ast.BinOp(left=result, op=ARITHMETIC_OPERATORS[operator](), right=self.expression(operand))
+        return result
+
+    def comparison(self, node):
+        return ast.Compare(left=self.expression(node.left), ops=[COMPARISON_OPERATORS[node.operator]()],
+                           comparators=[self.expression(node.right)])
+
+    def call(self, node):
+        function = self.resolver.function(node.name, node)
+        args = [self.convert(self.expression(arg), value_type(arg), param.type)
+                for arg, param in zip(node.args, function.params)]
+        return ast.Call(func=ast.Name(id=self.function_name(function), ctx=ast.Load()), args=args, keywords=[])
+
+    STATEMENT_TRANSLATORS = {
+        Declaration: declaration,
+        Assignment: assignment,
+        ForStep: assignment,
+        Function: function,
+        If: if_statement,
+        For: for_loop,
+        While: while_loop,
+        Print: print_statement,
+        Return: return_statement,
+        Call: call_statement,
+    }
+
+
+def transpile(program):
+    """Módulo `ast` de Python equivalente a un Program analizado"""
+    return PythonTranspiler().transpile(program)
+
+
+# Permite ejecutar el archivo emitido directamente (con el proyecto en el PYTHONPATH)
+STANDALONE_FOOTER = f'''
+
+if __name__ == '__main__':
+    from runtime import ProgramIO
+    _io = ProgramIO()
+    {ENTRY_POINT}(_io.write_line, _io.read_value)
+    _io.flush()
+'''
+
+
+def python_source(program):
+    """Código fuente de Python generado para un Program analizado"""
+    return ast.unparse(transpile(program)) + STANDALONE_FOOTER
+
+
+def compile_python(program, filename="<milenguaje>"):
+    """Objeto código de Python listo para ejecutar con run_python"""
+    return compile(transpile(program), filename, 'exec')
+
+
+def error_line(exc, filename):
+    """Línea de MiLenguaje del marco generado más interno en el traceback de una excepción"""
+    line = None
+    for frame, lineno in traceback.walk_tb(exc.__traceback__):
+        if frame.f_code.co_filename == filename:
+            line = lineno
+    return line
+
+
+def run_python(code, io=None):
+    """Ejecuta un objeto código generado por compile_python"""
+    io = io or ProgramIO()
+    namespace = {}
+    exec(code, namespace)
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, RECURSION_LIMIT))
+    try:
+        namespace[ENTRY_POINT](io.write_line, io.read_value)
+    except MiRuntimeError:
+        raise
+    except ZeroDivisionError as e:
+        message = "Módulo por cero" if "modulo" in str(e) else "División por cero"
+        raise MiRuntimeError(message, error_line(e, code.co_filename))
+    except (TypeError, ValueError, OverflowError) as e:
+        raise MiRuntimeError(INVALID_OPERATION, error_line(e, code.co_filename))
+    except RecursionError as e:
+        raise MiRuntimeError("Recursión demasiado profunda", error_line(e, code.co_filename))
+    finally:
+        sys.setrecursionlimit(limit)
+        io.flush()
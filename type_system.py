@@ -0,0 +1,62 @@
+import operator
+from enum import IntEnum
+from MiLenguajeParser import MiLenguajeParser as P
+
+
+class Type(IntEnum):
+    """Tipos de MiLenguaje como enteros pequeños; se imprimen con su nombre en el lenguaje"""
+    ENT = 0
+    FLT = 1
+    LG = 2
+    STR = 3
+    VOID = 4
+
+    def __str__(self):
+        return TYPE_NAMES[self]
+
+    def __format__(self, spec):
+        return format(TYPE_NAMES[self], spec)
+
+
+TYPE_NAMES = ("ent", "flt", "lg", "str", "void")
+
+TYPES_BY_NAME = {name: Type(code) for code, name in enumerate(TYPE_NAMES)}
+
+NUMERIC_TYPES = (Type.ENT, Type.FLT, Type.LG)
+
+# Tipo de TipoContext según su única alternativa (kwEnt, kwFlt, kwLg o kwStr)
+TYPES_BY_CONTEXT = {
+    P.KwEntContext: Type.ENT,
+    P.KwFltContext: Type.FLT,
+    P.KwLgContext: Type.LG,
+    P.KwStrContext: Type.STR,
+}
+
+
+def type_of(tipo_ctx):
+    """Tipo declarado por un TipoContext"""
+    return TYPES_BY_CONTEXT[type(tipo_ctx.children[0])]
+
+
+def compatible_type(type1, type2):
+    """Regla de compatibilidad: el mismo tipo, o el numérico más amplio (lg > flt > ent)"""
+    if type1 == type2:
+        return type1
+    if type1 in NUMERIC_TYPES and type2 in NUMERIC_TYPES:
+        if Type.LG in (type1, type2):
+            return Type.LG
+        if Type.FLT in (type1, type2):
+            return Type.FLT
+        return Type.ENT
+    return None
+
+
+# Matrices precalculadas, indexadas por [tipo1][tipo2]: tipo resultante de una operación
+# aritmética o asignación (None si son incompatibles) y si dos tipos se pueden comparar
+RESULT_TYPES = tuple(tuple(compatible_type(t1, t2) for t2 in Type) for t1 in Type)
+
+COMPARABLE = tuple(tuple(result is not None for result in row) for row in RESULT_TYPES)
+
+# Operadores de comparación (mismas reglas que Python para números y textos)
+COMPARISON_OPERATORS = {'<': operator.lt, '>': operator.gt, '<=': operator.le, '>=': operator.ge,
+                        '==': operator.eq, '!=': operator.ne}
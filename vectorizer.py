@@ -0,0 +1,293 @@
+from ast_nodes import Assignment, Declaration, Expression, Name, Number
+from codegen import value_type, needs_conversion
+from type_system import Type
+
+# NumPy se importa al vectorizar el primer ciclo: importarlo cuesta más que ejecutar un
+# programa corto, y es opcional (sin él los ciclos se ejecutan siempre iterando)
+np = None
+
+# Con menos iteraciones crear los arreglos cuesta más que iterar
+MIN_ITERATIONS = 64
+
+# Mayor magnitud que puede tomar un entero intermedio para calcularlo en int64 sin desbordar
+INT64_LIMIT = 2 ** 63 - 1
+
+# Enteros que se convierten a float64 sin redondeo (operandos de '/')
+EXACT_FLOAT_LIMIT = 2 ** 53
+
+# Condición `a op b` equivalente con los operandos intercambiados
+FLIPPED = {'<': '>', '>': '<', '<=': '>=', '>=': '<=', '==': '==', '!=': '!='}
+
+INTEGER_TYPES = (Type.ENT, Type.LG)
+
+
+def available():
+    """Importa NumPy si hace falta; False si no está instalado"""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+
+class Fallback(Exception):
+    """El ciclo no se puede vectorizar con estos valores: se ejecuta iterando"""
+
+
+class LoopPlan:
+    """Forma de un for vectorizable: contador afín y asignaciones independientes.
+
+    updates tiene (variable, tipo, clase, expresión): clase 'sum' acumula +expresión en
+    cada iteración, 'sub' acumula -expresión y 'set' deja el valor de la última iteración."""
+    __slots__ = ('counter', 'operator', 'bound', 'step', 'updates', 'names')
+
+    def __init__(self, counter, operator, bound, step, updates, names):
+        self.counter = counter
+        self.operator = operator
+        self.bound = bound
+        self.step = step
+        self.updates = updates
+        self.names = names  # Variables leídas o escritas (contador incluido)
+
+
+def names_in(node, found):
+    kind = type(node)
+    if kind is Name:
+        found.add(node.name)
+    elif kind is Expression:
+        for operand in node.operands:
+            names_in(operand, found)
+    elif kind is not Number:
+        return False  # Llamadas y cadenas no se vectorizan
+    return True
+
+
+def chain(operands, operators, template):
+    """Subexpresión formada por los primeros términos de una cadena de izquierda a derecha"""
+    if len(operands) == 1:
+        return operands[0]
+    return Expression(operands, operators, template.line, template.column)
+
+
+def classify(node):
+    """(clase, expresión por iteración) de una asignación del cuerpo, o None"""
+    target, value = node.name, node.value
+    if type(value) is Expression:
+        operands, operators = value.operands, value.operators
+        first, last = operands[0], operands[-1]
+        # v = v + t, v = v - t (un solo término: v + a * b es (v + a) * b)
+        if (len(operands) == 2 and type(first) is Name and first.name == target
+                and operators[0] in '+-'):
+            return ('sum' if operators[0] == '+' else 'sub'), operands[1]
+        # v = ... + v
+        if type(last) is Name and last.name == target and operators[-1] == '+':
+            return 'sum', chain(operands[:-1], operators[:-1], value)
+    return 'set', value
+
+
+def analyze_loop(node, type_of_name):
+    """LoopPlan de un For si tiene la forma vectorizable, o None (requiere available()).
+
+    type_of_name(nombre) da el tipo de una variable visible en el ciclo. El cuerpo solo puede tener asignaciones sin
+    llamadas, cada variable se asigna una vez y ninguna expresión lee una variable que el
+    cuerpo modifica (salvo el propio acumulador en su término de suma)."""
+    if node.init is None:
+        return None
+    init = node.init
+    counter = init.name
+    if type(init) is Declaration:
+        if init.reads_input:
+            return None
+        counter_type = init.type
+    elif type(init) is Assignment:
+        counter_type = type_of_name(counter)
+    else:
+        return None
+    if counter_type not in INTEGER_TYPES:
+        return None
+
+    # Paso: i = i + k o i = i - k con k entero constante distinto de cero
+    step = node.step.value
+    if (node.step.name != counter or type(step) is not Expression or len(step.operands) != 2
+            or step.operators[0] not in '+-'):
+        return None
+    left, right = step.operands
+    if type(left) is not Name or left.name != counter or type(right) is not Number:
+        return None
+    if type(right.value) is not int or right.value == 0:
+        return None
+    stride = right.value if step.operators[0] == '+' else -right.value
+
+    # Condición: i op límite, con el límite invariante
+    condition = node.condition
+    operator = condition.operator
+    bound = condition.right
+    if type(condition.left) is not Name or condition.left.name != counter:
+        if type(condition.right) is not Name or condition.right.name != counter:
+            return None
+        operator, bound = FLIPPED[operator], condition.left
+    bound_names = set()
+    if not names_in(bound, bound_names) or counter in bound_names or value_type(bound) not in INTEGER_TYPES:
+        return None
+
+    targets = []
+    for statement in node.body:
+        if type(statement) is not Assignment or statement.name == counter or statement.name in targets:
+            return None
+        targets.append(statement.name)
+    if bound_names & set(targets):
+        return None
+
+    updates = []
+    names = {counter} | bound_names | set(targets)
+    for statement in node.body:
+        target_type = type_of_name(statement.name)
+        kind, expression = classify(statement)
+        read = set()
+        if not names_in(expression, read) or read & set(targets):
+            return None
+        source_type = value_type(expression)
+        if source_type not in (Type.ENT, Type.LG, Type.FLT) or target_type not in (Type.ENT, Type.LG, Type.FLT):
+            return None
+        # Un acumulador entero que suma floats se trunca en cada iteración: no es una suma
+        if kind != 'set' and needs_conversion(source_type, target_type):
+            return None
+        names |= read
+        updates.append((statement.name, target_type, kind, expression))
+    return LoopPlan(counter, operator, bound, stride, updates, names)
+
+
+def trip_count(operator, start, bound, stride):
+    """Número de iteraciones de `for (i = start; i op bound; i = i + stride)`"""
+    if operator in ('<', '<='):
+        limit = bound + 1 if operator == '<=' else bound
+        if start >= limit:
+            return 0
+        if stride < 0:
+            raise Fallback()  # No termina: se deja al ciclo normal
+        return -(-(limit - start) // stride)
+    if operator in ('>', '>='):
+        limit = bound - 1 if operator == '>=' else bound
+        if start <= limit:
+            return 0
+        if stride > 0:
+            raise Fallback()
+        return -(-(start - limit) // -stride)
+    if operator == '==':
+        return 1 if start == bound else 0
+    # '!=': solo si el contador alcanza exactamente el límite
+    distance = bound - start
+    if distance % stride != 0 or distance // stride < 0:
+        raise Fallback()
+    return distance // stride
+
+
+def magnitude(node, counter, counter_bound, scalars):
+    """Cota de |valor| de una expresión sobre todas las iteraciones; inf si es float"""
+    kind = type(node)
+    if kind is Name:
+        if node.name == counter:
+            return counter_bound
+        value = scalars[node.name]
+        return abs(value) if isinstance(value, int) else float('inf')
+    if kind is Number:
+        return abs(node.value) if isinstance(node.value, int) else float('inf')
+    result = magnitude(node.operands[0], counter, counter_bound, scalars)
+    for operator, operand in zip(node.operators, node.operands[1:]):
+        right = magnitude(operand, counter, counter_bound, scalars)
+        if operator == '/':
+            # Los enteros pasan a float64 antes de dividir: deben ser exactos (inf = ya es float)
+            if EXACT_FLOAT_LIMIT <= result < float('inf') or EXACT_FLOAT_LIMIT <= right < float('inf'):
+                raise Fallback()
+            result = float('inf')
+        elif operator == '%':
+            result = right
+        elif operator == '*':
+            result = result * right
+        else:
+            result = result + right
+        if result != float('inf') and result > INT64_LIMIT:
+            raise Fallback()
+    return result
+
+
+def evaluate(node, counter, values, scalars):
+    """Valor de la expresión para todas las iteraciones (arreglo) o escalar si no usa el contador"""
+    kind = type(node)
+    if kind is Name:
+        return values if node.name == counter else scalars[node.name]
+    if kind is Number:
+        return node.value
+    result = evaluate(node.operands[0], counter, values, scalars)
+    for operator, operand in zip(node.operators, node.operands[1:]):
+        right = evaluate(operand, counter, values, scalars)
+        if operator in '/%' and np.any(np.equal(right, 0)):
+            raise Fallback()  # El ciclo normal reporta el error en la iteración correcta
+        if operator == '+':
+            result = result + right
+        elif operator == '-':
+            result = result - right
+        elif operator == '*':
+            result = result * right
+        elif operator == '/':
+            result = np.true_divide(result, right)
+        else:
+            result = np.remainder(result, right)
+    return result
+
+
+def python_value(value, type_code):
+    """Escalar de Python del tipo de la variable (no se dejan escalares de NumPy en el marco)"""
+    if type_code == Type.FLT:
+        return float(value)
+    return int(value)
+
+
+def run_plan(plan, scalars):
+    """Valores finales de las variables tras ejecutar el ciclo, a partir de sus valores
+    iniciales (el contador ya inicializado). Lanza Fallback si no se puede vectorizar."""
+    start = scalars[plan.counter]
+    bound = evaluate(plan.bound, None, None, scalars)
+    if isinstance(bound, np.integer):
+        bound = int(bound)
+    if not isinstance(start, int) or not isinstance(bound, int):
+        raise Fallback()
+    count = trip_count(plan.operator, start, bound, plan.step)
+    if count < MIN_ITERATIONS:
+        raise Fallback()
+    last = start + (count - 1) * plan.step
+    counter_bound = max(abs(start), abs(last))
+    if counter_bound > INT64_LIMIT:
+        raise Fallback()
+
+    values = np.arange(start, last + plan.step, plan.step, dtype=np.int64)[:count]
+    results = {plan.counter: start + count * plan.step}
+    for target, type_code, kind, expression in plan.updates:
+        bound_value = magnitude(expression, plan.counter, counter_bound, scalars)
+        terms = evaluate(expression, plan.counter, values, scalars)
+        if kind == 'set':
+            last_value = terms[-1] if np.ndim(terms) else terms
+            if type_code in INTEGER_TYPES and isinstance(last_value, (float, np.floating)):
+                if not np.isfinite(last_value):
+                    raise Fallback()
+                last_value = int(last_value)  # int() trunca hacia cero
+            results[target] = python_value(last_value, type_code)
+            continue
+        initial = scalars[target]
+        if type_code == Type.FLT:
+            # Suma secuencial (como el ciclo) para redondear igual: cumsum desde el valor inicial
+            terms = np.broadcast_to(np.asarray(terms, dtype=np.float64), (count,))
+            if kind == 'sub':
+                terms = -terms
+            total = np.cumsum(np.concatenate(([initial], terms)))[-1]
+        else:
+            if abs(initial) + count * bound_value > INT64_LIMIT:
+                raise Fallback()
+            terms = np.broadcast_to(np.asarray(terms, dtype=np.int64), (count,))
+            total = np.sum(terms, dtype=np.int64)
+            total = initial + int(total) if kind == 'sum' else initial - int(total)
+        results[target] = python_value(total, type_code)
+    return results